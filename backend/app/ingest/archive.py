@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+from datetime import date, datetime, timezone
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+try:
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - boto3 is optional, see storage.s3_client
+    class ClientError(Exception):  # type: ignore[no-redef]
+        response: Dict[str, Any] = {}
+
+from ..database import SessionLocal
+from ..models.import_batches import ImportBatch
+from ..observability.events import log_event
+from ..storage.s3_client import get_s3_client
+from .staging_tables import STAGING_MODELS, purge_staged_rows
+from .staging_writer import STAGING_BATCH_SIZE, staging_writer
+
+STAGING_ARCHIVE_ENABLED = os.getenv("STAGING_ARCHIVE_ENABLED", "true").lower() == "true"
+STAGING_ARCHIVE_PREFIX = os.getenv("STAGING_ARCHIVE_PREFIX", "staging-archive")
+
+
+def _archive_object_key(prefix: str, table_name: str) -> str:
+    return f"{prefix}/{table_name}.jsonl.gz"
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def archive_staged_rows(
+    db: Session,
+    import_batch_id: str,
+    *,
+    s3: Any = None,
+    bucket: Optional[str] = None,
+    window: int = STAGING_BATCH_SIZE,
+) -> Dict[str, int]:
+    """Move a batch's staging rows to object storage.
+
+    Every staging table's rows for the batch are written, in ``row_num``
+    order, as one gzip-compressed JSON-lines object under
+    ``<STAGING_ARCHIVE_PREFIX>/<batch id>/``.  Only once all objects are
+    stored are the rows deleted and the batch's ``archive_key`` and
+    ``archived_at`` set, in one commit.  Staging checkpoints are kept so a
+    retried ingest still knows the batch was staged.
+
+    Returns the number of rows archived per staging table.
+    """
+    s3 = s3 or get_s3_client()
+    bucket = bucket or os.environ.get("S3_BUCKET")
+    batch = db.get(ImportBatch, import_batch_id)
+    if batch is None:
+        raise ValueError(f"Import batch {import_batch_id} not found")
+    prefix = f"{STAGING_ARCHIVE_PREFIX}/{import_batch_id}"
+
+    counts: Dict[str, int] = {}
+    for name, model in STAGING_MODELS.items():
+        table = model.__table__
+        stmt = (
+            sa.select(table)
+            .where(table.c.import_batch_id == import_batch_id)
+            .order_by(table.c.row_num)
+            .execution_options(yield_per=window)
+        )
+        buf = BytesIO()
+        written = 0
+        with gzip.GzipFile(fileobj=buf, mode="wb") as out:
+            for row in db.execute(stmt).mappings():
+                line = json.dumps({c: _encode(v) for c, v in row.items()})
+                out.write(line.encode("utf-8") + b"\n")
+                written += 1
+        if written:
+            s3.put_object(
+                Bucket=bucket,
+                Key=_archive_object_key(prefix, name),
+                Body=buf.getvalue(),
+                ContentType="application/gzip",
+            )
+        counts[name] = written
+
+    purge_staged_rows(db, import_batch_id, checkpoints=False)
+    batch.archive_key = prefix
+    batch.archived_at = datetime.now(timezone.utc)
+    db.commit()
+    log_event("staging_archived", import_batch_id=import_batch_id, counts=counts)
+    return counts
+
+
+# Error codes S3 (and MinIO) answer with for a key that does not exist.
+_MISSING_KEY_CODES = ("NoSuchKey", "404")
+
+
+def restore_staged_rows(
+    db: Session,
+    import_batch_id: str,
+    *,
+    s3: Any = None,
+    bucket: Optional[str] = None,
+) -> Dict[str, int]:
+    """Put an archived batch's staging rows back into the staging tables.
+
+    Meant for audits.  Rows already staged for the batch are replaced, so
+    restoring twice is harmless, and ``archived_at`` is cleared because the
+    rows live in the database again; ``archive_key`` is kept.  Returns the
+    number of rows restored per staging table; a table without an archived
+    object restores none, while any other storage error is raised.
+    """
+    s3 = s3 or get_s3_client()
+    bucket = bucket or os.environ.get("S3_BUCKET")
+    batch = db.get(ImportBatch, import_batch_id)
+    if batch is None or batch.archive_key is None:
+        raise ValueError(f"Import batch {import_batch_id} has no staging archive")
+
+    counts: Dict[str, int] = {}
+    purge_staged_rows(db, import_batch_id, checkpoints=False)
+    for name, model in STAGING_MODELS.items():
+        table = model.__table__
+        parsers = {
+            c.name: datetime.fromisoformat if isinstance(c.type, sa.DateTime) else date.fromisoformat
+            for c in table.columns
+            if isinstance(c.type, (sa.Date, sa.DateTime))
+        }
+        try:
+            obj = s3.get_object(Bucket=bucket, Key=_archive_object_key(batch.archive_key, name))
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") not in _MISSING_KEY_CODES:
+                raise
+            counts[name] = 0  # nothing was staged in this table
+            continue
+        writer = staging_writer(db, table)
+        with gzip.GzipFile(fileobj=BytesIO(obj["Body"].read()), mode="rb") as lines:
+            for line in lines:
+                row = json.loads(line)
+                for col, parse in parsers.items():
+                    if row.get(col) is not None:
+                        row[col] = parse(row[col])
+                writer.add(row)
+        writer.flush()
+        counts[name] = writer.rows_written
+
+    batch.archived_at = None
+    db.commit()
+    log_event("staging_restored", import_batch_id=import_batch_id, counts=counts)
+    return counts
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Archive or restore staged rows.")
+    parser.add_argument("command", choices=["archive", "restore"])
+    parser.add_argument("import_batch_id")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        if args.command == "archive":
+            counts = archive_staged_rows(db, args.import_batch_id)
+        else:
+            counts = restore_staged_rows(db, args.import_batch_id)
+    finally:
+        db.close()
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import hashlib
+from typing import BinaryIO, Optional, Union
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.import_batches import ImportBatch
+from ..models.ingestion_jobs import IngestionJob, IngestionJobStatus
+from ..models.uploads import Upload, UploadObject
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_sha256(content: Union[bytes, BinaryIO]) -> str:
+    """Return the hex SHA-256 digest identifying an uploaded file's bytes.
+
+    ``content`` is either the bytes or a binary file, which is hashed
+    ``HASH_CHUNK_SIZE`` bytes at a time instead of being read whole.
+    """
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(content).hexdigest()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def stored_object_key(db: Session, org_id: int, digest: str) -> Optional[str]:
+    """Return the key the org's file with content ``digest`` is stored under."""
+    stored = db.get(UploadObject, (org_id, digest))
+    return None if stored is None else stored.object_key
+
+
+def claim_upload_object(db: Session, org_id: int, digest: str, object_key: str) -> str:
+    """Record ``object_key`` as the stored object for the org's ``digest``.
+
+    Call it once the object is written; it commits.  Returns the key
+    uploads of that content should point at: ``object_key``, or the key a
+    concurrent upload of the same bytes claimed first, in which case the
+    caller's own object is redundant.
+    """
+    db.add(UploadObject(org_id=org_id, content_sha256=digest, object_key=object_key))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return stored_object_key(db, org_id, digest)
+    return object_key
+
+
+def reusable_import_batch(db: Session, upload: Upload) -> Optional[ImportBatch]:
+    """Return the batch an ingest of ``upload`` would merely reproduce.
+
+    That is the case when the org's most recent successful ingest was of a
+    file with the same content hash.  Anything older is not reused: newer
+    data may have been loaded since, and re-ingesting the old file is then a
+    real change.
+    """
+    if upload.content_sha256 is None:
+        return None
+    last = (
+        db.query(IngestionJob, Upload.content_sha256)
+        .join(Upload, Upload.id == IngestionJob.upload_id)
+        .filter(
+            IngestionJob.org_id == upload.org_id,
+            IngestionJob.status == IngestionJobStatus.success,
+        )
+        .order_by(IngestionJob.id.desc())
+        .first()
+    )
+    if last is None or last[1] != upload.content_sha256:
+        return None
+    return db.get(ImportBatch, last[0].import_batch_id)
+
+
+def record_deduplicated_job(db: Session, upload: Upload) -> Optional[IngestionJob]:
+    """Record a no-op job for ``upload`` if ingesting it would change nothing.
+
+    When :func:`reusable_import_batch` finds a batch, a successful job with
+    ``deduplicated`` set is committed against it and returned; otherwise
+    ``None`` is returned and the caller queues a real ingest.
+    """
+    previous = reusable_import_batch(db, upload)
+    if previous is None:
+        return None
+    job = IngestionJob(
+        org_id=upload.org_id,
+        upload_id=upload.id,
+        import_batch_id=previous.id,
+        status=IngestionJobStatus.success,
+        deduplicated=True,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
@@ -2,7 +2,69 @@ import datetime
 import hashlib
 import json
 import math
-from typing import Any, Dict
+import os
+from typing import Any, Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import xxhash  # type: ignore
+except ImportError:  # pragma: no cover - optional, faster row hashes when installed
+    xxhash = None
+
+
+class HashAlgorithm(NamedTuple):
+    """A row hash algorithm; ``version`` is stored next to each ``row_hash``."""
+
+    name: str
+    version: int
+    digest: Callable[[bytes], str]
+
+
+HASH_ALGORITHMS: Dict[str, HashAlgorithm] = {}
+# Version of the row hashes stored before versions were recorded: SHA-256 of
+# the cells as pandas read them, e.g. a whole number in a float column as
+# ``5.0``.  Cells are hashed as ``workbook.canonical_frame`` values now, so
+# no algorithm produces it any more; loads restamp such unchanged rows.
+LEGACY_HASH_VERSION = 1
+
+
+def register_hash_algorithm(name: str, version: int, digest: Callable[[bytes], str]) -> HashAlgorithm:
+    """Make ``digest`` available as row hash algorithm ``name``.
+
+    ``version`` identifies its hashes in the database, so it must never be
+    reused for a different algorithm.
+    """
+    if version == LEGACY_HASH_VERSION:
+        raise ValueError(f"Hash version {version} is reserved for legacy row hashes")
+    for algorithm in HASH_ALGORITHMS.values():
+        if algorithm.version == version and algorithm.name != name:
+            raise ValueError(f"Hash version {version} is already used by {algorithm.name}")
+    algorithm = HASH_ALGORITHMS[name] = HashAlgorithm(name, version, digest)
+    return algorithm
+
+
+register_hash_algorithm("sha256", 2, lambda data: hashlib.sha256(data).hexdigest())
+register_hash_algorithm(
+    "blake2b", 3, lambda data: hashlib.blake2b(data, digest_size=16).hexdigest()
+)
+if xxhash is not None:
+    register_hash_algorithm("xxh3_128", 4, xxhash.xxh3_128_hexdigest)
+
+ROW_HASH_ALGORITHM = os.getenv("ROW_HASH_ALGORITHM", "sha256")
+
+
+def row_hash_algorithm(name: Optional[str] = None) -> HashAlgorithm:
+    """Return the registered algorithm ``name``, by default ``ROW_HASH_ALGORITHM``."""
+    name = name or ROW_HASH_ALGORITHM
+    try:
+        return HASH_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(f"Unknown row hash algorithm: {name}") from None
+
+
+def _could_be_iso_date(value: str) -> bool:
+    """Cheap pre-check: every ISO date or datetime starts with a 4-digit year."""
+    year = value[:4]
+    return len(year) == 4 and year.isdigit() and year.isascii()
 
 
 def canonicalize(value: Any) -> Any:
@@ -21,6 +83,8 @@ def canonicalize(value: Any) -> Any:
     if isinstance(value, str):
         v = value.strip().lower()
         candidate = v[:-1] if v.endswith("z") else v
+        if not _could_be_iso_date(candidate):
+            return v
         for parser in (datetime.datetime.fromisoformat, datetime.date.fromisoformat):
             try:
                 return parser(candidate).isoformat()
@@ -34,9 +98,74 @@ def canonicalize(value: Any) -> Any:
     return value
 
 
-def canonical_row_hash(row: Dict[str, Any]) -> str:
-    """Return a deterministic SHA256 hash for a row of data."""
+def canonical_row_hash(row: Dict[str, Any], algorithm: Optional[HashAlgorithm] = None) -> str:
+    """Return a deterministic hash for a row of data.
 
+    ``algorithm`` defaults to :func:`row_hash_algorithm`; store its
+    ``version`` with the hash.
+    """
+
+    algorithm = algorithm or row_hash_algorithm()
     payload = json.dumps(canonicalize(row), separators=(",", ":"), ensure_ascii=False)
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return algorithm.digest(payload.encode("utf-8"))
+
+
+# Same output as ``json.dumps(value, separators=(",", ":"), ensure_ascii=False)``
+# without building a new encoder per call.
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+def canonical_row_hashes(
+    columns: Mapping[str, Sequence[Any]], algorithm: Optional[HashAlgorithm] = None
+) -> List[str]:
+    """Return :func:`canonical_row_hash` for every row of a column-wise sheet.
+
+    ``columns`` maps column names to equally long value sequences.  Each
+    distinct value is canonicalized and serialized once and the row payload
+    is assembled from the cached fragments, so sheets with many repeated
+    values (project IDs, dates, categories) avoid most of the per-row work.
+    The hashes are identical to hashing each row dict individually.
+    """
+
+    algorithm = algorithm or row_hash_algorithm()
+    names = sorted(columns)
+    if not names:
+        return []
+    if not all(isinstance(name, str) for name in names):
+        rows = zip(*(columns[name] for name in names))
+        return [canonical_row_hash(dict(zip(names, row)), algorithm) for row in rows]
+
+    str_memo: Dict[str, str] = {}
+    memo: Dict[Tuple[type, Hashable], str] = {}
+
+    def fragment(value: Any) -> str:
+        if type(value) is str:
+            cached = str_memo.get(value)
+            if cached is None:
+                cached = str_memo[value] = _dumps(canonicalize(value))
+            return cached
+        if value is None:
+            return "null"
+        if isinstance(value, float):
+            if math.isnan(value):
+                return "null"
+            # 0.0 == -0.0 but they serialize differently; key on the exact bits.
+            key: Tuple[type, Hashable] = (float, value.hex())
+        elif isinstance(value, datetime.datetime) and value.tzinfo is not None:
+            # Equal instants in different zones have different ISO strings.
+            return _dumps(canonicalize(value))
+        elif isinstance(value, (int, datetime.date)):
+            key = (type(value), value)
+        else:  # containers and other types may be equal yet serialize differently
+            return _dumps(canonicalize(value))
+        cached = memo.get(key)
+        if cached is None:
+            cached = memo[key] = _dumps(canonicalize(value))
+        return cached
 
+    serialized = []
+    for name in names:
+        prefix = _dumps(name) + ":"
+        serialized.append([prefix + fragment(v) for v in columns[name]])
+    digest = algorithm.digest
+    return [digest(("{" + ",".join(parts) + "}").encode("utf-8")) for parts in zip(*serialized)]
@@ -1,387 +1,532 @@
 from __future__ import annotations
 
-import uuid
-from datetime import date
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
 
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import bindparam, exists, func, select, text, tuple_
 
-from ..database import SessionLocal
+from ..database import SessionLocal, engine
 from ..models import (
     Project,
     Activity,
     Outcome,
     FundingResource,
     Beneficiary,
+    ImportBatch,
     StgProjectInfo,
     StgActivity,
     StgOutcome,
     StgFundingResource,
     StgBeneficiary,
 )
+from .mapping_loader import load_mapping
+from .normalize import typed_values
+from .upsert import LOOKUP_CHUNK_SIZE, Classified, Stamp, chunked, classify, write_changes
 
+LOAD_PARALLEL = os.getenv("LOAD_PARALLEL", "false").lower() == "true"
+LOAD_MAX_WORKERS = int(os.getenv("LOAD_MAX_WORKERS", "4"))
+LOAD_WINDOW_SIZE = int(os.getenv("LOAD_WINDOW_SIZE", "5000"))
 
-def _parse_date(val: str | None) -> date | None:
-    if not val:
-        return None
-    return date.fromisoformat(val)
 
+@dataclass(frozen=True)
+class EntitySpec:
+    """How one staging table maps onto its core table."""
 
-def _parse_int(val):
-    if val is None or val == "":
-        return None
-    return int(val)
+    name: str
+    staging: Type
+    model: Type
+    key: Tuple[str, ...]
+    sheet: str
 
 
-def _parse_float(val):
-    if val is None or val == "":
-        return None
-    return float(val)
+PROJECT_SPEC = EntitySpec(
+    "projects", StgProjectInfo, Project, ("owner_org_id", "project_id"), "project_info"
+)
+CHILD_SPECS = (
+    EntitySpec(
+        "activities",
+        StgActivity,
+        Activity,
+        ("project_fk", "activity_name", "date"),
+        "activities",
+    ),
+    EntitySpec(
+        "outcomes",
+        StgOutcome,
+        Outcome,
+        ("project_fk", "outcome_metric", "date"),
+        "outcomes",
+    ),
+    EntitySpec(
+        "funding_resources",
+        StgFundingResource,
+        FundingResource,
+        ("project_fk", "funding_source", "date"),
+        "funding_resources",
+    ),
+    EntitySpec(
+        "beneficiaries",
+        StgBeneficiary,
+        Beneficiary,
+        ("project_fk", "group", "date"),
+        "beneficiaries",
+    ),
+)
 
 
-def load_to_core(import_batch_id: str) -> dict:
-    """Load normalized data from staging tables into core tables.
+ENTITY_NAMES = (PROJECT_SPEC.name,) + tuple(spec.name for spec in CHILD_SPECS)
 
-    The function performs idempotent upserts based on natural keys or the
-    stored row hash.  When the same data is ingested multiple times it
-    results in no changes to the core tables.
+# Staging columns copied to the core tables as they are.
+LINEAGE_COLUMNS = (
+    "row_hash",
+    "hash_version",
+    "source_system",
+    "external_id",
+    "ingested_at",
+    "import_batch_id",
+    "schema_version",
+)
+
+
+def _backfill_typed_columns(session: Session, spec: EntitySpec, import_batch_id: str) -> None:
+    """Fill the typed columns of rows staged with ``raw_json`` only.
+
+    Rows staged before the typed columns existed have no ``project_id``,
+    which every valid staged row carries otherwise; they are normalized here
+    once, the same way staging does it, so the load can read typed columns
+    only.  Normally this is a single query that finds nothing.
     """
+    stg = spec.staging
+    legacy = session.execute(
+        select(stg.id, stg.raw_json).where(
+            stg.import_batch_id == import_batch_id,
+            stg.parse_errors.is_(None),
+            stg.project_id.is_(None),
+        )
+    ).all()
+    if not legacy:
+        return
+    columns = tuple(stg.typed_columns())
+    mapping = load_mapping()
+    updates = []
+    for id_, raw in legacy:
+        values, parse_errors = typed_values(raw, spec.sheet, columns, mapping=mapping)
+        if parse_errors is None and values["project_id"] is None:
+            parse_errors = {"missing": ["project_id"]}
+        updates.append({**values, "parse_errors": parse_errors, "_id": id_})
+    table = stg.__table__
+    # The SET clause follows the parameter keys of the executemany.
+    session.execute(table.update().where(table.c.id == bindparam("_id")), updates)
 
-    session: Session = SessionLocal()
-    # Ensure SQLite enforces foreign key constraints
-    session.execute(text("PRAGMA foreign_keys=ON"))
-    counts = {
-        "projects": {"inserted": 0, "updated": 0},
-        "activities": {"inserted": 0, "updated": 0},
-        "outcomes": {"inserted": 0, "updated": 0},
-        "funding_resources": {"inserted": 0, "updated": 0},
-        "beneficiaries": {"inserted": 0, "updated": 0},
-    }
 
-    try:
-        # Projects ---------------------------------------------------------
-        project_rows = (
-            session.query(StgProjectInfo)
-            .filter(
-                StgProjectInfo.import_batch_id == import_batch_id,
-                StgProjectInfo.parse_errors.is_(None),
-            )
-            .all()
+def _staged_windows(
+    session: Session, spec: EntitySpec, import_batch_id: str, window: int
+) -> Iterator[Sequence[Any]]:
+    """Yield the batch's new or changed staged rows, ``window`` at a time.
+
+    Only the typed columns and the lineage columns are read; ``raw_json``
+    is never decoded.  A staged row is unchanged when the core row with its
+    natural key (for child rows, through the project its ``(owner_org_id,
+    project_id)`` names) already stores its ``row_hash`` with the same
+    ``hash_version``, so an anti-join correlated on the natural key drops it
+    in the database, served by the natural-key index; hashes of different
+    versions or of another org's rows are never compared.  Rows with a
+    ``NULL`` key part never match here and are left to the upsert, which
+    still counts them as unchanged.  Re-ingesting an unchanged file reads
+    next to nothing.  Rows are streamed (a server-side cursor on
+    PostgreSQL) rather than fetched all at once, so memory use is bounded by
+    ``window``.
+    """
+    stg, core = spec.staging, spec.model
+    columns = stg.typed_columns() + list(LINEAGE_COLUMNS)
+    stored = exists().where(
+        core.row_hash == stg.row_hash, core.hash_version == stg.hash_version
+    )
+    if spec is PROJECT_SPEC:
+        stored = stored.where(
+            core.owner_org_id == stg.owner_org_id, core.project_id == stg.project_id
         )
-        for row in project_rows:
-            data = row.raw_json
-            owner = data.get("owner_org_id")
-            pid = data.get("project_id")
-            existing = (
-                session.query(Project)
-                .filter_by(owner_org_id=owner, project_id=pid)
-                .one_or_none()
-            )
-            if existing:
-                if existing.row_hash != row.row_hash:
-                    existing.name = data.get("name")
-                    existing.org_name = data.get("org_name")
-                    existing.start_date = _parse_date(data.get("start_date"))
-                    existing.end_date = _parse_date(data.get("end_date"))
-                    existing.country = data.get("country")
-                    existing.region = data.get("region")
-                    existing.sdg_goal = data.get("sdg_goal")
-                    existing.notes = data.get("notes")
-                    existing.row_hash = row.row_hash
-                    existing.source_system = row.source_system
-                    existing.external_id = row.external_id
-                    existing.ingested_at = row.ingested_at
-                    existing.import_batch_id = row.import_batch_id
-                    existing.schema_version = row.schema_version
-                    counts["projects"]["updated"] += 1
-            else:
-                proj = Project(
-                    id=str(uuid.uuid4()),
-                    owner_org_id=owner,
-                    project_id=pid,
-                    name=data.get("name"),
-                    org_name=data.get("org_name"),
-                    start_date=_parse_date(data.get("start_date")),
-                    end_date=_parse_date(data.get("end_date")),
-                    country=data.get("country"),
-                    region=data.get("region"),
-                    sdg_goal=data.get("sdg_goal"),
-                    notes=data.get("notes"),
-                    row_hash=row.row_hash,
-                    source_system=row.source_system,
-                    external_id=row.external_id,
-                    ingested_at=row.ingested_at,
-                    import_batch_id=row.import_batch_id,
-                    schema_version=row.schema_version,
-                )
-                session.add(proj)
-                counts["projects"]["inserted"] += 1
-
-        # ensure projects are flushed so children can reference them
-        session.flush()
-
-        # Activities ------------------------------------------------------
-        activity_rows = (
-            session.query(StgActivity)
-            .filter(
-                StgActivity.import_batch_id == import_batch_id,
-                StgActivity.parse_errors.is_(None),
-            )
-            .all()
+    else:
+        stored = stored.where(
+            core.project_fk == Project.id,
+            Project.owner_org_id == stg.owner_org_id,
+            Project.project_id == stg.project_id,
+            *(getattr(core, c) == getattr(stg, c) for c in spec.key[1:]),
         )
-        for row in activity_rows:
-            data = row.raw_json
-            owner = data.get("owner_org_id")
-            pid = data.get("project_id")
-            project = (
-                session.query(Project)
-                .filter_by(owner_org_id=owner, project_id=pid)
-                .one_or_none()
-            )
-            project_fk = project.id if project else data.get("project_id")
-            existing = session.query(Activity).filter(Activity.row_hash == row.row_hash).one_or_none()
-            if not existing:
-                existing = (
-                    session.query(Activity)
-                    .filter(
-                        Activity.project_fk == project_fk,
-                        Activity.activity_name == data.get("activity_name"),
-                        Activity.date == _parse_date(data.get("date")),
-                    )
-                    .one_or_none()
-                )
-            if existing:
-                if existing.row_hash != row.row_hash:
-                    existing.activity_type = data.get("activity_type")
-                    existing.beneficiaries_reached = _parse_int(
-                        data.get("beneficiaries_reached")
-                    )
-                    existing.location = data.get("location")
-                    existing.notes = data.get("notes")
-                    existing.row_hash = row.row_hash
-                    existing.source_system = row.source_system
-                    existing.external_id = row.external_id
-                    existing.ingested_at = row.ingested_at
-                    existing.import_batch_id = row.import_batch_id
-                    existing.schema_version = row.schema_version
-                    counts["activities"]["updated"] += 1
-            else:
-                obj = Activity(
-                    id=str(uuid.uuid4()),
-                    project_fk=project_fk,
-                    date=_parse_date(data.get("date")),
-                    activity_type=data.get("activity_type"),
-                    activity_name=data.get("activity_name"),
-                    beneficiaries_reached=_parse_int(
-                        data.get("beneficiaries_reached")
-                    ),
-                    location=data.get("location"),
-                    notes=data.get("notes"),
-                    row_hash=row.row_hash,
-                    source_system=row.source_system,
-                    external_id=row.external_id,
-                    ingested_at=row.ingested_at,
-                    import_batch_id=row.import_batch_id,
-                    schema_version=row.schema_version,
-                )
-                session.add(obj)
-                counts["activities"]["inserted"] += 1
-
-        # Outcomes --------------------------------------------------------
-        outcome_rows = (
-            session.query(StgOutcome)
-            .filter(
-                StgOutcome.import_batch_id == import_batch_id,
-                StgOutcome.parse_errors.is_(None),
-            )
-            .all()
+    stmt = (
+        select(*(getattr(stg, c) for c in columns))
+        .where(
+            stg.import_batch_id == import_batch_id,
+            stg.parse_errors.is_(None),
+            ~stored,
         )
-        for row in outcome_rows:
-            data = row.raw_json
-            owner = data.get("owner_org_id")
-            pid = data.get("project_id")
-            project = (
-                session.query(Project)
-                .filter_by(owner_org_id=owner, project_id=pid)
-                .one_or_none()
-            )
-            project_fk = project.id if project else data.get("project_id")
-            existing = session.query(Outcome).filter(Outcome.row_hash == row.row_hash).one_or_none()
-            if not existing:
-                existing = (
-                    session.query(Outcome)
-                    .filter(
-                        Outcome.project_fk == project_fk,
-                        Outcome.outcome_metric == data.get("outcome_metric"),
-                        Outcome.date == _parse_date(data.get("date")),
-                    )
-                    .one_or_none()
-                )
-            if existing:
-                if existing.row_hash != row.row_hash:
-                    existing.value = _parse_float(data.get("value"))
-                    existing.unit = data.get("unit")
-                    existing.method = data.get("method")
-                    existing.notes = data.get("notes")
-                    existing.row_hash = row.row_hash
-                    existing.source_system = row.source_system
-                    existing.external_id = row.external_id
-                    existing.ingested_at = row.ingested_at
-                    existing.import_batch_id = row.import_batch_id
-                    existing.schema_version = row.schema_version
-                    counts["outcomes"]["updated"] += 1
-            else:
-                obj = Outcome(
-                    id=str(uuid.uuid4()),
-                    project_fk=project_fk,
-                    date=_parse_date(data.get("date")),
-                    outcome_metric=data.get("outcome_metric"),
-                    value=_parse_float(data.get("value")),
-                    unit=data.get("unit"),
-                    method=data.get("method"),
-                    notes=data.get("notes"),
-                    row_hash=row.row_hash,
-                    source_system=row.source_system,
-                    external_id=row.external_id,
-                    ingested_at=row.ingested_at,
-                    import_batch_id=row.import_batch_id,
-                    schema_version=row.schema_version,
-                )
-                session.add(obj)
-                counts["outcomes"]["inserted"] += 1
-
-        # Funding resources -----------------------------------------------
-        fr_rows = (
-            session.query(StgFundingResource)
-            .filter(
-                StgFundingResource.import_batch_id == import_batch_id,
-                StgFundingResource.parse_errors.is_(None),
-            )
-            .all()
+        .order_by(stg.row_num)
+        .execution_options(yield_per=window)
+    )
+    yield from session.execute(stmt).partitions()
+
+
+def _project_ids(
+    session: Session, keys: Iterable[Tuple[str, str]]
+) -> Dict[Tuple[str, str], str]:
+    """Map ``(owner_org_id, project_id)`` pairs to ``Project.id``.
+
+    All pairs are resolved up front (a handful of queries per batch rather
+    than one per child row); pairs without a project are simply absent.
+    """
+    keys = list(set(keys))
+    found: Dict[Tuple[str, str], str] = {}
+    for chunk in chunked(keys, LOOKUP_CHUNK_SIZE):
+        rows = session.query(
+            Project.owner_org_id, Project.project_id, Project.id
+        ).filter(tuple_(Project.owner_org_id, Project.project_id).in_(chunk))
+        for owner, pid, id_ in rows:
+            found[(owner, pid)] = id_
+    return found
+
+
+class _ProjectIds:
+    """``(owner_org_id, project_id) -> Project.id`` cache for one load.
+
+    Shared by the child entity loaders, which may run on several threads;
+    each pair is looked up at most once per load.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[Tuple[str, str], str] = {}
+        self._seen: set = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, session: Session, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        with self._lock:
+            missing = set(keys) - self._seen
+        if missing:
+            found = _project_ids(session, missing)
+            with self._lock:
+                self._ids.update(found)
+                self._seen |= missing
+        return self._ids
+
+
+def _core_rows(
+    session: Session, spec: EntitySpec, staged: Sequence[Any], project_ids: _ProjectIds
+) -> List[Dict[str, Any]]:
+    """Map staged rows to column dicts for ``spec``'s core table.
+
+    The typed staging columns are named like the core columns, so rows are
+    taken over as they are; child rows swap their ``(owner_org_id,
+    project_id)`` for the ``project_fk`` it resolves to.
+    """
+    if spec is PROJECT_SPEC:
+        return [dict(row._mapping) for row in staged]
+    ids = project_ids.resolve(session, ((row.owner_org_id, row.project_id) for row in staged))
+    rows = []
+    for row in staged:
+        data = dict(row._mapping)
+        owner, pid = data.pop("owner_org_id"), data.pop("project_id")
+        data["project_fk"] = ids.get((owner, pid), pid)
+        rows.append(data)
+    return rows
+
+
+def _classified_windows(
+    session: Session,
+    spec: EntitySpec,
+    import_batch_id: str,
+    project_ids: _ProjectIds,
+    window: int = LOAD_WINDOW_SIZE,
+) -> Iterator[Classified]:
+    """Yield :func:`~.upsert.classify` results for one entity's staged windows.
+
+    Nothing is written; a key repeated across windows is classified against
+    the row an earlier window would have written.  A row that is unchanged
+    but for its hash version and lineage is a restamp, not an update, so
+    switching ``ROW_HASH_ALGORITHM`` neither counts nor reports unchanged
+    rows as changed.
+    """
+    table = spec.model.__table__
+    pending: Dict[Tuple, Stamp] = {}
+    for staged in _staged_windows(session, spec, import_batch_id, window):
+        rows = _core_rows(session, spec, staged, project_ids)
+        yield classify(
+            session, table, rows, key=spec.key, pending=pending, ignore=LINEAGE_COLUMNS
         )
-        for row in fr_rows:
-            data = row.raw_json
-            owner = data.get("owner_org_id")
-            pid = data.get("project_id")
-            project = (
-                session.query(Project)
-                .filter_by(owner_org_id=owner, project_id=pid)
-                .one_or_none()
-            )
-            project_fk = project.id if project else data.get("project_id")
-            existing = session.query(FundingResource).filter(FundingResource.row_hash == row.row_hash).one_or_none()
-            if not existing:
-                existing = (
-                    session.query(FundingResource)
-                    .filter(
-                        FundingResource.project_fk == project_fk,
-                        FundingResource.funding_source == data.get("funding_source"),
-                        FundingResource.date == _parse_date(data.get("date")),
-                    )
-                    .one_or_none()
-                )
-            if existing:
-                if existing.row_hash != row.row_hash:
-                    existing.received = _parse_float(data.get("received"))
-                    existing.spent = _parse_float(data.get("spent"))
-                    existing.volunteer_hours = _parse_float(
-                        data.get("volunteer_hours")
-                    )
-                    existing.staff_hours = _parse_float(data.get("staff_hours"))
-                    existing.notes = data.get("notes")
-                    existing.row_hash = row.row_hash
-                    existing.source_system = row.source_system
-                    existing.external_id = row.external_id
-                    existing.ingested_at = row.ingested_at
-                    existing.import_batch_id = row.import_batch_id
-                    existing.schema_version = row.schema_version
-                    counts["funding_resources"]["updated"] += 1
-            else:
-                obj = FundingResource(
-                    id=str(uuid.uuid4()),
-                    project_fk=project_fk,
-                    date=_parse_date(data.get("date")),
-                    funding_source=data.get("funding_source"),
-                    received=_parse_float(data.get("received")),
-                    spent=_parse_float(data.get("spent")),
-                    volunteer_hours=_parse_float(data.get("volunteer_hours")),
-                    staff_hours=_parse_float(data.get("staff_hours")),
-                    notes=data.get("notes"),
-                    row_hash=row.row_hash,
-                    source_system=row.source_system,
-                    external_id=row.external_id,
-                    ingested_at=row.ingested_at,
-                    import_batch_id=row.import_batch_id,
-                    schema_version=row.schema_version,
-                )
-                session.add(obj)
-                counts["funding_resources"]["inserted"] += 1
-
-        # Beneficiaries ---------------------------------------------------
-        ben_rows = (
-            session.query(StgBeneficiary)
-            .filter(
-                StgBeneficiary.import_batch_id == import_batch_id,
-                StgBeneficiary.parse_errors.is_(None),
+
+
+class _EntityWriter:
+    """Writes one entity's classified windows through ``session``.
+
+    Windows classified on another session do not see the rows written
+    here, so those are laid over the stored rows a window found.
+    ``touched`` collects what was written: project ids for projects,
+    ``(project_fk, date)`` pairs for the child entities.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        spec: EntitySpec,
+        project_ids: _ProjectIds,
+        touched: Optional[set] = None,
+    ) -> None:
+        self.session = session
+        self.spec = spec
+        self.project_ids = project_ids
+        self.touched = touched
+        self.counts = {"inserted": 0, "updated": 0}
+        self._written: Dict[Tuple, Tuple[str, Stamp]] = {}
+
+    def write(self, classified: Classified) -> None:
+        counts, final, existing, restamps = classified
+        self.counts["inserted"] += counts["inserted"]
+        self.counts["updated"] += counts["updated"]
+        existing = {**existing, **{n: self._written[n] for n in final if n in self._written}}
+        changed: List[Dict[str, Any]] = []
+        self._written.update(
+            write_changes(
+                self.session,
+                self.spec.model.__table__,
+                final,
+                existing,
+                restamps,
+                key=self.spec.key,
+                changed=changed,
             )
-            .all()
         )
-        for row in ben_rows:
-            data = row.raw_json
-            owner = data.get("owner_org_id")
-            pid = data.get("project_id")
-            project = (
-                session.query(Project)
-                .filter_by(owner_org_id=owner, project_id=pid)
-                .one_or_none()
+        if self.touched is None or not changed:
+            return
+        if self.spec is PROJECT_SPEC:
+            keys = [(r["owner_org_id"], r["project_id"]) for r in changed]
+            ids = self.project_ids.resolve(self.session, keys)
+            self.touched.update(ids[k] for k in keys if k in ids)
+        else:
+            self.touched.update((r["project_fk"], r["date"]) for r in changed)
+
+
+def _load_entity(
+    session: Session,
+    spec: EntitySpec,
+    import_batch_id: str,
+    project_ids: _ProjectIds,
+    window: int = LOAD_WINDOW_SIZE,
+    touched: Optional[set] = None,
+) -> Dict[str, int]:
+    """Upsert one entity's staged rows, one streamed window at a time.
+
+    ``touched`` collects what was written, see :class:`_EntityWriter`.
+    """
+    writer = _EntityWriter(session, spec, project_ids, touched)
+    for classified in _classified_windows(session, spec, import_batch_id, project_ids, window):
+        writer.write(classified)
+    return writer.counts
+
+
+def _resolve_child_projects(
+    session: Session, import_batch_id: str, project_ids: _ProjectIds
+) -> None:
+    """Resolve every project the batch's valid child rows name on ``session``.
+
+    Child rows classified on other sessions then find the projects this
+    load wrote but has not committed yet in ``project_ids``.
+    """
+    for spec in CHILD_SPECS:
+        stg = spec.staging
+        keys = session.execute(
+            select(stg.owner_org_id, stg.project_id)
+            .where(stg.import_batch_id == import_batch_id, stg.parse_errors.is_(None))
+            .distinct()
+        )
+        project_ids.resolve(session, [tuple(k) for k in keys])
+
+
+def _change_set(touched: Dict[str, set]) -> Dict[str, Any]:
+    """JSON-ready summary of what a load wrote, for targeted downstream work."""
+    project_fks = set(touched[PROJECT_SPEC.name])
+    changes: Dict[str, Any] = {}
+    for spec in CHILD_SPECS:
+        keys = touched[spec.name]
+        project_fks.update(pfk for pfk, _ in keys)
+        changes[spec.name] = sorted(
+            ([pfk, d.isoformat() if d else None] for pfk, d in keys),
+            key=lambda k: (k[0], k[1] or ""),
+        )
+    return {"project_fks": sorted(project_fks), **changes}
+
+
+def load_to_core(
+    import_batch_id: str,
+    *,
+    parallel: bool = LOAD_PARALLEL,
+    max_workers: int = LOAD_MAX_WORKERS,
+) -> dict:
+    """Load normalized data from staging tables into core tables.
+
+    The function performs idempotent upserts based on natural keys or the
+    stored row hash.  When the same data is ingested multiple times it
+    results in no changes to the core tables.  The batch's ``loaded_at`` and
+    ``load_counts`` are recorded in the same transaction, so callers can
+    tell that the load already committed, together with its
+    ``change_set``: the project ids touched and, per child entity, the
+    ``(project_fk, date)`` keys written, so downstream refreshes can be
+    limited to them.
+
+    Everything is written in one transaction.  With ``parallel`` the four
+    child entities are read and classified concurrently, each on its own
+    session, by at most ``max_workers`` threads, while their writes still
+    go through the load's session; a failure rolls back the whole load,
+    projects included.  SQLite, which allows a single writer, always loads
+    sequentially.
+
+    Staged rows are streamed and upserted ``LOAD_WINDOW_SIZE`` rows at a
+    time, so memory use does not grow with the size of the batch.  Besides
+    the per-entity counts the result holds each entity's wall time under
+    ``durations_ms``.
+    """
+
+    session: Session = SessionLocal()
+    sqlite = engine.dialect.name == "sqlite"
+    if sqlite:
+        # Ensure SQLite enforces foreign key constraints
+        session.execute(text("PRAGMA foreign_keys=ON"))
+    workers = min(max_workers, len(CHILD_SPECS)) if parallel else 1
+    if sqlite:
+        workers = 1
+    project_ids = _ProjectIds()
+    counts: Dict[str, Any] = {}
+    durations: Dict[str, int] = {}
+    touched: Dict[str, set] = {name: set() for name in ENTITY_NAMES}
+
+    def load(db: Session, spec: EntitySpec) -> None:
+        started = time.perf_counter()
+        counts[spec.name] = _load_entity(
+            db, spec, import_batch_id, project_ids, touched=touched[spec.name]
+        )
+        durations[spec.name] = int((time.perf_counter() - started) * 1000)
+
+    try:
+        for spec in (PROJECT_SPEC,) + CHILD_SPECS:
+            _backfill_typed_columns(session, spec, import_batch_id)
+        if workers > 1:
+            # Reader sessions only see committed staging rows; the backfill
+            # touches staging alone and is kept even if the load fails.
+            session.commit()
+        load(session, PROJECT_SPEC)
+        if workers > 1:
+            _resolve_child_projects(session, import_batch_id, project_ids)
+            loaded = _load_concurrently(
+                session, CHILD_SPECS, import_batch_id, project_ids, touched, workers
             )
-            project_fk = project.id if project else data.get("project_id")
-            existing = session.query(Beneficiary).filter(Beneficiary.row_hash == row.row_hash).one_or_none()
-            if not existing:
-                existing = (
-                    session.query(Beneficiary)
-                    .filter(
-                        Beneficiary.project_fk == project_fk,
-                        Beneficiary.group == data.get("group"),
-                        Beneficiary.date == _parse_date(data.get("date")),
-                    )
-                    .one_or_none()
-                )
-            if existing:
-                if existing.row_hash != row.row_hash:
-                    existing.count = _parse_int(data.get("count"))
-                    existing.demographic_info = data.get("demographic_info")
-                    existing.location = data.get("location")
-                    existing.notes = data.get("notes")
-                    existing.row_hash = row.row_hash
-                    existing.source_system = row.source_system
-                    existing.external_id = row.external_id
-                    existing.ingested_at = row.ingested_at
-                    existing.import_batch_id = row.import_batch_id
-                    existing.schema_version = row.schema_version
-                    counts["beneficiaries"]["updated"] += 1
-            else:
-                obj = Beneficiary(
-                    id=str(uuid.uuid4()),
-                    project_fk=project_fk,
-                    date=_parse_date(data.get("date")),
-                    group=data.get("group"),
-                    count=_parse_int(data.get("count")),
-                    demographic_info=data.get("demographic_info"),
-                    location=data.get("location"),
-                    notes=data.get("notes"),
-                    row_hash=row.row_hash,
-                    source_system=row.source_system,
-                    external_id=row.external_id,
-                    ingested_at=row.ingested_at,
-                    import_batch_id=row.import_batch_id,
-                    schema_version=row.schema_version,
-                )
-                session.add(obj)
-                counts["beneficiaries"]["inserted"] += 1
+            for name, (entity_counts, ms) in loaded.items():
+                counts[name], durations[name] = entity_counts, ms
+        else:
+            for spec in CHILD_SPECS:
+                load(session, spec)
 
+        result: Dict[str, Any] = {name: counts[name] for name in ENTITY_NAMES}
+        result["durations_ms"] = {name: durations[name] for name in ENTITY_NAMES}
+        batch = session.get(ImportBatch, import_batch_id)
+        if batch is not None:
+            batch.loaded_at = datetime.now(timezone.utc)
+            batch.load_counts = result
+            batch.change_set = _change_set(touched)
         session.commit()
-        return counts
+        return result
+    finally:
+        session.close()
+
+
+def preview_load(
+    import_batch_id: str,
+    *,
+    window: int = LOAD_WINDOW_SIZE,
+    session_factory: Optional[Callable[[], Session]] = None,
+) -> dict:
+    """Report what :func:`load_to_core` would do for a batch, without writing.
+
+    Per entity, returns how many valid staged rows would be ``inserted``,
+    ``updated`` or left ``unchanged``.  The row-hash anti-join and a count
+    query account for the unchanged rows in the database; only the
+    remaining candidates are classified against the core table's natural
+    keys, a window at a time, from plain column rows.  Children of projects
+    that do not exist yet count as inserts.  The session comes from
+    ``session_factory`` (``SessionLocal`` by default) and is rolled back.
+    """
+    session: Session = (session_factory or SessionLocal)()
+    project_ids = _ProjectIds()
+    result: Dict[str, Dict[str, int]] = {}
+    try:
+        for spec in (PROJECT_SPEC,) + CHILD_SPECS:
+            stg = spec.staging
+            _backfill_typed_columns(session, spec, import_batch_id)
+            total = session.execute(
+                select(func.count()).where(
+                    stg.import_batch_id == import_batch_id, stg.parse_errors.is_(None)
+                )
+            ).scalar_one()
+            counts = {"inserted": 0, "updated": 0}
+            for written, _, _, _ in _classified_windows(
+                session, spec, import_batch_id, project_ids, window
+            ):
+                counts["inserted"] += written["inserted"]
+                counts["updated"] += written["updated"]
+            counts["unchanged"] = total - counts["inserted"] - counts["updated"]
+            result[spec.name] = counts
+        return result
     finally:
+        session.rollback()
         session.close()
 
+
+def _load_concurrently(
+    session: Session,
+    specs: Sequence[EntitySpec],
+    import_batch_id: str,
+    project_ids: _ProjectIds,
+    touched: Dict[str, set],
+    workers: int,
+) -> Dict[str, Tuple[Dict[str, int], int]]:
+    """Load ``specs``, reading and classifying them on ``workers`` threads.
+
+    Each entity's windows are read and classified on its own session, one
+    window ahead of its writes, which all go through ``session`` so they
+    commit or roll back together.  Returns each entity's counts and wall
+    time in milliseconds.
+    """
+    readers = {spec: SessionLocal() for spec in specs}
+    windows = {
+        spec: _classified_windows(db, spec, import_batch_id, project_ids)
+        for spec, db in readers.items()
+    }
+    writers = {
+        spec: _EntityWriter(session, spec, project_ids, touched[spec.name]) for spec in specs
+    }
+    durations: Dict[str, int] = {}
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(next, windows[spec], None): spec for spec in specs}
+            try:
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        spec = futures.pop(future)
+                        classified = future.result()
+                        if classified is None:
+                            durations[spec.name] = int((time.perf_counter() - started) * 1000)
+                            continue
+                        futures[pool.submit(next, windows[spec], None)] = spec
+                        writers[spec].write(classified)
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        for db in readers.values():
+            db.close()
+    return {spec.name: (writers[spec].counts, durations[spec.name]) for spec in specs}
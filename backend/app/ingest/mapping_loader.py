@@ -1,30 +1,109 @@
+import os
+import threading
+import time
 import yaml
 from pathlib import Path
-from typing import Dict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
 
+MAPPINGS_DIR = Path(__file__).with_name("mappings")
+# Distinct header rows remembered per sheet plan.
+PLAN_HEADER_CACHE_SIZE = 64
+# Top-level mapping section describing PII handling rather than a sheet.
+PII_SECTION = "pii"
+# Seconds between checks of a cached mapping file's modification time.
+MAPPING_RELOAD_INTERVAL = float(os.getenv("MAPPING_RELOAD_INTERVAL", "1"))
 
-def load_mapping(source_system: str = "excel", version: int = 1) -> Dict[str, Dict[str, str]]:
-    """Load field mapping configuration.
 
-    Parameters
-    ----------
-    source_system: str
-        Source system identifier (e.g., "excel").
-    version: int
-        Mapping version number.
+class SheetPlan:
+    """One sheet of a mapping, compiled for normalizing rows.
 
-    Returns
-    -------
-    dict
-        Nested dictionary mapping sheet names to field mappings where
-        each field mapping maps normalized source column names to
-        universal schema names.
+    ``index`` maps trimmed, lower-cased source headers to target fields and
+    ``coercers`` holds the coercer of every target field.  :meth:`columns`
+    resolves a row's headers against the index once per distinct header
+    row, so normalizing a row is a single pass over ready-made
+    ``(header, target, coercer)`` triples.
     """
-    mappings_dir = Path(__file__).with_name("mappings")
-    path = mappings_dir / f"{source_system}_v{version}.yml"
+
+    def __init__(self, index: Dict[str, str], coercers: Dict[str, Callable[[Any], Any]]) -> None:
+        self.index = index
+        self.coercers = coercers
+        self._columns: Dict[Tuple[Hashable, ...], Tuple[Tuple[Any, str, Callable[[Any], Any]], ...]] = {}
+
+    def columns(self, headers: Tuple[Hashable, ...]) -> Tuple[Tuple[Any, str, Callable[[Any], Any]], ...]:
+        columns = self._columns.get(headers)
+        if columns is None:
+            columns = tuple(
+                (header, target, self.coercers[target])
+                for header, target in (
+                    (header, self.index.get(str(header).strip().lower())) for header in headers
+                )
+                if target is not None
+            )
+            if len(self._columns) >= PLAN_HEADER_CACHE_SIZE:
+                self._columns = {}
+            self._columns[headers] = columns
+        return columns
+
+
+class CompiledMapping(dict):
+    """A field mapping (``{sheet: {source header: target}}``) with sheet plans.
+
+    It compares equal to the plain nested dict :func:`load_mapping` always
+    returned.  Instances handed out by the registry are shared, so they must
+    not be modified.
+    """
+
+    def __init__(
+        self, fields: Dict[str, Dict[str, str]], free_text: Optional[Iterable[str]] = None
+    ) -> None:
+        super().__init__(fields)
+        self._free_text = frozenset(free_text) if free_text is not None else None
+        self._plans: Dict[Tuple[str, Tuple[str, ...]], SheetPlan] = {}
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # Plans and the lock are rebuilt on the other side, e.g. in the
+        # processes of normalize_pool().
+        return type(self), (dict(self), self._free_text)
+
+    def free_text(self, field: str) -> bool:
+        """Whether ``field`` may hold personal data to redact.
+
+        The mapping's ``pii: free_text:`` list names those fields; every
+        other field is never redacted.  Without that list every text field
+        counts as free text.
+        """
+        return self._free_text is None or field in self._free_text
+
+    def sheet(self, name: str, passthrough: Tuple[str, ...] = ()) -> SheetPlan:
+        """Return the plan for sheet ``name``.
+
+        Headers already named like one of the ``passthrough`` target fields
+        map to that field as well.
+        """
+        key = (name.strip().lower(), passthrough)
+        plan = self._plans.get(key)
+        if plan is None:
+            # normalize imports this module for load_mapping().
+            from .normalize import coercer_for
+
+            index = {field: field for field in passthrough}
+            index.update(self.get(key[0], {}))
+            coercers = {
+                target: coercer_for(target, free_text=self.free_text(target))
+                for target in set(index.values())
+            }
+            plan = SheetPlan(index, coercers)
+            with self._lock:
+                plan = self._plans.setdefault(key, plan)
+        return plan
+
+
+def _read_mapping(path: Path) -> CompiledMapping:
     with path.open("r", encoding="utf-8") as f:
         raw = yaml.safe_load(f) or {}
 
+    pii = raw.pop(PII_SECTION, None) or {}
     result: Dict[str, Dict[str, str]] = {}
     for sheet_name, fields in raw.items():
         normalized_sheet = sheet_name.strip().lower()
@@ -37,4 +116,72 @@ def load_mapping(source_system: str = "excel", version: int = 1) -> Dict[str, Di
             normalized_source = str(source).strip().lower()
             normalized_target = str(target).strip().lower()
             result[normalized_sheet][normalized_source] = normalized_target
-    return result
+    free_text = pii.get("free_text")
+    if free_text is not None:
+        free_text = [str(field).strip().lower() for field in free_text]
+    return CompiledMapping(result, free_text)
+
+
+class MappingRegistry:
+    """Process-wide cache of compiled mappings per ``(source_system, version)``.
+
+    A mapping file is read and compiled the first time it is asked for and
+    again only once its modification time changes, so edits to the YAML are
+    picked up without a restart.  The file is looked at no more than once
+    every ``interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: Path = MAPPINGS_DIR,
+        *,
+        interval: float = MAPPING_RELOAD_INTERVAL,
+    ) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._mappings: Dict[Tuple[str, int], Tuple[float, int, CompiledMapping]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, source_system: str = "excel", version: int = 1) -> CompiledMapping:
+        key = (source_system, version)
+        now = time.monotonic()
+        cached = self._mappings.get(key)
+        if cached is not None and now - cached[0] < self.interval:
+            return cached[2]
+        path = self.directory / f"{source_system}_v{version}.yml"
+        mtime = path.stat().st_mtime_ns
+        if cached is not None and cached[1] == mtime:
+            mapping = cached[2]
+        else:
+            mapping = _read_mapping(path)
+        with self._lock:
+            self._mappings[key] = (now, mtime, mapping)
+        return mapping
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mappings = {}
+
+
+mapping_registry = MappingRegistry()
+
+
+def load_mapping(source_system: str = "excel", version: int = 1) -> CompiledMapping:
+    """Load field mapping configuration.
+
+    Parameters
+    ----------
+    source_system: str
+        Source system identifier (e.g., "excel").
+    version: int
+        Mapping version number.
+
+    Returns
+    -------
+    dict
+        Nested dictionary mapping sheet names to field mappings where
+        each field mapping maps normalized source column names to
+        universal schema names.  The result comes from
+        :data:`mapping_registry` and is shared; do not modify it.
+    """
+    return mapping_registry.get(source_system, version)
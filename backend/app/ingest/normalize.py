@@ -1,13 +1,32 @@
 from __future__ import annotations
 
-from datetime import datetime, date
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+import calendar
+import math
+import multiprocessing
+from datetime import datetime, date, timedelta
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import os
 import re
-from dateutil.relativedelta import relativedelta
+import numpy as np
+import pandas as pd
+from pandas.tseries.offsets import MonthEnd
 
-from .mapping_loader import load_mapping
+from .mapping_loader import CompiledMapping, SheetPlan, load_mapping
 
 PII_REDACTION_ENABLED = os.getenv("PII_REDACTION_ENABLED", "false").lower() == "true"
 
@@ -15,12 +34,15 @@ EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
 
 
+# Both patterns in one, so redacting a value is a single regex pass.
+PII_RE = re.compile(f"{EMAIL_RE.pattern}|{PHONE_RE.pattern}")
+REDACTED = "[REDACTED]"
+
+
 def _redact_pii(value: Any) -> Any:
     if not isinstance(value, str):
         return value
-    value = EMAIL_RE.sub("[REDACTED]", value)
-    value = PHONE_RE.sub("[REDACTED]", value)
-    return value
+    return PII_RE.sub(REDACTED, value)
 
 
 DATE_FIELDS = {"date", "start_date", "end_date"}
@@ -47,33 +69,96 @@ CATEGORY_FIELDS = {
 }
 
 
+# strptime-style formats tried in order; only %Y, %m and %d are supported.
+# A format without %d stands for the last day of that month.
+DATE_FORMATS = tuple(
+    f.strip() for f in os.getenv("DATE_FORMATS", "%Y-%m-%d,%Y-%m").split(",") if f.strip()
+)
+# Read numeric date cells as Excel serial numbers (1900 date system).
+EXCEL_SERIAL_DATES = os.getenv("EXCEL_SERIAL_DATES", "false").lower() == "true"
+DATE_CACHE_SIZE = int(os.getenv("DATE_CACHE_SIZE", "4096"))
+
+_DATE_DIRECTIVES = {
+    "%Y": r"(?P<year>\d{4})",
+    "%m": r"(?P<month>\d{1,2})",
+    "%d": r"(?P<day>\d{1,2})",
+}
+# Day 0 of Excel's 1900 date system for serials from 61 on; Excel counts a
+# phantom 1900-02-29 as serial 60, so serials below it are one day later.
+_EXCEL_EPOCH = date(1899, 12, 30)
+_EXCEL_LEAP_BUG_SERIAL = 60
+_MAX_EXCEL_SERIAL = 2958465  # 9999-12-31
+
+
+def _compile_date_format(fmt: str) -> "re.Pattern[str]":
+    """Compile a strptime-style date format into an equivalent regex."""
+    parts = re.split(r"(%.)", fmt)
+    unsupported = [p for p in parts[1::2] if p not in _DATE_DIRECTIVES]
+    if unsupported or "%Y" not in parts or "%m" not in parts:
+        raise ValueError(f"Unsupported date format {fmt!r}")
+    return re.compile("".join(_DATE_DIRECTIVES.get(p, re.escape(p)) for p in parts))
+
+
+_DATE_PATTERNS = tuple(_compile_date_format(fmt) for fmt in DATE_FORMATS)
+
+
+def _excel_serial_date(serial: float) -> Optional[date]:
+    if not 1 <= serial <= _MAX_EXCEL_SERIAL:
+        return None
+    days = int(serial)
+    if days == _EXCEL_LEAP_BUG_SERIAL:
+        return None
+    if days < _EXCEL_LEAP_BUG_SERIAL:
+        days += 1
+    return _EXCEL_EPOCH + timedelta(days=days)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_text(s: str) -> Optional[date]:
+    for pattern in _DATE_PATTERNS:
+        match = pattern.fullmatch(s)
+        if match is None:
+            continue
+        year, month, day = int(match["year"]), int(match["month"]), match.groupdict().get("day")
+        try:
+            if day is None:
+                return date(year, month, calendar.monthrange(year, month)[1])
+            return date(year, month, int(day))
+        except ValueError:
+            continue
+    return None
+
+
 def coerce_date(s: Any) -> Optional[date]:
+    """Coerce a cell value to a date, or ``None`` if it is not one.
+
+    Strings are matched against :data:`DATE_FORMATS` (compiled to regexes
+    once); results are memoized per distinct string, since the dates in a
+    sheet repeat heavily.  Numeric cells are read as Excel serial numbers
+    with ``EXCEL_SERIAL_DATES`` and are invalid otherwise; digit strings
+    never are, since CSV files and text cells carry them.
+    """
     if s in (None, ""):
         return None
-    s = str(s).strip()
-    # YYYY-MM-DD
-    try:
-        return datetime.strptime(s, "%Y-%m-%d").date()
-    except Exception:
-        pass
-    # YYYY-MM
-    try:
-        d = datetime.strptime(s, "%Y-%m")
-        # last day of month
-        next_month = d.replace(day=28) + relativedelta(days=4)
-        last_day = next_month - relativedelta(days=next_month.day)
-        return last_day.date()
-    except Exception:
-        return None
+    if isinstance(s, datetime):  # Excel cells arrive as Timestamps
+        return s.date()
+    if isinstance(s, date):
+        return s
+    if isinstance(s, (int, float, np.integer, np.floating)) and not isinstance(
+        s, (bool, np.bool_)
+    ):
+        return _excel_serial_date(s) if EXCEL_SERIAL_DATES else None
+    return _parse_date_text(str(s).strip())
 
 
 def coerce_number(x: Any) -> Optional[float]:
     try:
         if x in (None, ""):
             return None
-        return float(str(x).replace(",", ""))
+        num = float(str(x).replace(",", ""))
     except Exception:
         return None
+    return num if math.isfinite(num) else None
 
 
 def _standardize_category(value: Any) -> Optional[str]:
@@ -82,6 +167,78 @@ def _standardize_category(value: Any) -> Optional[str]:
     return str(value).strip().title()
 
 
+# What a column coercer returns for a value it cannot coerce.
+INVALID = object()
+
+
+# Integer fields hold int64 values; numbers outside [-2**63, 2**63) are invalid.
+_INT64_BOUND = 2.0**63
+
+
+def _coerce_int(x: Any) -> Optional[int]:
+    num = coerce_number(x)
+    if num is None or not -_INT64_BOUND <= num < _INT64_BOUND:
+        return None
+    return int(num)
+
+
+def coercer_for(field: str, *, free_text: bool = True) -> Callable[[Any], Any]:
+    """Return the coercer applied to values of the target ``field``.
+
+    Empty values become ``None``; dates and numbers that cannot be coerced
+    come back as :data:`INVALID`.  With ``PII_REDACTION_ENABLED`` values of
+    ``free_text`` fields are redacted.  Mapping sheet plans hold one per
+    column.
+    """
+    strict = field in DATE_FIELDS or field in NUMERIC_FIELDS
+    if field in DATE_FIELDS:
+        convert = coerce_date
+    elif field in INT_FIELDS:
+        convert = _coerce_int
+    elif field in NUMERIC_FIELDS:
+        convert = coerce_number
+    elif field in CATEGORY_FIELDS:
+        convert = _standardize_category
+    else:
+        convert = None
+    redact = free_text and not strict
+
+    def coerce(value: Any) -> Any:
+        if value in (None, ""):
+            return None
+        if convert is not None:
+            value = convert(value)
+            if value is None and strict:
+                return INVALID
+        if redact and PII_REDACTION_ENABLED:
+            value = _redact_pii(value)
+        return value
+
+    return coerce
+
+
+def _apply_plan(
+    plan: SheetPlan, raw: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, List[str]]]]:
+    normalized = {
+        target: coerce(raw[header]) for header, target, coerce in plan.columns(tuple(raw))
+    }
+    invalid_fields = [field for field, value in normalized.items() if value is INVALID]
+    if not invalid_fields:
+        return normalized, None
+    for field in invalid_fields:
+        normalized[field] = None
+    return normalized, {"invalid": invalid_fields}
+
+
+def _compiled(mapping: Optional[Dict[str, Dict[str, str]]]) -> CompiledMapping:
+    if mapping is None:
+        return load_mapping()
+    if isinstance(mapping, CompiledMapping):
+        return mapping
+    return CompiledMapping(mapping)
+
+
 def normalize_row(
     raw: Dict[str, Any],
     sheet: str,
@@ -97,8 +254,9 @@ def normalize_row(
     sheet: str
         Sheet name (e.g., "activities").
     mapping: Optional[Dict[str, Dict[str, str]]]
-        Pre-loaded mapping. If not provided it will be loaded for the default
-        source system.
+        Pre-loaded mapping. If not provided the cached mapping of the
+        default source system is used.  Plain dicts are compiled on every
+        call; pass the result of :func:`load_mapping` to reuse its plans.
 
     Returns
     -------
@@ -106,44 +264,273 @@ def normalize_row(
         Normalized values dictionary and parse error information.
     """
 
-    if mapping is None:
-        mapping = load_mapping()
-    sheet_map = mapping.get(sheet.strip().lower(), {})
+    return _apply_plan(_compiled(mapping).sheet(sheet), raw)
 
-    normalized: Dict[str, Any] = {}
-    invalid_fields: List[str] = []
 
-    for src_key, value in raw.items():
-        norm_key = sheet_map.get(str(src_key).strip().lower())
-        if norm_key is None:
-            continue
-        if value in (None, ""):
-            normalized[norm_key] = None
-            continue
-        if norm_key in DATE_FIELDS:
-            coerced = coerce_date(value)
-            if coerced is None:
-                invalid_fields.append(norm_key)
-            normalized_value = coerced
-        elif norm_key in NUMERIC_FIELDS:
-            num = coerce_number(value)
-            if num is None:
-                invalid_fields.append(norm_key)
-            else:
-                if norm_key in INT_FIELDS:
-                    num = int(num)
-            normalized_value = num
-        elif norm_key in CATEGORY_FIELDS:
-            normalized_value = _standardize_category(value)
-        else:
-            normalized_value = value
-
-        if PII_REDACTION_ENABLED:
-            normalized_value = _redact_pii(normalized_value)
-        normalized[norm_key] = normalized_value
-
-    parse_errors = {"invalid": invalid_fields} if invalid_fields else None
-    return normalized, parse_errors
+def typed_values(
+    raw: Dict[str, Any],
+    sheet: str,
+    columns: Sequence[str],
+    *,
+    mapping: Optional[Dict[str, Dict[str, str]]] = None,
+) -> Tuple[Dict[str, Any], Optional[Dict[str, List[str]]]]:
+    """Normalize a raw row into the typed staging ``columns`` of ``sheet``.
+
+    Like :func:`normalize_row`, except that keys already named like one of
+    ``columns`` are taken as they are, and every column is present in the
+    result (``None`` when the row has no value for it).
+    """
+    columns = tuple(columns)
+    normalized, parse_errors = _apply_plan(_compiled(mapping).sheet(sheet, columns), raw)
+    return {column: normalized.get(column) for column in columns}, parse_errors
+
+
+def _coerce_dates(uniques: pd.Series) -> np.ndarray:
+    """Column-wise :func:`coerce_date` over distinct values.
+
+    ISO ``YYYY-MM-DD`` and ``YYYY-MM`` (last day of the month) strings are
+    parsed by pandas when those formats are enabled; whatever that leaves
+    is handed to :func:`coerce_date` one value at a time.
+    """
+    text = uniques.astype(str).str.strip()
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    if "%Y-%m-%d" in DATE_FORMATS:
+        parsed = pd.to_datetime(text, format="%Y-%m-%d", errors="coerce")
+    if "%Y-%m" in DATE_FORMATS:
+        month = pd.to_datetime(text, format="%Y-%m", errors="coerce") + MonthEnd(0)
+        parsed = parsed.fillna(month)
+    dates = np.full(len(uniques), None, dtype=object)
+    found = parsed.notna().to_numpy()
+    dates[found] = parsed[found].dt.date.to_numpy(dtype=object)
+    for i in np.flatnonzero(~found):
+        dates[i] = coerce_date(uniques.iat[i])
+    return dates
+
+
+def _numbers(nums: pd.Series, integer: bool) -> np.ndarray:
+    """Numbers as an object array, :data:`INVALID` where ``nums`` is not one.
+
+    Missing and non-finite values are invalid, and so are integers outside
+    int64, as in :func:`coerce_number` and :func:`_coerce_int`.
+    """
+    floats = nums.to_numpy(dtype=float)
+    invalid = ~np.isfinite(floats)
+    if integer:
+        invalid |= (floats < -_INT64_BOUND) | (floats >= _INT64_BOUND)
+        values = np.where(invalid, 0, floats).astype(np.int64).astype(object)
+    else:
+        values = floats.astype(object)
+    values[invalid] = INVALID
+    return values
+
+
+def _coerce_column(values: pd.Series, target: str, free_text: bool) -> Tuple[np.ndarray, int]:
+    """Coerce the non-empty ``values`` of one column for ``target``.
+
+    Returns an object array holding :data:`INVALID` where a value cannot be
+    coerced, and the number of PII matches redacted (only ``free_text``
+    columns are, and only with ``PII_REDACTION_ENABLED``).  Apart from
+    numeric and datetime columns, which convert directly, every distinct
+    value is coerced and redacted once and the results are spread back
+    over the column.
+    """
+    if (
+        target in NUMERIC_FIELDS
+        and pd.api.types.is_numeric_dtype(values)
+        and not pd.api.types.is_bool_dtype(values)
+    ):
+        return _numbers(values.astype(float), target in INT_FIELDS), 0
+    if target in DATE_FIELDS and pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.date.to_numpy(dtype=object), 0
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    redactions = 0
+    if target in DATE_FIELDS:
+        distinct = _coerce_dates(uniques)
+    elif target in NUMERIC_FIELDS:
+        text = uniques.astype(str).str.replace(",", "", regex=False).str.strip()
+        nums = pd.to_numeric(text, errors="coerce").astype(float)
+        # pandas may round numbers beyond 2**53 differently from float(), which
+        # coerce_number() uses; re-read those so both agree at the int64 bounds.
+        inexact = nums.abs() >= 2.0**53
+        if inexact.any():
+            nums[inexact] = text[inexact].map(coerce_number).astype(float)
+        distinct = _numbers(nums, target in INT_FIELDS)
+    elif target in CATEGORY_FIELDS:
+        distinct = uniques.astype(str).str.strip().str.title().to_numpy(dtype=object)
+    else:
+        distinct = uniques.to_numpy(dtype=object)
+    if target in DATE_FIELDS or target in NUMERIC_FIELDS:
+        distinct[pd.isna(distinct)] = INVALID
+    elif free_text and PII_REDACTION_ENABLED:
+        hits = np.zeros(len(distinct), dtype=np.int64)
+        for i, value in enumerate(distinct):
+            if isinstance(value, str):
+                distinct[i], hits[i] = PII_RE.subn(REDACTED, value)
+        if hits.any():
+            redactions = int(np.dot(np.bincount(codes, minlength=len(distinct)), hits))
+    return distinct[codes], redactions
+
+
+def normalize_frame(
+    df: pd.DataFrame,
+    sheet: str,
+    *,
+    mapping: Optional[Dict[str, Dict[str, str]]] = None,
+    columns: Optional[Sequence[str]] = None,
+    redactions: Optional[Counter] = None,
+) -> Tuple[pd.DataFrame, List[Optional[Dict[str, List[str]]]]]:
+    """Normalize a whole frame of raw rows, one column at a time.
+
+    The column-wise counterpart of :func:`normalize_row`: headers are
+    mapped once per frame and each column is coerced in one go (see
+    :func:`_coerce_column`: dates parsed, numbers with commas stripped,
+    categories title-cased, free text redacted).  Missing values (``None``,
+    ``NaN`` or ``""``) become ``None``.  The PII matches redacted are
+    added to ``redactions`` per target field when it is given.
+
+    Returns an object-dtype frame with one column per target field, on
+    ``df``'s index, and the per-row ``parse_errors`` ``normalize_row``
+    would report.  With ``columns`` the result has exactly those columns,
+    and headers already named like one of them are taken as they are, as
+    in :func:`typed_values`.
+    """
+    passthrough = tuple(columns) if columns is not None else ()
+    compiled = _compiled(mapping)
+    plan = compiled.sheet(sheet, passthrough)
+
+    n = len(df)
+    out: Dict[str, np.ndarray] = {}
+    invalid: Dict[str, np.ndarray] = {}
+    for header, target, _ in plan.columns(tuple(df.columns)):
+        series = df[header]
+        present = ~(series.isna() | (series == "")).to_numpy()
+        column = np.full(n, None, dtype=object)
+        column[present], redacted = _coerce_column(
+            series[present], target, compiled.free_text(target)
+        )
+        if redactions is not None and redacted:
+            redactions[target] += redacted
+        bad = column == INVALID
+        column[bad] = None
+        out[target] = column
+        invalid[target] = bad
+
+    if columns is not None:
+        out = {column: out.get(column, np.full(n, None, dtype=object)) for column in passthrough}
+    frame = pd.DataFrame(out, index=df.index, dtype=object)
+
+    errors: List[Optional[Dict[str, List[str]]]] = [None] * n
+    if invalid:
+        names = list(invalid)
+        mask = np.column_stack([invalid[name] for name in names])
+        for i in np.flatnonzero(mask.any(axis=1)):
+            errors[i] = {"invalid": [names[j] for j in np.flatnonzero(mask[i])]}
+    return frame, errors
+
+
+Normalized = Tuple[pd.DataFrame, pd.DataFrame, List[Optional[Dict[str, List[str]]]]]
+
+# Mapping of a normalization pool process, set once by _init_chunk_worker.
+_chunk_mapping: Optional[CompiledMapping] = None
+
+
+def _init_chunk_worker(mapping: CompiledMapping) -> None:
+    global _chunk_mapping
+    _chunk_mapping = mapping
+
+
+def _normalize_chunk(
+    chunk: pd.DataFrame, sheet: str, columns: Optional[Sequence[str]]
+) -> Tuple[pd.DataFrame, List[Optional[Dict[str, List[str]]]], Counter]:
+    redactions: Counter = Counter()
+    frame, errors = normalize_frame(
+        chunk, sheet, mapping=_chunk_mapping, columns=columns, redactions=redactions
+    )
+    return frame, errors, redactions
+
+
+def _may_start_processes() -> bool:
+    """Whether this process may have child processes.
+
+    Daemonic processes may not, and Celery's prefork pool workers are
+    daemonic billiard processes, which ``multiprocessing`` cannot tell.
+    """
+    if multiprocessing.current_process().daemon:
+        return False
+    try:
+        from billiard.process import current_process
+    except ImportError:
+        return True
+    return not current_process().daemon
+
+
+def normalize_pool(
+    processes: int, mapping: Optional[Dict[str, Dict[str, str]]] = None
+) -> Optional[ProcessPoolExecutor]:
+    """Start a pool of ``processes`` processes for :func:`normalize_chunks`.
+
+    The compiled mapping is pickled once per process, as the pool's
+    initializer argument, rather than once per chunk.  Processes are
+    spawned rather than forked, since callers hold threads and database
+    connections.  Returns ``None``, meaning normalize in this process, for
+    ``processes`` below two and inside a daemonic process such as a Celery
+    prefork worker.
+    """
+    if processes < 2 or not _may_start_processes():
+        return None
+    return ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_chunk_worker,
+        initargs=(_compiled(mapping),),
+    )
+
+
+def normalize_chunks(
+    chunks: Iterable[pd.DataFrame],
+    sheet: str,
+    *,
+    mapping: Optional[Dict[str, Dict[str, str]]] = None,
+    columns: Optional[Sequence[str]] = None,
+    redactions: Optional[Counter] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    ahead: int = 1,
+) -> Iterator[Normalized]:
+    """Yield ``(chunk, frame, errors)`` for each chunk, in order.
+
+    ``frame`` and ``errors`` are what :func:`normalize_frame` returns for
+    ``chunk``.  With a ``pool`` from :func:`normalize_pool` the chunks are
+    normalized there, with up to ``ahead`` chunks submitted beyond the one
+    being yielded, so the caller's work on a chunk overlaps the
+    normalization of the next ones; the pool's own mapping is used then.
+    """
+    if pool is None:
+        for chunk in chunks:
+            frame, errors = normalize_frame(
+                chunk, sheet, mapping=mapping, columns=columns, redactions=redactions
+            )
+            yield chunk, frame, errors
+        return
+    pending: Deque[Tuple[pd.DataFrame, Future]] = deque()
+
+    def collect() -> Normalized:
+        chunk, future = pending.popleft()
+        frame, errors, redacted = future.result()
+        if redactions is not None:
+            redactions.update(redacted)
+        return chunk, frame, errors
+
+    try:
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_normalize_chunk, chunk, sheet, columns)))
+            if len(pending) > ahead:
+                yield collect()
+        while pending:
+            yield collect()
+    finally:
+        for _, future in pending:
+            future.cancel()
 
 
 def normalize_rows(
@@ -152,10 +539,15 @@ def normalize_rows(
     *,
     mapping: Optional[Dict[str, Dict[str, str]]] = None,
 ) -> List[Tuple[Dict[str, Any], Optional[Dict[str, List[str]]]]]:
-    """Normalize multiple rows for a given sheet."""
+    """Normalize multiple rows for a given sheet.
+
+    The rows are normalized together by :func:`normalize_frame`, so every
+    mapped column found in any row appears in each result.
+    """
 
-    results: List[Tuple[Dict[str, Any], Optional[Dict[str, List[str]]]]] = []
-    for row in rows:
-        results.append(normalize_row(row, sheet, mapping=mapping))
-    return results
+    rows = list(rows)
+    if not rows:
+        return []
+    frame, errors = normalize_frame(pd.DataFrame.from_records(rows), sheet, mapping=mapping)
+    return list(zip(frame.to_dict("records"), errors))
 
@@ -1,19 +1,36 @@
 from __future__ import annotations
 
+import datetime
+import os
+import time
 import uuid
-from pathlib import Path
-from typing import Dict, Any
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
-import sqlalchemy as sa
+from sqlalchemy.orm import Session
 
 from ..database import SessionLocal, engine
+from ..models import StagingCheckpoint
 from .validators import (
     REQUIRED_SHEETS,
     validate_excel_schema,
     validate_csv_schema,
 )
-from .hash import canonical_row_hash
+from .hash import canonical_row_hashes, row_hash_algorithm
+from .mapping_loader import load_mapping
+from .normalize import normalize_chunks, normalize_pool
+from .staging_tables import STAGING_MODELS, staging_tables
+from .staging_writer import STAGING_BATCH_SIZE, staging_writer
+from .workbook import FILE_SHEET_MAP, ParsedWorkbook, StreamingWorkbook  # noqa: F401
+
+STAGING_STREAMING = os.getenv("STAGING_STREAMING", "false").lower() == "true"
+STAGING_PARALLEL = os.getenv("STAGING_PARALLEL", "false").lower() == "true"
+STAGING_MAX_WORKERS = int(os.getenv("STAGING_MAX_WORKERS", "5"))
+# Processes normalizing staging chunks; 1 normalizes on the staging thread.
+STAGING_NORMALIZE_PROCESSES = int(os.getenv("STAGING_NORMALIZE_PROCESSES", "1"))
 
 SHEET_TABLE_MAP = {
     "Project Info": "stg_project_info",
@@ -31,24 +48,39 @@ SHEET_KEY_MAP = {
     "Beneficiaries": "beneficiaries",
 }
 
-FILE_SHEET_MAP = {
-    "project_info": "Project Info",
-    "activities": "Activities",
-    "outcomes": "Outcomes",
-    "funding_resources": "Funding & Resources",
-    "beneficiaries": "Beneficiaries",
-}
+# Cell values stored in ``raw_json`` as ISO strings, since JSON has no date type.
+_TEMPORAL = (datetime.date, datetime.time)
 
 
-def _read_workbook(path: Path) -> Dict[str, pd.DataFrame]:
-    if path.suffix.lower() == ".csv":
-        sheet = FILE_SHEET_MAP.get(path.stem.lower())
-        if sheet is None:
-            raise ValueError("Unrecognised CSV filename")
-        df = pd.read_csv(path)
-        return {sheet: df}
-    else:
-        return pd.read_excel(path, sheet_name=None)
+def _prepare_rows(
+    df: pd.DataFrame, required_cols: Sequence[str]
+) -> Tuple[List[Dict[str, Any]], List[Optional[Dict[str, List[str]]]], List[str]]:
+    """Build ``raw_json`` dicts, ``parse_errors`` and row hashes for a frame.
+
+    Null detection and the missing-required check run over whole columns;
+    the row dicts come from a single ``to_dict("records")`` conversion and
+    the hashes from one column-wise :func:`canonical_row_hashes` call.
+    Dates and times are stored as ISO strings.
+    """
+    notna = df.notna()
+    values = df.astype(object).where(notna, None)
+    for col in values.columns:
+        temporal = values[col].map(lambda v: isinstance(v, _TEMPORAL))
+        if temporal.any():
+            values.loc[temporal, col] = values.loc[temporal, col].map(lambda v: v.isoformat())
+    records = values.to_dict("records")
+    hashes = canonical_row_hashes({col: values[col].tolist() for col in values.columns})
+
+    missing_mask = np.ones((len(df), len(required_cols)), dtype=bool)
+    for pos, col in enumerate(required_cols):
+        if col in notna.columns:
+            missing_mask[:, pos] = ~notna[col].to_numpy()
+    errors: List[Optional[Dict[str, List[str]]]] = [None] * len(df)
+    for i in np.flatnonzero(missing_mask.any(axis=1)):
+        errors[i] = {
+            "missing": [required_cols[j] for j in np.flatnonzero(missing_mask[i])]
+        }
+    return records, errors, hashes
 
 
 def parse_and_stage(
@@ -57,51 +89,231 @@ def parse_and_stage(
     import_batch_id: str,
     file_path: str,
     source_system: str = "excel",
-) -> Dict[str, int]:
-    path = Path(file_path)
-    content = path.read_bytes()
-    if path.suffix.lower() == ".csv":
-        sheet = FILE_SHEET_MAP.get(path.stem.lower())
-        if sheet is None:
-            raise ValueError("Unrecognised CSV filename")
-        validate_csv_schema(content, sheet)
+    batch_size: int = STAGING_BATCH_SIZE,
+    workbook: Optional[ParsedWorkbook] = None,
+    streaming: bool = STAGING_STREAMING,
+    parallel: bool = STAGING_PARALLEL,
+    max_workers: int = STAGING_MAX_WORKERS,
+    resume: bool = False,
+    session_factory: Optional[Callable[[], Session]] = None,
+    normalize_processes: int = STAGING_NORMALIZE_PROCESSES,
+) -> Dict[str, Any]:
+    """Validate a workbook or CSV file and write its rows to staging.
+
+    The file is parsed once into a :class:`ParsedWorkbook` which is used for
+    both validation and staging; callers that already parsed it may pass it
+    as ``workbook``.  With ``streaming`` the file is instead opened as a
+    :class:`StreamingWorkbook` and read ``batch_size`` rows at a time, so
+    memory use does not grow with the size of the file.
+
+    Each sheet is staged on its own session, ``batch_size`` rows at a time.
+    Every chunk is committed together with a :class:`StagingCheckpoint`
+    holding the sheet's last staged ``row_num``; calling the function again
+    for the same ``import_batch_id`` (e.g. from a retried task) skips the
+    rows below the checkpoint instead of staging them twice.  With
+    ``parallel`` the sheets are staged concurrently on a pool of at most
+    ``max_workers`` threads (SQLite, which allows a single writer, always
+    stages one sheet at a time).
+
+    If any sheet fails, the rows and checkpoints already staged for
+    ``import_batch_id`` are deleted again so the batch is staged completely
+    or not at all.  With ``resume`` they are kept instead, for a caller that
+    will retry the same batch and gates on its own completion marker (the
+    ingest worker sets ``ImportBatch.staged_at``).  Sessions come from
+    ``session_factory`` (``SessionLocal`` by default); a dry run passes one
+    whose commits never leave its transaction.
+
+    Besides ``raw_json`` every row is normalized into its staging table's
+    typed columns (see :func:`~.normalize.normalize_frame`), which is what
+    :func:`~.load_to_core.load_to_core` reads; values that cannot be coerced
+    are listed under ``parse_errors["invalid"]``.  With ``normalize_processes``
+    above one the chunks are normalized on a pool of that many processes
+    (see :func:`~.normalize.normalize_pool`) while earlier chunks are
+    written; inside a daemonic process such as a Celery prefork worker they
+    are normalized in place.  ``row_hash`` is computed
+    with ``ROW_HASH_ALGORITHM`` and its version stored as ``hash_version``.
+
+    The returned mapping holds the number of staged rows per sheet key, the
+    throughput of this call under ``rows_per_sec``, the wall time spent on
+    each sheet under ``sheet_timings_ms`` and the PII matches redacted per
+    field under ``pii_redactions``.
+    """
+    if workbook is None:
+        if streaming:
+            workbook = StreamingWorkbook(file_path)
+        else:
+            workbook = ParsedWorkbook.from_path(file_path)
+    if workbook.is_csv:
+        validate_csv_schema(workbook, workbook.csv_sheet)
     else:
-        validate_excel_schema(content)
+        validate_excel_schema(workbook)
+
+    staging_tables.ensure_current()
+    sheets = [name for name in workbook.sheet_names if name in SHEET_TABLE_MAP]
+    workers = min(max_workers, len(sheets)) if parallel else 1
+    if engine.dialect.name == "sqlite":
+        workers = 1
+
+    normalizers = normalize_pool(normalize_processes, load_mapping())
 
-    dfs = _read_workbook(path)
-    metadata = sa.MetaData()
-    counts = {key: 0 for key in SHEET_KEY_MAP.values()}
+    def stage(sheet_name: str) -> Tuple[int, int, float, Counter]:
+        return _stage_sheet(
+            workbook,
+            sheet_name,
+            upload_id=upload_id,
+            import_batch_id=import_batch_id,
+            source_system=source_system,
+            batch_size=batch_size,
+            session_factory=session_factory,
+            pool=normalizers,
+            ahead=normalize_processes,
+        )
 
-    db = SessionLocal()
+    started = time.perf_counter()
+    results: Dict[str, Tuple[int, int, float, Counter]] = {}
     try:
-        for sheet_name, df in dfs.items():
-            table_name = SHEET_TABLE_MAP.get(sheet_name)
-            key = SHEET_KEY_MAP.get(sheet_name)
-            if table_name is None or key is None:
-                continue
-            table = sa.Table(table_name, metadata, autoload_with=engine)
-            required_cols = REQUIRED_SHEETS[sheet_name]
-            for idx, row in df.iterrows():
-                raw: Dict[str, Any] = {
-                    col: (None if pd.isna(val) else val) for col, val in row.items()
-                }
-                missing = [c for c in required_cols if pd.isna(row.get(c))]
-                parse_errors = {"missing": missing} if missing else None
-                stmt = table.insert().values(
-                    id=str(uuid.uuid4()),
-                    upload_id=upload_id,
-                    row_num=int(idx) + 1,
-                    raw_json=raw,
-                    parse_errors=parse_errors,
-                    source_system=source_system,
-                    external_id=None,
-                    row_hash=canonical_row_hash(raw),
-                    import_batch_id=import_batch_id,
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {name: pool.submit(stage, name) for name in sheets}
+                try:
+                    for name, future in futures.items():
+                        results[name] = future.result()
+                except Exception:
+                    for future in futures.values():
+                        future.cancel()
+                    raise
+        else:
+            for name in sheets:
+                results[name] = stage(name)
+    except Exception:
+        if not resume:
+            _discard_staged(import_batch_id, session_factory)
+        raise
+    finally:
+        if normalizers is not None:
+            normalizers.shutdown(cancel_futures=True)
+    elapsed = time.perf_counter() - started
+
+    counts: Dict[str, Any] = {key: 0 for key in SHEET_KEY_MAP.values()}
+    timings: Dict[str, int] = {}
+    redactions: Counter = Counter()
+    written = 0
+    for name, (staged, new_rows, seconds, redacted) in results.items():
+        counts[SHEET_KEY_MAP[name]] += staged
+        timings[SHEET_KEY_MAP[name]] = int(seconds * 1000)
+        redactions.update(redacted)
+        written += new_rows
+    counts["rows_per_sec"] = round(written / elapsed, 1) if elapsed > 0 else 0.0
+    counts["sheet_timings_ms"] = timings
+    counts["pii_redactions"] = dict(redactions)
+    return counts
+
+
+def _stage_sheet(
+    workbook: ParsedWorkbook,
+    sheet_name: str,
+    *,
+    upload_id: str,
+    import_batch_id: str,
+    source_system: str,
+    batch_size: int,
+    session_factory: Optional[Callable[[], Session]] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+    ahead: int = 1,
+) -> Tuple[int, int, float, Counter]:
+    """Stage one sheet, committing each chunk with its checkpoint.
+
+    Chunks are normalized by :func:`~.normalize.normalize_chunks`, on
+    ``pool`` with up to ``ahead`` chunks in flight when it is given.
+    Returns the number of rows staged for the sheet so far, the number
+    written by this call, the seconds it took and the PII matches it
+    redacted per field.
+    """
+    started = time.perf_counter()
+    key = SHEET_KEY_MAP[sheet_name]
+    table = staging_tables.get(SHEET_TABLE_MAP[sheet_name])
+    required_cols = REQUIRED_SHEETS[sheet_name]
+    columns = tuple(STAGING_MODELS[table.name].typed_columns())
+    mapping = load_mapping()
+    hash_version = row_hash_algorithm().version
+    redactions: Counter = Counter()
+    db = (session_factory or SessionLocal)()
+    try:
+        checkpoint = db.get(StagingCheckpoint, (import_batch_id, key))
+        done = checkpoint.row_num if checkpoint is not None else 0
+        writer = staging_writer(db, table, batch_size=batch_size)
+        chunks = normalize_chunks(
+            _chunks_from(workbook, sheet_name, batch_size, done),
+            key,
+            mapping=mapping,
+            columns=columns,
+            redactions=redactions,
+            pool=pool,
+            ahead=ahead,
+        )
+        for df, typed_frame, invalid_fields in chunks:
+            records, errors, hashes = _prepare_rows(df, required_cols)
+            for idx, raw, typed, parse_errors, invalid, row_hash in zip(
+                df.index,
+                records,
+                typed_frame.to_dict("records"),
+                errors,
+                invalid_fields,
+                hashes,
+            ):
+                if invalid is not None:
+                    parse_errors = {**(parse_errors or {}), **invalid}
+                writer.add(
+                    {
+                        **typed,
+                        "id": str(uuid.uuid4()),
+                        "upload_id": upload_id,
+                        "row_num": int(idx) + 1,
+                        "raw_json": raw,
+                        "parse_errors": parse_errors,
+                        "source_system": source_system,
+                        "external_id": None,
+                        "row_hash": row_hash,
+                        "hash_version": hash_version,
+                        "import_batch_id": import_batch_id,
+                    }
                 )
-                db.execute(stmt)
-                counts[key] += 1
-        db.commit()
+            writer.flush()
+            if checkpoint is None:
+                checkpoint = StagingCheckpoint(import_batch_id=import_batch_id, sheet=key)
+                db.add(checkpoint)
+            done = int(df.index[-1]) + 1
+            checkpoint.row_num = done
+            db.commit()
     finally:
         db.close()
+    return done, writer.rows_written, time.perf_counter() - started, redactions
 
-    return counts
+
+def _chunks_from(
+    workbook: ParsedWorkbook, sheet_name: str, batch_size: int, done: int
+) -> Iterator[pd.DataFrame]:
+    """Yield the chunks of ``sheet_name`` without the ``done`` rows before them."""
+    for df in workbook.iter_chunks(sheet_name, batch_size):
+        if len(df) == 0 or df.index[-1] < done:
+            continue
+        if df.index[0] < done:
+            df = df[df.index >= done]
+        yield df
+
+
+def _discard_staged(
+    import_batch_id: str, session_factory: Optional[Callable[[], Session]] = None
+) -> None:
+    """Delete every staged row and checkpoint of ``import_batch_id``."""
+    db = (session_factory or SessionLocal)()
+    try:
+        for table_name in SHEET_TABLE_MAP.values():
+            table = staging_tables.get(table_name)
+            db.execute(table.delete().where(table.c.import_batch_id == import_batch_id))
+        db.query(StagingCheckpoint).filter(
+            StagingCheckpoint.import_batch_id == import_batch_id
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
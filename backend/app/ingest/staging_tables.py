@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict, Optional
+
+import sqlalchemy as sa
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..database import engine
+from ..models import (
+    StgProjectInfo,
+    StgActivity,
+    StgOutcome,
+    StgFundingResource,
+    StgBeneficiary,
+    StagingCheckpoint,
+)
+
+STAGING_MODELS = {
+    model.__tablename__: model
+    for model in (
+        StgProjectInfo,
+        StgActivity,
+        StgOutcome,
+        StgFundingResource,
+        StgBeneficiary,
+    )
+}
+
+# "declared" uses the ORM table definitions; "reflect" reads the live schema.
+STAGING_TABLE_SOURCE = os.getenv("STAGING_TABLE_SOURCE", "declared").lower()
+
+
+class StagingTableRegistry:
+    """Process-wide cache of the ``stg_*`` :class:`~sqlalchemy.Table` objects.
+
+    By default tables come straight from the declared ``_StagingBase``
+    models, so no catalog queries are issued at all.  With ``reflect=True``
+    each table is reflected from the database the first time it is needed
+    and cached together with the Alembic revision it was read at;
+    :meth:`ensure_current` drops the cache once migrations move the schema
+    to another revision.
+    """
+
+    def __init__(self, bind: Engine, *, reflect: bool = False) -> None:
+        self.bind = bind
+        self.reflect = reflect
+        self._tables: Dict[str, sa.Table] = {}
+        self._metadata = sa.MetaData()
+        self._revision: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> sa.Table:
+        table = self._tables.get(name)
+        if table is not None:
+            return table
+        with self._lock:
+            table = self._tables.get(name)
+            if table is None:
+                if self.reflect or name not in STAGING_MODELS:
+                    table = sa.Table(name, self._metadata, autoload_with=self.bind)
+                else:
+                    table = STAGING_MODELS[name].__table__
+                self._tables[name] = table
+        return table
+
+    def ensure_current(self) -> None:
+        """Refresh reflected tables if the database revision changed."""
+        if not self.reflect:
+            return
+        with self.bind.connect() as conn:
+            revision = MigrationContext.configure(conn).get_current_revision()
+        if revision != self._revision:
+            self.refresh()
+            self._revision = revision
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._tables = {}
+            self._metadata = sa.MetaData()
+
+
+staging_tables = StagingTableRegistry(
+    engine, reflect=STAGING_TABLE_SOURCE == "reflect"
+)
+
+
+def purge_staged_rows(db: Session, import_batch_id: str, *, checkpoints: bool = True) -> int:
+    """Delete everything staged for a batch.
+
+    The batch's :class:`StagingCheckpoint` rows go too unless
+    ``checkpoints`` is false.  Returns the number of staging rows removed;
+    the caller commits.
+    """
+    removed = 0
+    for model in STAGING_MODELS.values():
+        removed += (
+            db.query(model)
+            .filter(model.import_batch_id == import_batch_id)
+            .delete(synchronize_session=False)
+        )
+    if checkpoints:
+        db.query(StagingCheckpoint).filter(
+            StagingCheckpoint.import_batch_id == import_batch_id
+        ).delete(synchronize_session=False)
+    return removed
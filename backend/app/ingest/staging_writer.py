@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+import os
+from io import StringIO
+from typing import Any, Dict, Iterable, List, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+STAGING_BATCH_SIZE = int(os.getenv("STAGING_BATCH_SIZE", "1000"))
+STAGING_COPY_ENABLED = os.getenv("STAGING_COPY_ENABLED", "true").lower() == "true"
+
+
+class StagingWriter:
+    """Buffer rows for one staging table and write them in chunks.
+
+    Each flush issues a single ``INSERT`` with a list of parameter sets so
+    the driver can use ``executemany``/multi-row ``VALUES`` instead of one
+    round trip per row.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        table: sa.Table,
+        *,
+        batch_size: int = STAGING_BATCH_SIZE,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.db = db
+        self.table = table
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        self.db.execute(self.table.insert(), self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+
+def _csv_field(value: Any) -> str:
+    if value is None:
+        return ""  # unquoted empty field is NULL in COPY's csv format
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_csv(
+    rows: Iterable[Dict[str, Any]],
+    columns: Sequence[str],
+    json_columns: Iterable[str] = (),
+) -> StringIO:
+    """Serialize ``rows`` as CSV for ``COPY ... FROM STDIN WITH (FORMAT csv)``.
+
+    ``None`` becomes an unquoted empty field (SQL ``NULL``) while strings are
+    always quoted, so empty strings survive.  Values of ``json_columns`` are
+    JSON-encoded first, the same way the ``JSON`` column type does it.
+    """
+    json_cols = set(json_columns)
+    buf = StringIO()
+    for row in rows:
+        fields = []
+        for col in columns:
+            value = row[col]
+            if col in json_cols and value is not None:
+                value = json.dumps(value)
+            fields.append(_csv_field(value))
+        buf.write(",".join(fields))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+class CopyStagingWriter(StagingWriter):
+    """PostgreSQL variant of :class:`StagingWriter` that flushes with COPY.
+
+    Buffered rows are serialized to an in-memory CSV stream and loaded with
+    ``COPY FROM STDIN`` on the session's own connection, so they are part of
+    the same transaction as everything else the session does.
+    """
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        columns = list(self._buffer[0])
+        json_columns = [
+            c for c in columns if isinstance(self.table.c[c].type, sa.JSON)
+        ]
+        buf = copy_csv(self._buffer, columns, json_columns)
+        quote = self.db.get_bind().dialect.identifier_preparer.quote
+        sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv)".format(
+            quote(self.table.name), ", ".join(quote(c) for c in columns)
+        )
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(sql, buf)
+        finally:
+            cursor.close()
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+
+def staging_writer(
+    db: Session, table: sa.Table, *, batch_size: int = STAGING_BATCH_SIZE
+) -> StagingWriter:
+    """Return the fastest writer the session's database supports.
+
+    PostgreSQL through psycopg2 gets :class:`CopyStagingWriter` (unless
+    ``STAGING_COPY_ENABLED=false``); everything else, SQLite included, uses
+    batched ``INSERT`` statements.
+    """
+    dialect = db.get_bind().dialect
+    if STAGING_COPY_ENABLED and dialect.name == "postgresql" and dialect.driver == "psycopg2":
+        return CopyStagingWriter(db, table, batch_size=batch_size)
+    return StagingWriter(db, table, batch_size=batch_size)
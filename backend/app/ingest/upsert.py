@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .hash import LEGACY_HASH_VERSION
+
+UPSERT_CHUNK_SIZE = int(os.getenv("UPSERT_CHUNK_SIZE", "1000"))
+# Bound parameters per IN clause; SQLite caps a statement at 999 by default.
+LOOKUP_CHUNK_SIZE = 400
+# PostgreSQL accepts up to 65535 bound parameters per statement.
+LOOKUP_PARAM_LIMIT = {"sqlite": 900}
+DEFAULT_PARAM_LIMIT = 30000
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def chunked(values: Sequence[Any], size: int):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+Stamp = Tuple[Optional[str], int]
+
+
+def _stamp(row: Dict[str, Any]) -> Stamp:
+    """A row's ``(row_hash, hash_version)``.
+
+    Hashes are only comparable within a version: a stored row hashed with
+    another algorithm than the incoming one is compared by its columns
+    instead.  If they are equal only its stamp is moved to the incoming
+    version, which does not count as a change (see :func:`classify`).
+    """
+    return row["row_hash"], row.get("hash_version", LEGACY_HASH_VERSION)
+
+
+def _existing(
+    session: Session, table: sa.Table, key: Sequence[str], rows: Sequence[Dict[str, Any]]
+) -> Dict[Tuple, Tuple[str, Stamp]]:
+    """Return ``{natural key: (id, (row_hash, hash_version))}`` for rows already in ``table``.
+
+    Complete keys are looked up with one ``IN`` list per key column, which
+    both PostgreSQL and SQLite serve from the natural-key index (SQLite
+    scans the table for a row-value ``IN``); the superset this returns is
+    narrowed in Python.  ``NULL`` never matches in ``IN``, so keys with a
+    ``NULL`` part are matched separately among the stored rows of the same
+    owner (first key column) that have a ``NULL`` key column, or among the
+    stored rows without an owner, the way ``col == None`` matched them in
+    the per-row loader.
+    """
+    key_cols = [table.c[k] for k in key]
+    cols = [table.c.id, table.c.row_hash, table.c.hash_version] + key_cols
+    naturals = {tuple(r[k] for k in key) for r in rows}
+    complete = [n for n in naturals if None not in n]
+    partial = {n for n in naturals if None in n}
+    limit = LOOKUP_PARAM_LIMIT.get(session.get_bind().dialect.name, DEFAULT_PARAM_LIMIT)
+
+    found: Dict[Tuple, Tuple[str, Stamp]] = {}
+    for chunk in chunked(complete, max(1, limit // len(key))):
+        stmt = sa.select(*cols).where(
+            *(col.in_(list({n[i] for n in chunk})) for i, col in enumerate(key_cols))
+        )
+        for id_, row_hash, version, *natural in session.execute(stmt):
+            if tuple(natural) in naturals:
+                found[tuple(natural)] = (id_, (row_hash, version))
+    owners = sorted({n[0] for n in partial if n[0] is not None})
+    for chunk in chunked(owners, limit):
+        stmt = sa.select(*cols).where(
+            key_cols[0].in_(chunk), sa.or_(*(c.is_(None) for c in key_cols[1:]))
+        )
+        for id_, row_hash, version, *natural in session.execute(stmt):
+            if tuple(natural) in partial:
+                found[tuple(natural)] = (id_, (row_hash, version))
+    if any(n[0] is None for n in partial):
+        stmt = sa.select(*cols).where(key_cols[0].is_(None))
+        for id_, row_hash, version, *natural in session.execute(stmt):
+            if tuple(natural) in partial:
+                found[tuple(natural)] = (id_, (row_hash, version))
+    return found
+
+
+def _stored_values(
+    session: Session, table: sa.Table, ids: Sequence[str], columns: Sequence[str]
+) -> Dict[str, Tuple]:
+    """Return ``{id: (value, ...)}`` of ``columns`` for the stored rows ``ids``."""
+    found: Dict[str, Tuple] = {}
+    cols = [table.c[c] for c in columns]
+    for chunk in chunked(sorted(set(ids)), LOOKUP_CHUNK_SIZE):
+        for id_, *values in session.execute(
+            sa.select(table.c.id, *cols).where(table.c.id.in_(chunk))
+        ):
+            found[id_] = tuple(values)
+    return found
+
+
+Classified = Tuple[
+    Dict[str, int],
+    Dict[Tuple, Dict[str, Any]],
+    Dict[Tuple, Tuple[str, Stamp]],
+    Dict[Tuple, Tuple[str, Stamp]],
+]
+
+
+def classify(
+    session: Session,
+    table: sa.Table,
+    rows: Sequence[Dict[str, Any]],
+    *,
+    key: Sequence[str],
+    pending: Optional[Dict[Tuple, Stamp]] = None,
+    ignore: Sequence[str] = (),
+) -> Classified:
+    """Work out what upserting ``rows`` into ``table`` would do, without writing.
+
+    Returns the ``{"inserted": n, "updated": n}`` counts, the last row per
+    natural key among those that change something, the stored
+    ``(id, (row_hash, hash_version))`` per natural key (see
+    :func:`_stamp`) and the restamps: ``(id, stamp)`` per natural key whose
+    stored row was hashed with another version but holds the same values
+    in every column except ``ignore`` (lineage that differs per load).
+    Restamps are not counted; only their stamp needs writing.  ``pending``
+    maps natural keys to stamps that count as stored although they were
+    never written (a dry run carries it across windows); it is updated in
+    place.
+    """
+    counts = {"inserted": 0, "updated": 0}
+    final: Dict[Tuple, Dict[str, Any]] = {}
+    restamps: Dict[Tuple, Tuple[str, Stamp]] = {}
+    if not rows:
+        return counts, final, {}, restamps
+    existing = _existing(session, table, key, rows)
+    current = {k: v[1] for k, v in existing.items()}
+    naturals = [tuple(row[k] for k in key) for row in rows]
+    if pending:
+        current.update((n, pending[n]) for n in naturals if n in pending)
+    skip = {*key, *ignore, "row_hash", "hash_version"}
+    values = [c for c in rows[0] if c not in skip]
+    rehashed = [
+        existing[n][0]
+        for n, row in zip(naturals, rows)
+        if n in existing and current[n] == existing[n][1] and current[n][1] != _stamp(row)[1]
+    ]
+    stored = _stored_values(session, table, rehashed, values) if rehashed else {}
+    for natural, row in zip(naturals, rows):
+        stamp = _stamp(row)
+        if natural not in current:
+            counts["inserted"] += 1
+        elif current[natural] == stamp:
+            continue
+        elif (
+            natural in existing
+            and current[natural] == existing[natural][1]
+            and stored.get(existing[natural][0]) == tuple(row[c] for c in values)
+        ):
+            restamps[natural] = (existing[natural][0], stamp)
+            current[natural] = stamp
+            continue
+        else:
+            counts["updated"] += 1
+        current[natural] = stamp
+        final[natural] = row
+        restamps.pop(natural, None)
+    if pending is not None:
+        pending.update((n, _stamp(r)) for n, r in final.items())
+        pending.update((n, stamp) for n, (_, stamp) in restamps.items())
+    return counts, final, existing, restamps
+
+
+def bulk_upsert(
+    session: Session,
+    table: sa.Table,
+    rows: Sequence[Dict[str, Any]],
+    *,
+    key: Sequence[str],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    changed: Optional[List[Dict[str, Any]]] = None,
+    ignore: Sequence[str] = (),
+) -> Dict[str, int]:
+    """Insert or update ``rows`` in ``table`` by natural key.
+
+    Rows are plain column dicts including ``row_hash`` but not ``id``.  One
+    query classifies them against what is stored (see :func:`classify`);
+    changed and new rows are then written in chunks of ``chunk_size`` with
+    ``INSERT ... ON CONFLICT (key) DO UPDATE``, which only updates a stored
+    row whose ``row_hash`` or ``hash_version`` differs.  Later rows win when
+    the batch repeats a key.
+
+    Rows stored under another hash version whose values, ``ignore`` aside,
+    are unchanged only have their stamp updated, by ``id``.  Unique
+    constraints never match ``NULL``, so existing rows with a ``NULL`` key
+    column are updated by ``id`` instead, as are all updates on dialects
+    without ``ON CONFLICT`` support.  Returns the ``{"inserted": n,
+    "updated": n}`` counts the per-row loader reported; the rows actually
+    written are appended to ``changed`` when given.
+    """
+    counts, final, existing, restamps = classify(session, table, rows, key=key, ignore=ignore)
+    write_changes(
+        session,
+        table,
+        final,
+        existing,
+        restamps,
+        key=key,
+        chunk_size=chunk_size,
+        changed=changed,
+    )
+    return counts
+
+
+def write_changes(
+    session: Session,
+    table: sa.Table,
+    final: Dict[Tuple, Dict[str, Any]],
+    existing: Dict[Tuple, Tuple[str, Stamp]],
+    restamps: Optional[Dict[Tuple, Tuple[str, Stamp]]] = None,
+    *,
+    key: Sequence[str],
+    chunk_size: int = UPSERT_CHUNK_SIZE,
+    changed: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[Tuple, Tuple[str, Stamp]]:
+    """Write the rows :func:`classify` picked, as :func:`bulk_upsert` does.
+
+    ``final``, ``existing`` and ``restamps`` are the values :func:`classify`
+    returned, possibly on another session.  Returns the ``(id, (row_hash,
+    hash_version))`` now stored per natural key written, for a caller whose
+    later lookups cannot see these writes; the ``id`` is the stored one
+    wherever :func:`bulk_upsert` would update by ``id``.
+    """
+    stored: Dict[Tuple, Tuple[str, Stamp]] = dict(restamps or {})
+    if stored:
+        stmt = table.update().where(table.c.id == sa.bindparam("_id"))
+        stamps = [
+            {"_id": id_, "row_hash": row_hash, "hash_version": version}
+            for id_, (row_hash, version) in stored.values()
+        ]
+        for chunk in chunked(stamps, chunk_size):
+            session.execute(stmt, chunk)
+    if not final:
+        return stored
+
+    insert = _DIALECT_INSERTS.get(session.get_bind().dialect.name)
+    upserts: List[Dict[str, Any]] = []
+    updates: List[Dict[str, Any]] = []
+    for natural, row in final.items():
+        match = existing.get(natural)
+        if match is not None and match[1] == _stamp(row):
+            continue  # changed and changed back within the batch
+        if match is not None and (insert is None or None in natural):
+            updates.append({**row, "_id": match[0]})
+            stored[natural] = (match[0], _stamp(row))
+        else:
+            upserts.append({**row, "id": str(uuid.uuid4())})
+            stored[natural] = (upserts[-1]["id"], _stamp(row))
+        if changed is not None:
+            changed.append(row)
+
+    if upserts:
+        if insert is None:
+            stmt = table.insert()
+        else:
+            stmt = insert(table)
+            differs = table.c.row_hash.is_distinct_from(stmt.excluded.row_hash)
+            if "hash_version" in upserts[0]:
+                differs = sa.or_(differs, table.c.hash_version != stmt.excluded.hash_version)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key),
+                set_={
+                    c: stmt.excluded[c]
+                    for c in upserts[0]
+                    if c != "id" and c not in key
+                },
+                where=differs,
+            )
+        for chunk in chunked(upserts, chunk_size):
+            session.execute(stmt, chunk)
+    if updates:
+        # The SET clause follows the parameter keys of the executemany.
+        stmt = table.update().where(table.c.id == sa.bindparam("_id"))
+        updates = [{c: v for c, v in row.items() if c not in key} for row in updates]
+        for chunk in chunked(updates, chunk_size):
+            session.execute(stmt, chunk)
+    return stored
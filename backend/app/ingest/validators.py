@@ -1,11 +1,12 @@
 from __future__ import annotations
 
 from io import BytesIO, StringIO
-from typing import Dict, Iterable, List, Sequence
+from typing import Dict, Iterable, List, Sequence, Union
 
 import pandas as pd
 
 from .errors import SchemaValidationError
+from .workbook import ParsedWorkbook
 
 # ===== Excel template specification =====
 # Used by the uploads API and staging pipeline for validating workbook structure.
@@ -75,6 +76,13 @@ def _normalise(columns: Iterable[str]) -> List[str]:
     return [c.strip().lower() for c in columns]
 
 
+def _excel_sheets(content: Union[bytes, ParsedWorkbook]) -> Dict[str, pd.DataFrame]:
+    """Return the sheets of ``content``, parsing raw bytes if needed."""
+    if isinstance(content, ParsedWorkbook):
+        return content.sheets
+    return pd.read_excel(BytesIO(content), sheet_name=None)
+
+
 def _validate_columns(df: pd.DataFrame, sheet: str) -> None:
     required = REQUIRED_SHEETS[sheet]
     present = set(_normalise(df.columns))
@@ -83,14 +91,15 @@ def _validate_columns(df: pd.DataFrame, sheet: str) -> None:
         raise SchemaValidationError(sheet=sheet, missing=missing)
 
 
-def validate_excel_schema(content: bytes) -> None:
+def validate_excel_schema(content: Union[bytes, ParsedWorkbook]) -> None:
     """Validate an Excel workbook against the required schema.
 
+    ``content`` may be the raw file bytes or an already parsed workbook.
     Raises :class:`SchemaValidationError` if a required sheet or column is
     missing.
     """
 
-    sheets = pd.read_excel(BytesIO(content), sheet_name=None)
+    sheets = _excel_sheets(content)
 
     for sheet, columns in REQUIRED_SHEETS.items():
         if sheet not in sheets:
@@ -99,7 +108,7 @@ def validate_excel_schema(content: bytes) -> None:
         _validate_columns(sheets[sheet], sheet)
 
 
-def validate_csv_schema(content: bytes, sheet: str) -> None:
+def validate_csv_schema(content: Union[bytes, ParsedWorkbook], sheet: str) -> None:
     """Validate a CSV file against the schema for ``sheet``.
 
     ``sheet`` must be one of the keys in :data:`REQUIRED_SHEETS`.
@@ -108,20 +117,23 @@ def validate_csv_schema(content: bytes, sheet: str) -> None:
     if sheet not in REQUIRED_SHEETS:
         raise ValueError(f"Unknown sheet '{sheet}'")
 
-    df = pd.read_csv(StringIO(content.decode("utf-8")))
+    if isinstance(content, ParsedWorkbook):
+        df = content.sheets[sheet]
+    else:
+        df = pd.read_csv(StringIO(content.decode("utf-8")))
     _validate_columns(df, sheet)
 
 
-def validate_template_excel(content: bytes) -> List[dict]:
+def validate_template_excel(content: Union[bytes, ParsedWorkbook]) -> List[dict]:
     """Validate the Excel template used for bulk data uploads.
 
-    Returns a list of error dictionaries with keys ``sheet``, ``column`` and
-    ``issue``. If the list is empty, the workbook conforms to the expected
-    schema.
+    Accepts raw file bytes or a :class:`ParsedWorkbook`.  Returns a list of
+    error dictionaries with keys ``sheet``, ``column`` and ``issue``. If the
+    list is empty, the workbook conforms to the expected schema.
     """
 
     errors: List[dict] = []
-    sheets = pd.read_excel(BytesIO(content), sheet_name=None)
+    sheets = _excel_sheets(content)
 
     for sheet, columns in TEMPLATE_SHEETS.items():
         if sheet not in sheets:
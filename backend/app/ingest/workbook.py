@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+# CSV uploads carry a single sheet, identified by the file name.
+FILE_SHEET_MAP = {
+    "project_info": "Project Info",
+    "activities": "Activities",
+    "outcomes": "Outcomes",
+    "funding_resources": "Funding & Resources",
+    "beneficiaries": "Beneficiaries",
+}
+
+
+def csv_sheet_name(filename: str) -> str:
+    """Return the template sheet a CSV file name stands for."""
+    sheet = FILE_SHEET_MAP.get(Path(filename).stem.lower())
+    if sheet is None:
+        raise ValueError("Unrecognised CSV filename")
+    return sheet
+
+
+def _canonical_value(value: Any) -> Any:
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        if math.isnan(value):
+            return None
+        return int(value) if value.is_integer() else float(value)
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def _canonical_column(series: pd.Series) -> np.ndarray:
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype=float)
+        out = values.astype(object)
+        out[np.isnan(values)] = None
+        integral = np.isfinite(values) & (values == np.trunc(values))
+        small = integral & (np.abs(values) < 2**63)
+        out[small] = values[small].astype(np.int64).astype(object)
+        for i in np.flatnonzero(integral & ~small):
+            out[i] = int(values[i])
+        return out
+    if pd.api.types.is_datetime64_any_dtype(series):
+        out = pd.DatetimeIndex(series).to_pydatetime().astype(object)
+        out[series.isna().to_numpy()] = None
+        return out
+    return np.array([_canonical_value(v) for v in series.tolist()], dtype=object)
+
+
+def canonical_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return ``df`` with every value as one canonical Python type.
+
+    pandas and openpyxl hand back the same cell differently: a whole number
+    is ``1.0`` in a float column with blanks but ``1`` otherwise, a date is
+    a ``Timestamp`` or a ``datetime``, and the dtypes of a chunk depend on
+    which rows it happens to hold.  Readers pass their frames through this
+    so ``raw_json`` and ``row_hash`` do not depend on how the file was
+    read, nor on whether the same data came as a workbook or a CSV file:
+    missing values become ``None``, whole numbers ``int``, other numbers
+    ``float`` and timestamps ``datetime``.  Rows hashed before this have
+    another ``hash_version`` (see :mod:`.hash`).
+    """
+    out = pd.DataFrame(
+        {i: _canonical_column(df.iloc[:, i]) for i in range(df.shape[1])},
+        index=df.index,
+        dtype=object,
+    )
+    out.columns = df.columns
+    return out
+
+
+def _read_csv(path: Path | str) -> pd.DataFrame:
+    """Read a whole CSV file, inferring each column's type from all its rows."""
+    return pd.read_csv(path, low_memory=False)
+
+
+def _csv_kind(series: pd.Series) -> str:
+    if pd.api.types.is_bool_dtype(series):
+        return "bool"
+    if pd.api.types.is_numeric_dtype(series):
+        return "number"
+    if all(isinstance(v, (bool, np.bool_)) for v in series.dropna()):
+        return "bool"  # booleans with blanks
+    return "text"
+
+
+def _csv_text_columns(path: Path | str, chunk_size: int) -> List[str]:
+    """Columns :func:`_read_csv` reads as text, found ``chunk_size`` rows at a time.
+
+    A column is text for the whole file if any chunk holds text, or if it
+    holds booleans in some chunks and numbers in others.
+    """
+    kinds: Dict[str, set] = {}
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        for name in chunk.columns:
+            kinds.setdefault(name, set()).add(_csv_kind(chunk[name]))
+    return [
+        name
+        for name, seen in kinds.items()
+        if "text" in seen or {"bool", "number"} <= seen
+    ]
+
+
+class ParsedWorkbook:
+    """An uploaded Excel workbook or CSV file, parsed exactly once.
+
+    The same instance is handed to schema validation and to staging so the
+    file is not re-read by each step.  ``csv_sheet`` is set for CSV uploads
+    and names the single sheet the file holds.
+    """
+
+    def __init__(
+        self, sheets: Dict[str, pd.DataFrame], *, csv_sheet: Optional[str] = None
+    ) -> None:
+        self.sheets = sheets
+        self.csv_sheet = csv_sheet
+
+    @property
+    def is_csv(self) -> bool:
+        return self.csv_sheet is not None
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self.sheets)
+
+    def iter_chunks(self, sheet: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Yield ``sheet`` in frames of at most ``chunk_size`` rows.
+
+        Frames keep the zero-based row position of the sheet as their index
+        and hold the values of :func:`canonical_frame`.
+        """
+        df = self.sheets[sheet]
+        for start in range(0, len(df), chunk_size):
+            yield canonical_frame(df.iloc[start : start + chunk_size])
+
+    @classmethod
+    def from_path(cls, path: Path | str) -> "ParsedWorkbook":
+        path = Path(path)
+        if path.suffix.lower() == ".csv":
+            sheet = csv_sheet_name(path.name)
+            return cls({sheet: _read_csv(path)}, csv_sheet=sheet)
+        return cls(pd.read_excel(path, sheet_name=None))
+
+
+def _header(values: Sequence[Any]) -> List[str]:
+    values = list(values)
+    while values and values[-1] is None:
+        values.pop()
+    return [f"Unnamed: {i}" if v is None else v for i, v in enumerate(values)]
+
+
+class StreamingWorkbook(ParsedWorkbook):
+    """A workbook whose rows are read lazily, one chunk at a time.
+
+    Only the header row of each sheet is loaded up front (exposed through
+    ``sheets`` as empty frames so the schema validators work unchanged).
+    :meth:`iter_chunks` then streams rows with openpyxl's read-only mode, or
+    ``pandas.read_csv(chunksize=...)`` for CSV files, so memory use is bounded
+    by the chunk size rather than by the size of the file.  CSV files are
+    read twice, first to find the columns :func:`_read_csv` would type as
+    text across the whole file (see :func:`_csv_text_columns`), so chunks are
+    typed as if the file had been read at once.  Every call opens
+    its own read-only handle, so different sheets may be streamed from
+    different threads.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        if self.path.suffix.lower() == ".csv":
+            sheet = csv_sheet_name(self.path.name)
+            header = pd.read_csv(self.path, nrows=0)
+            super().__init__({sheet: header}, csv_sheet=sheet)
+            return
+        book = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            sheets: Dict[str, pd.DataFrame] = {}
+            for ws in book.worksheets:
+                # The stored sheet dimensions are not always trustworthy.
+                ws.reset_dimensions()
+                first = next(ws.iter_rows(max_row=1, values_only=True), ())
+                sheets[ws.title] = pd.DataFrame(columns=_header(first))
+        finally:
+            book.close()
+        super().__init__(sheets)
+
+    def iter_chunks(self, sheet: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        if self.is_csv:
+            text = dict.fromkeys(_csv_text_columns(self.path, chunk_size), str)
+            for chunk in pd.read_csv(self.path, chunksize=chunk_size, dtype=text):
+                yield canonical_frame(chunk)
+            return
+        columns = list(self.sheets[sheet].columns)
+        width = len(columns)
+        empty = (None,) * width
+        rows: List[tuple] = []
+        blank = 0
+        start = 0
+        book = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            ws = book[sheet]
+            ws.reset_dimensions()
+            for values in ws.iter_rows(min_row=2, values_only=True):
+                values = tuple(values[:width]) + (None,) * (width - len(values))
+                if values == empty:
+                    # Blank rows are only kept if data follows, like pandas
+                    # does, so count them rather than buffering them.
+                    blank += 1
+                    continue
+                while blank:
+                    take = min(blank, chunk_size - len(rows))
+                    rows.extend([empty] * take)
+                    blank -= take
+                    if len(rows) == chunk_size:
+                        yield self._frame(rows, columns, start)
+                        start += chunk_size
+                        rows = []
+                rows.append(values)
+                if len(rows) == chunk_size:
+                    yield self._frame(rows, columns, start)
+                    start += chunk_size
+                    rows = []
+        finally:
+            book.close()
+        if rows:
+            yield self._frame(rows, columns, start)
+
+    @staticmethod
+    def _frame(rows: List[tuple], columns: List[str], start: int) -> pd.DataFrame:
+        frame = pd.DataFrame(rows, columns=columns, index=range(start, start + len(rows)))
+        return canonical_frame(frame)
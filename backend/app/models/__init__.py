@@ -15,7 +15,7 @@ from .metrics_summary import MetricsSummary
 from .integration import Integration
 from .investor import Investor
 from .audit_log import AuditLog
-from .uploads import Upload
+from .uploads import Upload, UploadObject
 from .ingestion_jobs import IngestionJob
 from .import_batches import ImportBatch
 from .staging import (
@@ -24,5 +24,6 @@ from .staging import (
     StgOutcome,
     StgFundingResource,
     StgBeneficiary,
+    StagingCheckpoint,
 )
 from .activity_outcome_fact import ActivityOutcomeFact
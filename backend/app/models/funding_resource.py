@@ -36,7 +36,8 @@ class FundingResource(Base):
     ingested_at = Column(
         DateTime(timezone=True), server_default=func.now(), nullable=True
     )
-    row_hash = Column(String, nullable=True)
+    row_hash = Column(String, nullable=True, index=True)
+    hash_version = Column(Integer, nullable=False, server_default="1")
     import_batch_id = Column(String, ForeignKey("import_batches.id"), nullable=True)
     schema_version = Column(Integer, nullable=False, server_default="1")
 
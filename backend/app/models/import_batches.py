@@ -30,6 +30,17 @@ class ImportBatch(Base):
         nullable=False,
     )
     error_json = Column(JSON)
+    # Set once every sheet is staged / once load_to_core has committed, so a
+    # retried ingest can skip those steps.
+    staged_at = Column(DateTime(timezone=True))
+    loaded_at = Column(DateTime(timezone=True))
+    load_counts = Column(JSON)
+    # Project ids and per-entity (project_fk, date) keys the load wrote.
+    change_set = Column(JSON)
+    # Object key prefix the batch's staging rows were archived under, and
+    # when they were moved there and deleted from the staging tables.
+    archive_key = Column(String)
+    archived_at = Column(DateTime(timezone=True))
 
     def set_status(self, new_status: BatchStatus, error_json: dict | None = None) -> None:
         """Update status and record lifecycle timestamps."""
@@ -1,6 +1,6 @@
 import enum
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, JSON, String
-from sqlalchemy.sql import func
+from sqlalchemy import Boolean, Column, Integer, ForeignKey, DateTime, Enum, JSON, String
+from sqlalchemy.sql import expression, func
 
 from ..database import Base
 
@@ -25,4 +25,9 @@ class IngestionJob(Base):
         nullable=False,
     )
     error_json = Column(JSON, nullable=True)
+    # True when the upload duplicated the org's last successful ingest; the
+    # job then points at that ingest's batch and nothing is re-run.
+    deduplicated = Column(
+        Boolean, nullable=False, default=False, server_default=expression.false()
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey
+from typing import List
+
+from sqlalchemy import Column, Date, Float, Integer, String, JSON, DateTime, ForeignKey, Text
 from sqlalchemy.sql import func
 
 from ..database import Base
@@ -11,30 +13,107 @@ class _StagingBase(Base):
     upload_id = Column(String, nullable=False)
     row_num = Column(Integer, nullable=False)
     raw_json = Column(JSON, nullable=False)
-    parse_errors = Column(JSON, nullable=True)
+    parse_errors = Column(JSON(none_as_null=True), nullable=True)
     source_system = Column(String, nullable=False, server_default="excel")
     external_id = Column(String, nullable=True)
     ingested_at = Column(DateTime(timezone=True), server_default=func.now())
     row_hash = Column(String, nullable=True)
-    import_batch_id = Column(String, ForeignKey("import_batches.id"))
+    hash_version = Column(Integer, nullable=False, server_default="1")
+    import_batch_id = Column(String, ForeignKey("import_batches.id"), index=True)
     schema_version = Column(Integer, nullable=False, server_default="1")
 
+    # Each table adds the row's normalized values as typed columns, named
+    # like the core columns and filled during staging by ``ingest.normalize``.
+
+    @classmethod
+    def typed_columns(cls) -> List[str]:
+        """Names of the normalized value columns, in declaration order."""
+        return [c.name for c in cls.__table__.columns if c.name not in _STAGING_COLUMNS]
+
+
+_STAGING_COLUMNS = {
+    name for name, value in vars(_StagingBase).items() if isinstance(value, Column)
+}
+
 
 class StgProjectInfo(_StagingBase):
     __tablename__ = "stg_project_info"
 
+    owner_org_id = Column(String)
+    project_id = Column(String)
+    name = Column(String)
+    org_name = Column(String)
+    start_date = Column(Date)
+    end_date = Column(Date)
+    country = Column(String)
+    region = Column(String)
+    sdg_goal = Column(String)
+    notes = Column(Text)
+
 
 class StgActivity(_StagingBase):
     __tablename__ = "stg_activities"
 
+    owner_org_id = Column(String)
+    project_id = Column(String)
+    date = Column(Date)
+    activity_type = Column(String)
+    activity_name = Column(String)
+    beneficiaries_reached = Column(Integer)
+    location = Column(String)
+    notes = Column(Text)
+
 
 class StgOutcome(_StagingBase):
     __tablename__ = "stg_outcomes"
 
+    owner_org_id = Column(String)
+    project_id = Column(String)
+    date = Column(Date)
+    outcome_metric = Column(String)
+    value = Column(Float)
+    unit = Column(String)
+    method = Column(String)
+    notes = Column(Text)
+
 
 class StgFundingResource(_StagingBase):
     __tablename__ = "stg_funding_resources"
 
+    owner_org_id = Column(String)
+    project_id = Column(String)
+    date = Column(Date)
+    funding_source = Column(String)
+    received = Column(Float)
+    spent = Column(Float)
+    volunteer_hours = Column(Float)
+    staff_hours = Column(Float)
+    notes = Column(Text)
+
 
 class StgBeneficiary(_StagingBase):
     __tablename__ = "stg_beneficiaries"
+
+    owner_org_id = Column(String)
+    project_id = Column(String)
+    date = Column(Date)
+    group = Column(String)
+    count = Column(Integer)
+    demographic_info = Column(String)
+    location = Column(String)
+    notes = Column(Text)
+
+
+class StagingCheckpoint(Base):
+    """Highest ``row_num`` of a sheet committed to staging for a batch.
+
+    Written in the same transaction as the rows it covers, so a retried
+    ingest can resume staging right after it.
+    """
+
+    __tablename__ = "staging_checkpoints"
+
+    import_batch_id = Column(String, ForeignKey("import_batches.id"), primary_key=True)
+    sheet = Column(String, primary_key=True)
+    row_num = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
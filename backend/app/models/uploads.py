@@ -8,6 +8,7 @@ from sqlalchemy import (
     Enum,
     BigInteger,
     JSON,
+    Index,
 )
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -35,6 +36,8 @@ class Upload(Base):
     mime_type = Column(String, nullable=False)
     size = Column(BigInteger, nullable=False)
     object_key = Column(String, nullable=False)
+    # Hex SHA-256 of the file; identical re-uploads share one stored object.
+    content_sha256 = Column(String(64), nullable=True)
     status = Column(
         Enum(UploadStatus, name="uploadfilestatus"),
         default=UploadStatus.pending,
@@ -46,3 +49,22 @@ class Upload(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     user = relationship("User")
+
+    __table_args__ = (
+        Index("ix_uploads_org_id_content_sha256", "org_id", "content_sha256"),
+    )
+
+
+class UploadObject(Base):
+    """The stored object behind every upload of an org with the same bytes.
+
+    Keyed on ``(org_id, content_sha256)``, so of two concurrent uploads of
+    identical content only one can claim the object.
+    """
+
+    __tablename__ = "upload_objects"
+
+    org_id = Column(Integer, primary_key=True)
+    content_sha256 = Column(String(64), primary_key=True)
+    object_key = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
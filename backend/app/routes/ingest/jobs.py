@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
+import os
 import uuid
+from tempfile import NamedTemporaryFile
+from zipfile import BadZipFile
 
 from ...api.deps import verify_token, security
 from ...auth import require_roles, Role
-from ...database import get_db
+from ...database import engine, get_db
 from ...models.user import User
 from ...models.uploads import Upload
 from ...models.ingestion_jobs import IngestionJob, IngestionJobStatus
 from ...models.import_batches import ImportBatch, BatchStatus
+from ...ingest.dedupe import record_deduplicated_job
+from ...ingest.load_to_core import preview_load
+from ...ingest.parse_and_stage import parse_and_stage
+from ...ingest.workbook import ParsedWorkbook
+from ...storage.s3_client import get_s3_client
 from ...observability.events import log_event
 from ...audit.logger import log_event as log_audit_event
 from worker.tasks.ingest_excel_or_csv import ingest_excel_or_csv
@@ -20,6 +28,8 @@ router = APIRouter(prefix="/ingest", tags=["ingest"])
 
 class JobCreateRequest(BaseModel):
     upload_id: int
+    # Report what the ingest would insert/update/leave unchanged, write nothing.
+    dry_run: bool = False
 
 
 class JobStatusResponse(BaseModel):
@@ -30,6 +40,7 @@ class JobStatusResponse(BaseModel):
 @router.post("/jobs", status_code=202)
 def create_job(
     data: JobCreateRequest,
+    response: Response,
     current_user: User = Depends(require_roles([Role.org_member, Role.admin])),
     creds: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db),
@@ -47,6 +58,25 @@ def create_job(
     if upload is None:
         raise HTTPException(status_code=404, detail="Upload not found")
 
+    if data.dry_run:
+        response.status_code = status.HTTP_200_OK
+        return {"dry_run": True, "counts": _preview_upload(upload, current_user)}
+
+    # Re-ingesting the file behind the org's last successful ingest changes
+    # nothing; record a no-op job against that batch instead of re-running.
+    deduplicated = record_deduplicated_job(db, upload)
+    if deduplicated is not None:
+        log_audit_event(
+            db,
+            "ingest_job_deduplicated",
+            user_id=current_user.id,
+            org_id=org_id,
+            upload_id=upload.id,
+            job_id=deduplicated.id,
+            batch_id=deduplicated.import_batch_id,
+        )
+        return {"job_id": deduplicated.id, "deduplicated": True}
+
     batch = ImportBatch(
         id=str(uuid.uuid4()),
         source_system="upload",
@@ -85,6 +115,72 @@ def create_job(
     return {"job_id": job.id}
 
 
+def _preview_upload(upload: Upload, current_user: User) -> dict:
+    """Stage ``upload`` under a throwaway batch and preview loading it.
+
+    The batch, the staged rows and their checkpoints are all written on one
+    connection, in a transaction that is rolled back afterwards: the
+    sessions staging opens join it with ``join_transaction_mode=
+    "rollback_only"``, so their commits never reach the database.  Nothing
+    but the counts survives; no job is created and no task is enqueued.  A
+    file that cannot be read as a workbook is a 400, one that fails schema
+    validation a 422 (:class:`SchemaValidationError`).
+    """
+    bucket = os.environ.get("S3_BUCKET")
+    s3 = get_s3_client()
+    temp_path = None
+    try:
+        with NamedTemporaryFile(delete=False) as tmp:
+            temp_path = tmp.name
+            if bucket:
+                s3.download_file(bucket, upload.object_key, tmp.name)
+            else:
+                s3.download_fileobj(None, upload.object_key, tmp)  # type: ignore[arg-type]
+        try:
+            workbook = ParsedWorkbook.from_path(temp_path)
+        except (ValueError, BadZipFile) as exc:
+            raise HTTPException(
+                status_code=400, detail="Could not read the uploaded workbook"
+            ) from exc
+
+        with engine.connect() as conn:
+            transaction = conn.begin()
+
+            def sessions() -> Session:
+                return Session(bind=conn, join_transaction_mode="rollback_only")
+
+            try:
+                batch_id = str(uuid.uuid4())
+                db = sessions()
+                batch = ImportBatch(
+                    id=batch_id,
+                    source_system="upload",
+                    triggered_by_user_id=str(current_user.id),
+                    status=BatchStatus.running,
+                )
+                db.add(batch)
+                db.commit()
+                db.close()
+                parse_and_stage(
+                    upload_id=str(upload.id),
+                    import_batch_id=batch_id,
+                    file_path=temp_path,
+                    source_system="upload",
+                    workbook=workbook,
+                    parallel=False,
+                    session_factory=sessions,
+                )
+                counts = preview_load(batch_id, session_factory=sessions)
+            finally:
+                if transaction.is_active:
+                    transaction.rollback()
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
+    log_event("ingest_dry_run", upload_id=upload.id, counts=counts)
+    return counts
+
+
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
 def get_job(
     job_id: int,
@@ -14,6 +14,12 @@ from ..models.uploads import Upload, UploadStatus
 from ..models.ingestion_jobs import IngestionJob, IngestionJobStatus
 from ..models.import_batches import ImportBatch, BatchStatus
 from ..storage.s3_client import get_s3_client
+from ..ingest.dedupe import (
+    claim_upload_object,
+    content_sha256,
+    record_deduplicated_job,
+    stored_object_key,
+)
 from ..ingest.validators import validate_template_excel, TEMPLATE_VERSION
 from ..schemas.upload import UploadCreateResponse, UploadStatusResponse
 from worker.tasks.ingest_excel_or_csv import ingest_excel_or_csv
@@ -43,6 +49,7 @@ async def create_upload(
     if org_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+    digest = content_sha256(contents)
     upload = Upload(
         org_id=org_id,
         user_id=current_user.id,
@@ -50,6 +57,7 @@ async def create_upload(
         mime_type=file.content_type,
         size=len(contents),
         object_key="",
+        content_sha256=digest,
         status=UploadStatus.pending,
         template_version=TEMPLATE_VERSION,
     )
@@ -57,15 +65,28 @@ async def create_upload(
     db.commit()
     db.refresh(upload)
 
+    # Identical bytes already stored for this org: point at that object.
+    existing_key = stored_object_key(db, org_id, digest)
+    if existing_key is not None:
+        upload.object_key = existing_key
+        db.commit()
+        return {"upload_id": upload.id}
+
     prefix = os.getenv("S3_UPLOAD_PREFIX", "uploads/")
     key = f"{prefix}{current_user.id}/{uuid4()}.xlsx"
-    upload.object_key = key
-    db.commit()
-
     bucket = os.environ["S3_BUCKET"]
     s3 = get_s3_client()
     s3.put_object(Bucket=bucket, Key=key, Body=contents, ContentType=file.content_type)
 
+    upload.object_key = claim_upload_object(db, org_id, digest, key)
+    db.commit()
+    if upload.object_key != key:
+        # A concurrent upload of the same bytes claimed its object first.
+        try:
+            s3.delete_object(Bucket=bucket, Key=key)
+        except Exception:
+            pass
+
     return {"upload_id": upload.id}
 
 
@@ -157,6 +178,10 @@ async def ingest_upload(
     if upload is None:
         raise HTTPException(status_code=404, detail="Upload not found")
 
+    deduplicated = record_deduplicated_job(db, upload)
+    if deduplicated is not None:
+        return {"job_id": deduplicated.id, "deduplicated": True}
+
     batch = ImportBatch(
         id=str(uuid4()),
         source_system="upload",
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 import uuid
+from collections import defaultdict
 from datetime import date
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Mapping, Optional
 
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from ..models import (
@@ -16,14 +17,81 @@ from ..models import (
 )
 
 
+# Change-set entities whose rows feed ``facts_activity_outcomes``.
+FACT_SOURCES = ("activities", "beneficiaries", "funding_resources")
+FACT_REFRESH_CHUNK = 400
+
+
+def _changed_groups(changes: Mapping[str, Any]):
+    """Yield ``(project_fks, dates)`` blocks covering a change set's fact keys.
+
+    Every combination within a block is refreshed, a superset of the
+    touched pairs that keeps each statement's parameter count bounded.
+    """
+    dates_by_project: Dict[str, set] = defaultdict(set)
+    for name in FACT_SOURCES:
+        for project_fk, day in changes.get(name, ()):
+            dates_by_project[project_fk].add(date.fromisoformat(day) if day else None)
+    projects = sorted(dates_by_project)
+    for start in range(0, len(projects), FACT_REFRESH_CHUNK):
+        chunk = projects[start : start + FACT_REFRESH_CHUNK]
+        days = set().union(*(dates_by_project[p] for p in chunk))
+        dated = sorted(d for d in days if d is not None)
+        blocks = [
+            set(dated[i : i + FACT_REFRESH_CHUNK])
+            for i in range(0, len(dated), FACT_REFRESH_CHUNK)
+        ] or [set()]
+        if None in days:
+            blocks[0].add(None)
+        for block in blocks:
+            yield chunk, block
+
+
+def _in_groups(project_col, date_col, project_fks, days):
+    conds = []
+    dated = [d for d in days if d is not None]
+    if dated:
+        conds.append(date_col.in_(dated))
+    if None in days:
+        conds.append(date_col.is_(None))
+    return project_col.in_(project_fks) & or_(*conds)
+
+
 class AnalyticsService:
     """Service for refreshing and querying analytics facts."""
 
-    def refresh_facts(self, db: Session) -> None:
-        db.query(ActivityOutcomeFact).delete()
+    def refresh_facts(self, db: Session, changes: Optional[Mapping[str, Any]] = None) -> None:
+        """Rebuild ``facts_activity_outcomes``.
+
+        ``changes`` is an import batch's ``change_set``; when given only the
+        ``(project_fk, date)`` groups it touched are deleted and recomputed.
+        """
+        if changes is None:
+            db.query(ActivityOutcomeFact).delete()
+            db.commit()
+            self._insert_facts(db, self._fact_rows(db))
+            db.commit()
+            return
+
+        for project_fks, days in _changed_groups(changes):
+            db.query(ActivityOutcomeFact).filter(
+                _in_groups(
+                    ActivityOutcomeFact.project_fk,
+                    ActivityOutcomeFact.activity_date,
+                    project_fks,
+                    days,
+                )
+            ).delete(synchronize_session=False)
+            self._insert_facts(
+                db,
+                self._fact_rows(db).filter(
+                    _in_groups(Activity.project_fk, Activity.date, project_fks, days)
+                ),
+            )
         db.commit()
 
-        rows = (
+    def _fact_rows(self, db: Session):
+        return (
             db.query(
                 Activity.project_fk.label("project_fk"),
                 Activity.date.label("activity_date"),
@@ -42,9 +110,10 @@ class AnalyticsService:
                 & (FundingResource.date == Activity.date),
             )
             .group_by(Activity.project_fk, Activity.date)
-        ).all()
+        )
 
-        for r in rows:
+    def _insert_facts(self, db: Session, rows) -> None:
+        for r in rows.all():
             db.add(
                 ActivityOutcomeFact(
                     id=str(uuid.uuid4()),
@@ -55,7 +124,7 @@ class AnalyticsService:
                     spend=float(r.spend or 0.0),
                 )
             )
-        db.commit()
+        db.flush()
 
     # KPI values
     def kpis(self, db: Session, org_id: str, start: date | None = None) -> Dict[str, Any]:
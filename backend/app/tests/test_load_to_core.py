@@ -2,8 +2,11 @@ from pathlib import Path
 import os
 import sys
 import uuid
+from datetime import date
 
+import pandas as pd
 import pytest
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 
 # Setup environment and path
@@ -23,9 +26,21 @@ os.environ.setdefault("google_redirect_uri", "http://localhost")
 os.environ.setdefault("secret_key", "test")
 
 from backend.app.database import Base, engine, SessionLocal
-from backend.app.ingest.hash import canonical_row_hash
-from backend.app.ingest.load_to_core import load_to_core
+from backend.app.ingest.hash import LEGACY_HASH_VERSION, canonical_row_hash, row_hash_algorithm
+from backend.app.ingest import load_to_core as load_to_core_module
+from backend.app.ingest.load_to_core import (
+    CHILD_SPECS,
+    ENTITY_NAMES,
+    PROJECT_SPEC,
+    _staged_windows,
+    load_to_core,
+    preview_load,
+)
+from backend.app.ingest.parse_and_stage import parse_and_stage
+from backend.app.ingest.validators import TEMPLATE_SHEETS
+from backend.app.services.analytics_service import AnalyticsService
 from backend.app.models import (
+    ActivityOutcomeFact,
     ImportBatch,
     StgProjectInfo,
     StgActivity,
@@ -186,6 +201,8 @@ def test_load_to_core_idempotent():
     _stage_sample_data(batch_id)
 
     counts1 = load_to_core(batch_id)
+    durations = counts1.pop("durations_ms")
+    assert set(durations) == set(counts1)
     assert counts1 == {
         "projects": {"inserted": 1, "updated": 0},
         "activities": {"inserted": 1, "updated": 0},
@@ -200,9 +217,13 @@ def test_load_to_core_idempotent():
     assert db.query(Outcome).count() == 1
     assert db.query(FundingResource).count() == 1
     assert db.query(Beneficiary).count() == 1
+    batch = db.get(ImportBatch, batch_id)
+    assert batch.loaded_at is not None
+    assert batch.load_counts == {**counts1, "durations_ms": durations}
     db.close()
 
     counts2 = load_to_core(batch_id)
+    counts2.pop("durations_ms")
     assert counts2 == {
         "projects": {"inserted": 0, "updated": 0},
         "activities": {"inserted": 0, "updated": 0},
@@ -241,3 +262,541 @@ def test_load_to_core_fk_enforced():
     with pytest.raises(IntegrityError):
         load_to_core(batch_id)
 
+
+
+def test_load_to_core_resolves_projects_once():
+    batch_id = str(uuid.uuid4())
+    _stage_sample_data(batch_id)
+    db = SessionLocal()
+    for i in range(2, 52):
+        data = {
+            "owner_org_id": "org1",
+            "project_id": "p1",
+            "date": "2024-02-01",
+            "activity_type": "type",
+            "activity_name": f"act{i}",
+        }
+        db.add(
+            StgActivity(
+                id=str(uuid.uuid4()),
+                upload_id="u1",
+                row_num=i,
+                raw_json=data,
+                row_hash=canonical_row_hash(data),
+                import_batch_id=batch_id,
+                source_system="excel",
+                schema_version=1,
+            )
+        )
+    db.commit()
+    db.close()
+
+    lookups = []
+
+    def _record(conn, cursor, statement, *args):
+        if statement.startswith("SELECT projects."):
+            lookups.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        counts = load_to_core(batch_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert counts["activities"]["inserted"] == 51
+    # one lookup for the staged project itself, one for all child rows
+    assert len(lookups) == 2
+    db = SessionLocal()
+    assert {a.project_fk for a in db.query(Activity)} == {db.query(Project).one().id}
+    db.close()
+
+
+def test_load_to_core_prefilters_unchanged_rows():
+    first = str(uuid.uuid4())
+    _stage_sample_data(first)
+    load_to_core(first)
+
+    second = str(uuid.uuid4())
+    _stage_sample_data(second)
+    db = SessionLocal()
+    changed = db.query(StgOutcome).filter(StgOutcome.import_batch_id == second).one()
+    data = {**changed.raw_json, "value": 7}
+    changed.raw_json = data
+    changed.row_hash = canonical_row_hash(data)
+    db.commit()
+
+    specs = (PROJECT_SPEC,) + CHILD_SPECS
+    for spec in specs:
+        load_to_core_module._backfill_typed_columns(db, spec, second)
+    survivors = {
+        s.name: sum(len(w) for w in _staged_windows(db, s, second, 100)) for s in specs
+    }
+    assert survivors == {
+        "projects": 0,
+        "activities": 0,
+        "outcomes": 1,
+        "funding_resources": 0,
+        "beneficiaries": 0,
+    }
+    db.close()
+
+    counts = load_to_core(second)
+    assert counts["outcomes"] == {"inserted": 0, "updated": 1}
+    assert sum(counts[n]["inserted"] + counts[n]["updated"] for n in ENTITY_NAMES) == 1
+    db = SessionLocal()
+    assert db.query(Outcome).one().value == 7
+    db.close()
+
+
+def test_load_to_core_compares_hashes_of_the_same_version_only():
+    first = str(uuid.uuid4())
+    _stage_sample_data(first)
+    load_to_core(first)
+
+    # The same rows hashed with another algorithm, even colliding with the
+    # stored SHA-256 hash, only have their stamp moved to the new version:
+    # nothing counts as updated and the change set stays empty.
+    blake2b = row_hash_algorithm("blake2b")
+    second = str(uuid.uuid4())
+    _stage_sample_data(second)
+    db = SessionLocal()
+    outcome = db.query(StgOutcome).filter(StgOutcome.import_batch_id == second).one()
+    outcome.hash_version = blake2b.version
+    outcome.row_hash = "rehashed"
+    db.commit()
+    db.close()
+
+    assert preview_load(second)["outcomes"] == {"inserted": 0, "updated": 0, "unchanged": 1}
+    counts = load_to_core(second)
+    assert sum(counts[n]["inserted"] + counts[n]["updated"] for n in ENTITY_NAMES) == 0
+    db = SessionLocal()
+    stored = db.query(Outcome).one()
+    assert (stored.row_hash, stored.hash_version) == ("rehashed", blake2b.version)
+    assert stored.import_batch_id == first
+    assert db.get(ImportBatch, second).change_set["outcomes"] == []
+    db.close()
+
+    third = str(uuid.uuid4())
+    _stage_sample_data(third)
+    db = SessionLocal()
+    db.query(StgOutcome).filter(StgOutcome.import_batch_id == third).update(
+        {"hash_version": blake2b.version, "row_hash": "rehashed"}
+    )
+    db.commit()
+    db.close()
+    counts = load_to_core(third)
+    assert sum(counts[n]["inserted"] + counts[n]["updated"] for n in ENTITY_NAMES) == 0
+
+    # A row that changed along with its hash version is still an update.
+    fourth = str(uuid.uuid4())
+    _stage_sample_data(fourth)
+    db = SessionLocal()
+    changed = db.query(StgOutcome).filter(StgOutcome.import_batch_id == fourth).one()
+    data = {**changed.raw_json, "value": 7}
+    changed.raw_json = data
+    changed.row_hash = canonical_row_hash(data)
+    db.commit()
+    db.close()
+    counts = load_to_core(fourth)
+    assert counts["outcomes"] == {"inserted": 0, "updated": 1}
+
+    assert row_hash_algorithm().name == "sha256"
+    assert canonical_row_hash({"a": 1}, blake2b) != canonical_row_hash({"a": 1})
+    with pytest.raises(ValueError):
+        row_hash_algorithm("md5")
+
+
+def _template_row(sheet: str, cells=None):
+    row = {}
+    for col, kind in TEMPLATE_SHEETS[sheet].items():
+        if col == "Project ID":
+            row[col] = "p1"
+        elif col.endswith("Date"):
+            row[col] = "2024-01-31"
+        elif kind in (int, float):
+            row[col] = 10
+        else:
+            row[col] = col.lower()
+    row.update(cells or {})
+    return row
+
+
+def _write_template(path: Path):
+    frames = {sheet: pd.DataFrame([_template_row(sheet)]) for sheet in TEMPLATE_SHEETS}
+    # A whole number in a column with fractions is 5.0 to pandas.
+    frames["Outcomes"] = pd.DataFrame(
+        [
+            _template_row("Outcomes", {"Value": 5}),
+            _template_row("Outcomes", {"Outcome Metric": "ratio", "Value": 2.5}),
+        ]
+    )
+    with pd.ExcelWriter(path) as writer:
+        for name, frame in frames.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return frames
+
+
+def _stage_file(path: Path, batch_id: str):
+    db = SessionLocal()
+    _add_import_batch(db, batch_id)
+    db.commit()
+    db.close()
+    parse_and_stage(upload_id="u1", import_batch_id=batch_id, file_path=str(path))
+    db = SessionLocal()
+    for model in (StgProjectInfo, StgActivity, StgOutcome, StgFundingResource, StgBeneficiary):
+        db.query(model).filter(model.import_batch_id == batch_id).update(
+            {"owner_org_id": "org1"}
+        )
+    db.commit()
+    db.close()
+
+
+# What the baseline stored for the Value 5 outcome of _write_template(): the
+# SHA-256 of its cells as pandas read them, with "Value" 5.0.
+BASELINE_OUTCOME_HASH = "95ca486fde2bb956cea694045c5bfe6045d8673849972f822cd0a3ae9fcec147"
+
+
+def test_load_to_core_restamps_rows_hashed_at_baseline(tmp_path):
+    path = tmp_path / "data.xlsx"
+    _write_template(path)
+    first = str(uuid.uuid4())
+    _stage_file(path, first)
+    load_to_core(first)
+
+    # Store the rows the way the baseline did; only the outcome hashed a
+    # cell differently.
+    db = SessionLocal()
+    for model in (Project, Activity, Outcome, FundingResource, Beneficiary):
+        db.query(model).update({"hash_version": LEGACY_HASH_VERSION})
+    outcome = db.query(Outcome).filter(Outcome.value == 5).one()
+    assert outcome.row_hash != BASELINE_OUTCOME_HASH
+    outcome.row_hash = BASELINE_OUTCOME_HASH
+    db.commit()
+    db.close()
+
+    second = str(uuid.uuid4())
+    _stage_file(path, second)
+    counts = load_to_core(second)
+    counts.pop("durations_ms")
+    assert all(c == {"inserted": 0, "updated": 0} for c in counts.values())
+    db = SessionLocal()
+    changes = db.get(ImportBatch, second).change_set
+    assert changes == {"project_fks": [], **{spec.name: [] for spec in CHILD_SPECS}}
+    staged = {
+        r.value: (r.row_hash, r.hash_version)
+        for r in db.query(StgOutcome).filter(StgOutcome.import_batch_id == second)
+    }
+    assert {o.value: (o.row_hash, o.hash_version) for o in db.query(Outcome)} == staged
+    assert {version for _, version in staged.values()} == {row_hash_algorithm().version}
+    db.close()
+
+
+@pytest.mark.parametrize("sheet", ["Activities", "Outcomes"])
+def test_load_to_core_csv_of_a_loaded_workbook_is_unchanged(tmp_path, sheet):
+    frames = _write_template(tmp_path / "data.xlsx")
+    first = str(uuid.uuid4())
+    _stage_file(tmp_path / "data.xlsx", first)
+    load_to_core(first)
+
+    path = tmp_path / f"{sheet.lower()}.csv"
+    frames[sheet].to_csv(path, index=False)
+    second = str(uuid.uuid4())
+    _stage_file(path, second)
+    counts = load_to_core(second)
+    assert counts[sheet.lower()] == {"inserted": 0, "updated": 0}
+
+
+def test_load_to_core_matches_hashes_within_the_natural_key():
+    # Two orgs load identical rows: the stored hashes of one org's rows must
+    # not make the other org's rows look unchanged.
+    for owner in ("org1", "org2"):
+        batch_id = str(uuid.uuid4())
+        db = SessionLocal()
+        _add_import_batch(db, batch_id)
+        db.flush()
+        for model, values in (
+            (StgProjectInfo, {"name": "Project 1"}),
+            (StgOutcome, {"date": date(2024, 3, 1), "outcome_metric": "metric", "value": 1.0}),
+        ):
+            db.add(
+                model(
+                    id=str(uuid.uuid4()),
+                    upload_id="u1",
+                    row_num=1,
+                    raw_json={},
+                    row_hash="same",
+                    import_batch_id=batch_id,
+                    owner_org_id=owner,
+                    project_id="p1",
+                    **values,
+                )
+            )
+        db.commit()
+        db.close()
+
+        counts = load_to_core(batch_id)
+        assert counts["projects"] == {"inserted": 1, "updated": 0}
+        assert counts["outcomes"] == {"inserted": 1, "updated": 0}
+
+    db = SessionLocal()
+    assert sorted(p.owner_org_id for p in db.query(Project)) == ["org1", "org2"]
+    assert db.query(Outcome).count() == 2
+    db.close()
+
+
+def test_preview_load_counts_without_writing():
+    first = str(uuid.uuid4())
+    _stage_sample_data(first)
+    preview = preview_load(first)
+    assert preview["projects"] == {"inserted": 1, "updated": 0, "unchanged": 0}
+    assert preview["activities"] == {"inserted": 1, "updated": 0, "unchanged": 0}
+    db = SessionLocal()
+    assert db.query(Project).count() == 0
+    assert db.query(Activity).count() == 0
+    assert db.get(ImportBatch, first).loaded_at is None
+    db.close()
+    load_to_core(first)
+
+    second = str(uuid.uuid4())
+    _stage_sample_data(second)
+    db = SessionLocal()
+    changed = db.query(StgOutcome).filter(StgOutcome.import_batch_id == second).one()
+    data = {**changed.raw_json, "value": 7}
+    changed.raw_json = data
+    changed.row_hash = canonical_row_hash(data)
+    db.commit()
+    db.close()
+
+    preview = preview_load(second)
+    assert preview["outcomes"] == {"inserted": 0, "updated": 1, "unchanged": 0}
+    assert preview["activities"] == {"inserted": 0, "updated": 0, "unchanged": 1}
+    counts = load_to_core(second)
+    counts.pop("durations_ms")
+    assert counts == {
+        name: {k: v for k, v in preview[name].items() if k != "unchanged"}
+        for name in ENTITY_NAMES
+    }
+
+
+def test_load_to_core_reads_typed_columns_only():
+    batch_id = str(uuid.uuid4())
+    db = SessionLocal()
+    _add_import_batch(db, batch_id)
+    db.flush()
+    # raw_json is kept for audits; the loader only reads the typed columns
+    db.add(
+        StgProjectInfo(
+            id=str(uuid.uuid4()),
+            upload_id="u1",
+            row_num=1,
+            raw_json={},
+            row_hash="p",
+            import_batch_id=batch_id,
+            owner_org_id="org1",
+            project_id="p1",
+            name="Project 1",
+            start_date=date(2024, 1, 1),
+        )
+    )
+    db.add(
+        StgOutcome(
+            id=str(uuid.uuid4()),
+            upload_id="u1",
+            row_num=1,
+            raw_json={},
+            row_hash="o",
+            import_batch_id=batch_id,
+            owner_org_id="org1",
+            project_id="p1",
+            date=date(2024, 3, 1),
+            outcome_metric="metric",
+            value=2.5,
+        )
+    )
+    db.commit()
+    db.close()
+
+    counts = load_to_core(batch_id)
+    assert counts["projects"] == {"inserted": 1, "updated": 0}
+    assert counts["outcomes"] == {"inserted": 1, "updated": 0}
+    db = SessionLocal()
+    project = db.query(Project).one()
+    assert (project.name, project.start_date) == ("Project 1", date(2024, 1, 1))
+    outcome = db.query(Outcome).one()
+    assert (outcome.project_fk, outcome.date, outcome.value) == (project.id, date(2024, 3, 1), 2.5)
+    db.close()
+
+
+def test_load_to_core_normalizes_legacy_staged_rows():
+    batch_id = str(uuid.uuid4())
+    _stage_sample_data(batch_id)
+    db = SessionLocal()
+    bad = db.query(StgActivity).filter(StgActivity.import_batch_id == batch_id).one()
+    bad.raw_json = {**bad.raw_json, "date": "not a date"}
+    db.commit()
+    db.close()
+
+    counts = load_to_core(batch_id)
+    assert counts["activities"] == {"inserted": 0, "updated": 0}
+    assert counts["outcomes"] == {"inserted": 1, "updated": 0}
+    db = SessionLocal()
+    staged = db.query(StgActivity).filter(StgActivity.import_batch_id == batch_id).one()
+    assert staged.parse_errors == {"invalid": ["date"]}
+    outcome = db.query(StgOutcome).filter(StgOutcome.import_batch_id == batch_id).one()
+    assert (outcome.project_id, outcome.date, outcome.value) == ("p1", date(2024, 3, 1), 5.0)
+    db.close()
+
+
+def test_load_to_core_parallel_children(monkeypatch):
+    first = str(uuid.uuid4())
+    _stage_sample_data(first)
+    load_to_core(first)
+
+    # SQLite allows one writer, so only the outcome changes in this batch.
+    second = str(uuid.uuid4())
+    _stage_sample_data(second)
+    db = SessionLocal()
+    changed = db.query(StgOutcome).filter(StgOutcome.import_batch_id == second).one()
+    data = {**changed.raw_json, "value": 9}
+    changed.raw_json = data
+    changed.row_hash = canonical_row_hash(data)
+    db.commit()
+    db.close()
+
+    fake_engine = type("Engine", (), {"dialect": type("Dialect", (), {"name": "postgresql"})})
+    monkeypatch.setattr(load_to_core_module, "engine", fake_engine)
+    sessions = []
+    real_session = load_to_core_module.SessionLocal
+
+    def tracking_session():
+        sessions.append(real_session())
+        return sessions[-1]
+
+    monkeypatch.setattr(load_to_core_module, "SessionLocal", tracking_session)
+    counts = load_to_core(second, parallel=True, max_workers=4)
+
+    assert len(sessions) == 1 + len(CHILD_SPECS)
+    assert counts["outcomes"] == {"inserted": 0, "updated": 1}
+    assert set(counts["durations_ms"]) == set(ENTITY_NAMES)
+    db = real_session()
+    assert db.query(Outcome).one().value == 9
+    assert db.get(ImportBatch, second).loaded_at is not None
+    db.close()
+
+
+def test_load_to_core_parallel_failure_rolls_back_everything(monkeypatch):
+    batch_id = str(uuid.uuid4())
+    _stage_sample_data(batch_id)
+    fake_engine = type("Engine", (), {"dialect": type("Dialect", (), {"name": "postgresql"})})
+    monkeypatch.setattr(load_to_core_module, "engine", fake_engine)
+    real_write = load_to_core_module.write_changes
+    children = {spec.model.__table__.name for spec in CHILD_SPECS}
+    written = []
+
+    def failing_write(session, table, final, *args, **kwargs):
+        if table.name in children and final:
+            written.append(table.name)
+            if len(written) == 3:
+                raise RuntimeError("boom")
+        return real_write(session, table, final, *args, **kwargs)
+
+    monkeypatch.setattr(load_to_core_module, "write_changes", failing_write)
+    with pytest.raises(RuntimeError):
+        load_to_core(batch_id, parallel=True)
+
+    assert len(written) == 3
+    db = SessionLocal()
+    for model in (Project, Activity, Outcome, FundingResource, Beneficiary):
+        assert db.query(model).count() == 0
+    assert db.get(ImportBatch, batch_id).loaded_at is None
+    db.close()
+
+
+def test_load_entity_streams_windows():
+    batch_id = str(uuid.uuid4())
+    _stage_sample_data(batch_id)
+    db = SessionLocal()
+    for i in range(2, 26):
+        # the last row repeats the first one's key with different content
+        name = "act" if i == 25 else f"act{i}"
+        data = {
+            "owner_org_id": "org1",
+            "project_id": "p1",
+            "date": "2024-02-01",
+            "activity_name": name,
+            "notes": f"row {i}",
+        }
+        db.add(
+            StgActivity(
+                id=str(uuid.uuid4()),
+                upload_id="u1",
+                row_num=i,
+                raw_json=data,
+                row_hash=canonical_row_hash(data),
+                import_batch_id=batch_id,
+                source_system="excel",
+                schema_version=1,
+            )
+        )
+    db.commit()
+
+    project_ids = load_to_core_module._ProjectIds()
+    activities = CHILD_SPECS[0]
+    for spec in (PROJECT_SPEC, activities):
+        load_to_core_module._backfill_typed_columns(db, spec, batch_id)
+    load_to_core_module._load_entity(db, PROJECT_SPEC, batch_id, project_ids)
+    windows = list(_staged_windows(db, activities, batch_id, 10))
+    assert [len(w) for w in windows] == [10, 10, 5]
+
+    counts = load_to_core_module._load_entity(
+        db, activities, batch_id, project_ids, window=10
+    )
+    assert counts == {"inserted": 24, "updated": 1}
+    assert db.query(Activity).filter(Activity.activity_name == "act").one().notes == "row 25"
+    db.close()
+
+
+def _facts(db):
+    return sorted(
+        (f.project_fk, f.activity_date, f.activities, f.beneficiaries, f.spend)
+        for f in db.query(ActivityOutcomeFact)
+    )
+
+
+def test_load_to_core_change_set_drives_targeted_fact_refresh():
+    first = str(uuid.uuid4())
+    _stage_sample_data(first)
+    load_to_core(first)
+    db = SessionLocal()
+    project_fk = db.query(Project).one().id
+    changes = db.get(ImportBatch, first).change_set
+    assert changes == {
+        "project_fks": [project_fk],
+        "activities": [[project_fk, "2024-02-01"]],
+        "outcomes": [[project_fk, "2024-03-01"]],
+        "funding_resources": [[project_fk, "2024-04-01"]],
+        "beneficiaries": [[project_fk, "2024-05-01"]],
+    }
+    AnalyticsService().refresh_facts(db)
+
+    # A beneficiary on the activity's date changes one fact group only.
+    second = str(uuid.uuid4())
+    _stage_sample_data(second)
+    ben = db.query(StgBeneficiary).filter(StgBeneficiary.import_batch_id == second).one()
+    data = {**ben.raw_json, "date": "2024-02-01", "count": 3}
+    ben.raw_json = data
+    ben.row_hash = canonical_row_hash(data)
+    db.commit()
+    load_to_core(second)
+    db.expire_all()
+    changes = db.get(ImportBatch, second).change_set
+    assert changes["project_fks"] == [project_fk]
+    assert changes["beneficiaries"] == [[project_fk, "2024-02-01"]]
+    assert changes["activities"] == changes["outcomes"] == []
+
+    AnalyticsService().refresh_facts(db, changes)
+    targeted = _facts(db)
+    AnalyticsService().refresh_facts(db)
+    assert targeted == _facts(db)
+    assert targeted[0][3] == 3
+    db.close()
@@ -1,9 +1,11 @@
+from datetime import date
 from pathlib import Path
+import os
 import sys
 
 sys.path.append(str(Path(__file__).resolve().parents[3]))
 
-from backend.app.ingest.mapping_loader import load_mapping
+from backend.app.ingest.mapping_loader import MappingRegistry, load_mapping
 
 EXPECTED_MAPPING = {
     "project_info": {
@@ -60,3 +62,31 @@ EXPECTED_MAPPING = {
 def test_load_mapping_excel_v1():
     mapping = load_mapping()
     assert mapping == EXPECTED_MAPPING
+
+
+def test_mapping_registry_caches_until_file_changes(tmp_path):
+    path = tmp_path / "excel_v1.yml"
+    path.write_text("activities:\n  date: Date\n", encoding="utf-8")
+    registry = MappingRegistry(tmp_path, interval=0)
+
+    first = registry.get()
+    assert first == {"activities": {"date": "date"}}
+    assert registry.get() is first
+
+    path.write_text("activities:\n  date: Day\n", encoding="utf-8")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 1_000_000))
+    second = registry.get()
+    assert second is not first
+    assert second == {"activities": {"day": "date"}}
+
+
+def test_sheet_plan_resolves_headers_once():
+    mapping = load_mapping()
+    plan = mapping.sheet("Activities")
+    assert mapping.sheet("activities") is plan
+
+    headers = ("Project ID", " Date ", "Unknown")
+    columns = plan.columns(headers)
+    assert [(h, t) for h, t, _ in columns] == [("Project ID", "project_id"), (" Date ", "date")]
+    assert plan.columns(headers) is columns
+    assert columns[1][2]("2024-01") == date(2024, 1, 31)
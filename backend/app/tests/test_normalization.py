@@ -1,12 +1,20 @@
+from datetime import date
 from pathlib import Path
 import sys
 
 import pandas as pd
+import pytest
 
 # Add repository root to path
 sys.path.append(str(Path(__file__).resolve().parents[3]))
 
-from backend.app.ingest.normalize import normalize_row
+from backend.app.ingest.normalize import (
+    normalize_chunks,
+    normalize_frame,
+    normalize_pool,
+    normalize_row,
+    normalize_rows,
+)
 from backend.app.ingest.mapping_loader import load_mapping
 import importlib
 import backend.app.ingest.normalize as normalize_module
@@ -66,3 +74,175 @@ def test_pii_redaction(monkeypatch):
     importlib.reload(normalize_module)
     norm, _ = normalize_module.normalize_row(row, "activities", mapping=mapping)
     assert norm["notes"] == row["notes"]
+
+
+def test_pii_redaction_only_touches_free_text_fields(monkeypatch):
+    monkeypatch.setenv("PII_REDACTION_ENABLED", "true")
+    importlib.reload(normalize_module)
+    mapping = load_mapping()
+    assert mapping.free_text("notes") and not mapping.free_text("project_id")
+
+    row = {"Project ID": "call 555-123-4567", "Notes": "mail a@b.org, 555-123-4567"}
+    norm, _ = normalize_module.normalize_row(row, "activities", mapping=mapping)
+    assert norm["notes"] == "mail [REDACTED], [REDACTED]"
+    assert norm["project_id"] == row["Project ID"]
+
+    monkeypatch.setenv("PII_REDACTION_ENABLED", "false")
+    importlib.reload(normalize_module)
+
+
+def test_normalize_frame_counts_redactions(monkeypatch):
+    from collections import Counter
+
+    monkeypatch.setenv("PII_REDACTION_ENABLED", "true")
+    importlib.reload(normalize_module)
+    mapping = load_mapping()
+    df = pd.DataFrame(
+        {
+            "Project ID": ["a@b.org"] * 4,
+            "Notes": ["x@y.com or 555-123-4567", "x@y.com or 555-123-4567", "none", None],
+        }
+    )
+    redactions = Counter()
+    frame, _ = normalize_module.normalize_frame(
+        df, "activities", mapping=mapping, redactions=redactions
+    )
+    assert list(frame["notes"]) == ["[REDACTED] or [REDACTED]"] * 2 + ["none", None]
+    assert list(frame["project_id"]) == ["a@b.org"] * 4
+    assert redactions == {"notes": 4}
+
+    monkeypatch.setenv("PII_REDACTION_ENABLED", "false")
+    importlib.reload(normalize_module)
+
+
+def test_normalize_frame_matches_normalize_row():
+    mapping = load_mapping()
+    rows = [
+        {"Project ID": "p1", "Date": "2024-02-01", "Activity Type": " workshop ",
+         "Beneficiaries Reached": "1,200", "Notes": "n"},
+        {"Project ID": "p2", "Date": "2024-02", "Activity Type": None,
+         "Beneficiaries Reached": "abc", "Notes": ""},
+        {"Project ID": "p3", "Date": "someday", "Activity Type": "A",
+         "Beneficiaries Reached": 3.7, "Notes": None},
+    ]
+    assert normalize_rows(rows, "activities", mapping=mapping) == [
+        normalize_row(row, "activities", mapping=mapping) for row in rows
+    ]
+
+    frame, errors = normalize_frame(pd.DataFrame(rows), "activities", mapping=mapping)
+    assert frame["date"].tolist()[:2] == [date(2024, 2, 1), date(2024, 2, 29)]
+    assert frame["beneficiaries_reached"].tolist() == [1200, None, 3]
+    assert errors == [None, {"invalid": ["beneficiaries_reached"]}, {"invalid": ["date"]}]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["12", "1e20", "9223372036854775808", "inf", "-inf", "nan", "-9223372036854775808"],
+        [12.0, 1e20, 2.0**63, float("inf"), float("-inf"), float("1e400"), -(2.0**63)],
+    ],
+)
+@pytest.mark.parametrize(
+    "sheet, header, invalid",
+    [("beneficiaries", "Count", [1, 2, 3, 4, 5]), ("outcomes", "Value", [3, 4, 5])],
+)
+def test_normalize_frame_matches_normalize_row_out_of_range(values, sheet, header, invalid):
+    # Non-finite numbers, and integers outside int64, are invalid either way.
+    mapping = load_mapping()
+    rows = [{header: v} for v in values]
+    expected = [normalize_row(row, sheet, mapping=mapping) for row in rows]
+    frame, errors = normalize_frame(pd.DataFrame(rows), sheet, mapping=mapping)
+    assert list(zip(frame.to_dict("records"), errors)) == expected
+    assert [i for i, (_, e) in enumerate(expected) if e is not None] == invalid
+
+
+def test_normalize_frame_typed_columns():
+    df = pd.DataFrame(
+        {"project_id": ["p1", "p2"], "Date": pd.to_datetime(["2024-01-05", None]), "Value": [1.5, None]}
+    )
+    frame, errors = normalize_frame(
+        df, "outcomes", columns=["owner_org_id", "project_id", "date", "value"]
+    )
+    assert list(frame.columns) == ["owner_org_id", "project_id", "date", "value"]
+    assert frame.to_dict("records") == [
+        {"owner_org_id": None, "project_id": "p1", "date": date(2024, 1, 5), "value": 1.5},
+        {"owner_org_id": None, "project_id": "p2", "date": None, "value": None},
+    ]
+    assert errors == [None, None]
+
+
+def test_normalize_chunks_on_process_pool():
+    mapping = load_mapping()
+    df = pd.DataFrame(
+        {
+            "Project ID": [f"p{i}" for i in range(7)],
+            "Date": ["2024-01-05", "bad", None, "2024-02", "", "05/03/2024", "2024-01-05"],
+            "Beneficiaries Reached": ["1", "2,000", "x", None, "5", "6", "7"],
+        },
+        index=range(10, 17),
+    )
+    chunks = [df.iloc[start : start + 3] for start in range(0, len(df), 3)]
+    serial = list(normalize_chunks(chunks, "activities", mapping=mapping))
+    pool = normalize_pool(2, mapping)
+    assert pool is not None
+    with pool:
+        pooled = list(normalize_chunks(chunks, "activities", pool=pool, ahead=2))
+    assert len(pooled) == len(serial) == 3
+    for (chunk, frame, errors), (serial_chunk, serial_frame, serial_errors) in zip(pooled, serial):
+        assert chunk is serial_chunk
+        pd.testing.assert_frame_equal(frame, serial_frame)
+        assert errors == serial_errors
+
+
+def test_normalize_pool_not_started_in_daemonic_process(monkeypatch):
+    class Daemon:
+        daemon = True
+
+    assert normalize_pool(1) is None
+    monkeypatch.setattr(normalize_module.multiprocessing, "current_process", lambda: Daemon())
+    assert normalize_pool(2) is None
+
+
+def test_coerce_date_formats_and_excel_serials(monkeypatch):
+    coerce_date = normalize_module.coerce_date
+    assert coerce_date("2024-02-01") == date(2024, 2, 1)
+    assert coerce_date(" 2024-02 ") == date(2024, 2, 29)
+    assert coerce_date("2023-02-29") is None
+    assert coerce_date("31/12/2023") is None
+    assert coerce_date("someday") is None
+    assert coerce_date(True) is None
+    # Serial numbers are off by default.
+    assert coerce_date(45292) is None
+
+    monkeypatch.setattr(normalize_module, "EXCEL_SERIAL_DATES", True)
+    assert coerce_date(45292) == date(2024, 1, 1)
+    assert coerce_date(45292.5) == date(2024, 1, 1)
+    assert coerce_date("45292") is None
+    # Excel's phantom 1900-02-29 is serial 60.
+    assert coerce_date(1) == date(1900, 1, 1)
+    assert coerce_date(59) == date(1900, 2, 28)
+    assert coerce_date(60) is None
+    assert coerce_date(61) == date(1900, 3, 1)
+
+    normalize_module._parse_date_text.cache_clear()
+    patterns = (normalize_module._compile_date_format("%d/%m/%Y"),)
+    monkeypatch.setattr(normalize_module, "_DATE_PATTERNS", patterns)
+    assert coerce_date("31/12/2023") == date(2023, 12, 31)
+    assert coerce_date("12/31/2023") is None
+    normalize_module._parse_date_text.cache_clear()
+
+
+def test_coerce_date_memoizes_distinct_strings():
+    parse = normalize_module._parse_date_text
+    parse.cache_clear()
+    for _ in range(3):
+        normalize_module.coerce_date("2024-03-15")
+    assert parse.cache_info().misses == 1
+    assert parse.cache_info().hits == 2
+
+
+def test_compile_date_format():
+    pattern = normalize_module._compile_date_format("%m.%d.%Y")
+    assert pattern.fullmatch("3.15.2024").groupdict() == {"month": "3", "day": "15", "year": "2024"}
+    with pytest.raises(ValueError):
+        normalize_module._compile_date_format("%d %b %Y")
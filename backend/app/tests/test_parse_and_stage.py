@@ -23,8 +23,10 @@ os.environ.setdefault("google_redirect_uri", "http://localhost")
 os.environ.setdefault("secret_key", "test")
 
 from backend.app.database import Base, engine, SessionLocal
-from backend.app.ingest.validators import REQUIRED_SHEETS
-from backend.app.ingest.parse_and_stage import parse_and_stage
+from backend.app.ingest.validators import REQUIRED_SHEETS, TEMPLATE_SHEETS
+from backend.app.ingest import parse_and_stage as parse_and_stage_module
+from backend.app.ingest.parse_and_stage import SHEET_KEY_MAP, parse_and_stage
+from backend.app.ingest.hash import canonical_row_hash
 from backend.app.ingest.errors import SchemaValidationError
 from backend.app.models.staging import (
     StgProjectInfo,
@@ -32,18 +34,27 @@ from backend.app.models.staging import (
     StgOutcome,
     StgFundingResource,
     StgBeneficiary,
+    StagingCheckpoint,
 )
 
 # Ensure tables exist
 Base.metadata.create_all(bind=engine)
 
 
+def _cell(sheet: str, col: str):
+    if col.endswith("Date"):
+        return "2024-01-31"
+    if TEMPLATE_SHEETS[sheet][col] in (int, float):
+        return 1
+    return f"{col} value"
+
+
 def _build_workbook(tmp_path: Path) -> Path:
     sheets = {}
     for name, cols in REQUIRED_SHEETS.items():
-        rows = [{c: f"{c} value" for c in cols}]
+        rows = [{c: _cell(name, c) for c in cols}]
         if name == "Project Info":
-            bad = {c: f"{c} value" for c in cols if c != "Project ID"}
+            bad = {c: _cell(name, c) for c in cols if c != "Project ID"}
             rows.append(bad)
         df = pd.DataFrame(rows)
         sheets[name] = df
@@ -61,6 +72,9 @@ def test_parse_and_stage_excel(tmp_path):
         import_batch_id=str(uuid.uuid4()),
         file_path=str(path),
     )
+    assert counts.pop("rows_per_sec") > 0
+    assert set(counts.pop("sheet_timings_ms")) == set(SHEET_KEY_MAP.values())
+    assert counts.pop("pii_redactions") == {}
     assert counts == {
         "project_info": 2,
         "activities": 1,
@@ -75,6 +89,33 @@ def test_parse_and_stage_excel(tmp_path):
         .one()
     )
     assert row.parse_errors == {"missing": ["Project ID"]}
+    valid = db.query(StgProjectInfo).filter(StgProjectInfo.row_num == 1)
+    assert valid.filter(StgProjectInfo.parse_errors.is_(None)).count() >= 1
+    db.close()
+
+
+def test_parse_and_stage_batches_rows(tmp_path):
+    cols = REQUIRED_SHEETS["Activities"]
+    df = pd.DataFrame([{c: f"{c} {i}" for c in cols} for i in range(5)])
+    path = tmp_path / "activities.csv"
+    df.to_csv(path, index=False)
+    batch_id = str(uuid.uuid4())
+    counts = parse_and_stage(
+        upload_id=str(uuid.uuid4()),
+        import_batch_id=batch_id,
+        file_path=str(path),
+        batch_size=2,
+    )
+    assert counts["activities"] == 5
+    db = SessionLocal()
+    rows = (
+        db.query(StgActivity)
+        .filter(StgActivity.import_batch_id == batch_id)
+        .order_by(StgActivity.row_num)
+        .all()
+    )
+    assert [r.row_num for r in rows] == [1, 2, 3, 4, 5]
+    assert rows[3].raw_json["Activity Name"] == "Activity Name 3"
     db.close()
 
 
@@ -112,3 +153,326 @@ def test_parse_and_stage_schema_error(tmp_path):
             import_batch_id=str(uuid.uuid4()),
             file_path=str(path),
         )
+
+
+def test_parse_and_stage_reads_file_once(tmp_path, monkeypatch):
+    path = _build_workbook(tmp_path)
+    calls = []
+    real_read_excel = pd.read_excel
+
+    def counting_read_excel(*args, **kwargs):
+        calls.append(args)
+        return real_read_excel(*args, **kwargs)
+
+    monkeypatch.setattr(pd, "read_excel", counting_read_excel)
+    parse_and_stage(
+        upload_id=str(uuid.uuid4()),
+        import_batch_id=str(uuid.uuid4()),
+        file_path=str(path),
+    )
+    assert len(calls) == 1
+
+
+def _staged(batch_id: str):
+    db = SessionLocal()
+    rows = {}
+    for model in (StgProjectInfo, StgActivity, StgOutcome, StgFundingResource, StgBeneficiary):
+        rows[model.__tablename__] = [
+            (r.row_num, r.raw_json, r.parse_errors, r.row_hash)
+            for r in db.query(model)
+            .filter(model.import_batch_id == batch_id)
+            .order_by(model.row_num)
+        ]
+    db.close()
+    return rows
+
+
+@pytest.mark.parametrize("filename", ["data.xlsx", "activities.csv"])
+def test_parse_and_stage_streaming_matches_in_memory(tmp_path, filename):
+    path = tmp_path / filename
+    if filename.endswith(".csv"):
+        cols = REQUIRED_SHEETS["Activities"]
+        rows = [{c: f"{c} {i}" for c in cols} for i in range(7)]
+        rows[3]["Activity Name"] = None
+        pd.DataFrame(rows).to_csv(path, index=False)
+    else:
+        with pd.ExcelWriter(path) as writer:
+            for name, cols in REQUIRED_SHEETS.items():
+                rows = [{c: f"{c} {i}" for c in cols} for i in range(7)]
+                rows[3][cols[0]] = None
+                pd.DataFrame(rows).to_excel(writer, sheet_name=name, index=False)
+
+    eager_batch, stream_batch = str(uuid.uuid4()), str(uuid.uuid4())
+    eager = parse_and_stage(
+        upload_id="u", import_batch_id=eager_batch, file_path=str(path)
+    )
+    streamed = parse_and_stage(
+        upload_id="u",
+        import_batch_id=stream_batch,
+        file_path=str(path),
+        batch_size=3,
+        streaming=True,
+    )
+    for counts in (eager, streamed):
+        counts.pop("rows_per_sec")
+        counts.pop("sheet_timings_ms")
+    assert streamed == eager
+    assert _staged(stream_batch) == _staged(eager_batch)
+
+
+def test_parse_and_stage_normalizes_on_process_pool(tmp_path):
+    cols = REQUIRED_SHEETS["Activities"]
+    rows = [{c: f"{c} {i}" for c in cols} for i in range(7)]
+    rows[2]["Date"] = "2024-01-31"
+    rows[4]["Beneficiaries Reached"] = "2,000"
+    path = tmp_path / "activities.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    serial_batch, pooled_batch = str(uuid.uuid4()), str(uuid.uuid4())
+    parse_and_stage(upload_id="u", import_batch_id=serial_batch, file_path=str(path), batch_size=2)
+    counts = parse_and_stage(
+        upload_id="u",
+        import_batch_id=pooled_batch,
+        file_path=str(path),
+        batch_size=2,
+        normalize_processes=2,
+    )
+    assert counts["activities"] == 7
+    assert _staged(pooled_batch) == _staged(serial_batch)
+    db = SessionLocal()
+    typed = [
+        [
+            (r.row_num, r.date, r.beneficiaries_reached, r.parse_errors)
+            for r in db.query(StgActivity)
+            .filter(StgActivity.import_batch_id == batch_id)
+            .order_by(StgActivity.row_num)
+        ]
+        for batch_id in (serial_batch, pooled_batch)
+    ]
+    db.close()
+    assert typed[0] == typed[1]
+    assert typed[1][4][2] == 2000
+
+
+def _typed_cell(sheet: str, col: str, i: int):
+    if i % 4 == 3:
+        return None
+    if col.endswith("Date"):
+        return pd.Timestamp(2024, 1, i + 1)
+    if TEMPLATE_SHEETS[sheet][col] in (int, float):
+        return i
+    return f"{col} {i}"
+
+
+@pytest.mark.parametrize("filename", ["data.xlsx", "outcomes.csv"])
+def test_parse_and_stage_streaming_matches_in_memory_typed_cells(tmp_path, filename):
+    # Numeric and date columns with blanks are float64/datetime64 for pandas
+    # but int/datetime (or missing) per chunk for the streaming reader.
+    path = tmp_path / filename
+    sheets = ["Outcomes"] if filename.endswith(".csv") else list(REQUIRED_SHEETS)
+    frames = {
+        name: pd.DataFrame(
+            [{c: _typed_cell(name, c, i) for c in REQUIRED_SHEETS[name]} for i in range(9)],
+            dtype=object,
+        )
+        for name in sheets
+    }
+    if filename.endswith(".csv"):
+        frames["Outcomes"].to_csv(path, index=False)
+    else:
+        with pd.ExcelWriter(path) as writer:
+            for name, frame in frames.items():
+                frame.to_excel(writer, sheet_name=name, index=False)
+
+    eager_batch, stream_batch = str(uuid.uuid4()), str(uuid.uuid4())
+    parse_and_stage(upload_id="u", import_batch_id=eager_batch, file_path=str(path))
+    parse_and_stage(
+        upload_id="u",
+        import_batch_id=stream_batch,
+        file_path=str(path),
+        batch_size=3,
+        streaming=True,
+    )
+    assert _staged(stream_batch) == _staged(eager_batch)
+    if filename.endswith(".xlsx"):
+        outcomes = _staged(eager_batch)["stg_outcomes"]
+        assert outcomes[1][1]["Value"] == 1
+        assert outcomes[3][1]["Value"] is None
+        assert outcomes[1][1]["Date"] == "2024-01-02T00:00:00"
+
+
+def test_parse_and_stage_streaming_csv_types_columns_over_the_whole_file(tmp_path):
+    # Notes holds numbers in the first chunks and text in the last one, so
+    # it is a text column although the first chunks alone look numeric.
+    cols = REQUIRED_SHEETS["Activities"]
+    rows = [
+        {**{c: f"{c} {i}" for c in cols}, "Beneficiaries Reached": i, "Notes": i}
+        for i in range(7)
+    ]
+    rows[6]["Notes"] = "later"
+    path = tmp_path / "activities.csv"
+    pd.DataFrame(rows, columns=cols).to_csv(path, index=False)
+
+    eager_batch, stream_batch = str(uuid.uuid4()), str(uuid.uuid4())
+    parse_and_stage(upload_id="u", import_batch_id=eager_batch, file_path=str(path))
+    parse_and_stage(
+        upload_id="u",
+        import_batch_id=stream_batch,
+        file_path=str(path),
+        batch_size=3,
+        streaming=True,
+    )
+    assert _staged(stream_batch) == _staged(eager_batch)
+    activities = _staged(eager_batch)["stg_activities"]
+    assert [r[1]["Notes"] for r in activities] == ["0", "1", "2", "3", "4", "5", "later"]
+    assert activities[0][1]["Beneficiaries Reached"] == 0
+
+
+def test_streaming_workbook_chunks_blank_rows(tmp_path):
+    from backend.app.ingest.workbook import ParsedWorkbook, StreamingWorkbook
+
+    path = tmp_path / "blanks.xlsx"
+    rows = [{"a": 1, "b": "x"}] + [{"a": None, "b": None}] * 7 + [{"a": 2.5, "b": "y"}]
+    pd.DataFrame(rows).to_excel(path, sheet_name="Activities", index=False)
+
+    chunks = list(StreamingWorkbook(path).iter_chunks("Activities", 3))
+    assert [len(c) for c in chunks] == [3, 3, 3]
+    eager = pd.concat(ParsedWorkbook.from_path(path).iter_chunks("Activities", 3))
+    pd.testing.assert_frame_equal(pd.concat(chunks), eager)
+
+
+def test_prepare_rows_nulls_and_missing():
+    from backend.app.ingest.parse_and_stage import _prepare_rows
+
+    df = pd.DataFrame(
+        {
+            "Project ID": ["p1", None, "p3"],
+            "Count": [1.0, float("nan"), 3.0],
+            "Notes": ["a", "b", None],
+        }
+    )
+    records, errors, hashes = _prepare_rows(df, ["Project ID", "Count", "Date"])
+    assert hashes == [canonical_row_hash(r) for r in records]
+    assert records[1] == {"Project ID": None, "Count": None, "Notes": "b"}
+    assert records[2]["Notes"] is None
+    assert errors == [
+        {"missing": ["Date"]},
+        {"missing": ["Project ID", "Count", "Date"]},
+        {"missing": ["Date"]},
+    ]
+
+
+@pytest.fixture
+def concurrent_dialect(monkeypatch):
+    """Let the parallel path run even though the test database is SQLite."""
+    fake_engine = type("Engine", (), {"dialect": type("Dialect", (), {"name": "postgresql"})})
+    monkeypatch.setattr(parse_and_stage_module, "engine", fake_engine)
+
+
+def test_parse_and_stage_parallel(tmp_path, concurrent_dialect):
+    path = _build_workbook(tmp_path)
+    sequential_batch, parallel_batch = str(uuid.uuid4()), str(uuid.uuid4())
+    sequential = parse_and_stage(
+        upload_id="u", import_batch_id=sequential_batch, file_path=str(path)
+    )
+    parallel = parse_and_stage(
+        upload_id="u",
+        import_batch_id=parallel_batch,
+        file_path=str(path),
+        parallel=True,
+        max_workers=3,
+    )
+    assert set(parallel["sheet_timings_ms"]) == set(SHEET_KEY_MAP.values())
+    for counts in (sequential, parallel):
+        counts.pop("rows_per_sec")
+        counts.pop("sheet_timings_ms")
+    assert parallel == sequential
+    assert _staged(parallel_batch) == _staged(sequential_batch)
+
+
+def test_parse_and_stage_parallel_failure_discards_batch(
+    tmp_path, monkeypatch, concurrent_dialect
+):
+    path = _build_long_workbook(tmp_path)
+    real_prepare = parse_and_stage_module._prepare_rows
+
+    def failing_prepare(df, required_cols):
+        if "Outcome Metric" in df.columns and df.index[0] > 0:
+            raise RuntimeError("boom")
+        return real_prepare(df, required_cols)
+
+    monkeypatch.setattr(parse_and_stage_module, "_prepare_rows", failing_prepare)
+    batch_id = str(uuid.uuid4())
+    with pytest.raises(RuntimeError):
+        parse_and_stage(
+            upload_id="u",
+            import_batch_id=batch_id,
+            file_path=str(path),
+            batch_size=3,
+            parallel=True,
+        )
+    assert all(rows == [] for rows in _staged(batch_id).values())
+    db = SessionLocal()
+    assert db.query(StagingCheckpoint).filter_by(import_batch_id=batch_id).count() == 0
+    db.close()
+
+
+def _build_long_workbook(tmp_path: Path, rows: int = 7) -> Path:
+    path = tmp_path / "long.xlsx"
+    with pd.ExcelWriter(path) as writer:
+        for name, cols in REQUIRED_SHEETS.items():
+            frame = pd.DataFrame([{c: f"{c} {i}" for c in cols} for i in range(rows)])
+            frame.to_excel(writer, sheet_name=name, index=False)
+    return path
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_parse_and_stage_resumes_after_failure(
+    tmp_path, monkeypatch, concurrent_dialect, parallel
+):
+    path = _build_long_workbook(tmp_path)
+    real_prepare = parse_and_stage_module._prepare_rows
+
+    def failing_prepare(df, required_cols):
+        # Fail on the second chunk of the Outcomes sheet.
+        if "Outcome Metric" in df.columns and df.index[0] > 0:
+            raise RuntimeError("boom")
+        return real_prepare(df, required_cols)
+
+    clean_batch, batch_id = str(uuid.uuid4()), str(uuid.uuid4())
+    parse_and_stage(
+        upload_id="u", import_batch_id=clean_batch, file_path=str(path), batch_size=3
+    )
+
+    monkeypatch.setattr(parse_and_stage_module, "_prepare_rows", failing_prepare)
+    with pytest.raises(RuntimeError):
+        parse_and_stage(
+            upload_id="u",
+            import_batch_id=batch_id,
+            file_path=str(path),
+            batch_size=3,
+            parallel=parallel,
+            resume=True,
+        )
+    partial = _staged(batch_id)
+    assert [r[0] for r in partial["stg_outcomes"]] == [1, 2, 3]
+
+    monkeypatch.setattr(parse_and_stage_module, "_prepare_rows", real_prepare)
+    counts = parse_and_stage(
+        upload_id="u",
+        import_batch_id=batch_id,
+        file_path=str(path),
+        batch_size=3,
+        parallel=parallel,
+    )
+    assert counts["outcomes"] == 7
+    assert counts["activities"] == 7
+    assert _staged(batch_id) == _staged(clean_batch)
+
+    # A further retry finds every sheet complete and writes nothing.
+    again = parse_and_stage(
+        upload_id="u", import_batch_id=batch_id, file_path=str(path), batch_size=3
+    )
+    assert again["outcomes"] == 7
+    assert again["rows_per_sec"] == 0
+    assert _staged(batch_id) == _staged(clean_batch)
@@ -0,0 +1,127 @@
+from pathlib import Path
+import gzip
+import io
+import json
+import os
+import sys
+import uuid
+
+import pytest
+from botocore.exceptions import ClientError
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+os.environ["database_url"] = "sqlite:///./test_archive.db"
+_db_path = Path("test_archive.db")
+if _db_path.exists():
+    _db_path.unlink()
+os.environ.setdefault("jwt_secret_key", "test")
+os.environ.setdefault("secret_key", "test")
+
+from backend.app.database import Base, engine, SessionLocal
+from backend.app.ingest.archive import archive_staged_rows, restore_staged_rows
+from backend.app.models import ImportBatch, StagingCheckpoint, StgActivity, StgOutcome
+
+
+class _MemoryS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+def setup_function(_):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _stage(batch_id: str, rows: int) -> None:
+    db = SessionLocal()
+    db.add(ImportBatch(id=batch_id, source_system="excel", triggered_by_user_id="user"))
+    db.flush()
+    for i in range(1, rows + 1):
+        db.add(
+            StgActivity(
+                id=str(uuid.uuid4()),
+                upload_id="u1",
+                row_num=i,
+                raw_json={"project_id": "p1", "activity_name": f"a{i}"},
+                parse_errors={"missing": ["date"]} if i == 1 else None,
+                row_hash=f"h{i}",
+                import_batch_id=batch_id,
+            )
+        )
+    db.add(StagingCheckpoint(import_batch_id=batch_id, sheet="activities", row_num=rows))
+    db.commit()
+    db.close()
+
+
+def _activities(db, batch_id):
+    return [
+        (r.id, r.row_num, r.raw_json, r.parse_errors, r.row_hash, r.ingested_at)
+        for r in db.query(StgActivity)
+        .filter(StgActivity.import_batch_id == batch_id)
+        .order_by(StgActivity.row_num)
+    ]
+
+
+def test_archive_moves_rows_to_storage_and_restore_brings_them_back():
+    batch_id = str(uuid.uuid4())
+    _stage(batch_id, 3)
+    s3 = _MemoryS3()
+    db = SessionLocal()
+    before = _activities(db, batch_id)
+
+    counts = archive_staged_rows(db, batch_id, s3=s3, bucket="b")
+    assert counts["stg_activities"] == 3
+    assert counts["stg_outcomes"] == 0
+    key = ("b", f"staging-archive/{batch_id}/stg_activities.jsonl.gz")
+    assert list(s3.objects) == [key]
+    lines = gzip.decompress(s3.objects[key]).splitlines()
+    assert [json.loads(line)["row_num"] for line in lines] == [1, 2, 3]
+    assert db.query(StgActivity).count() == 0
+    assert db.query(StagingCheckpoint).one().row_num == 3
+    batch = db.get(ImportBatch, batch_id)
+    assert batch.archived_at is not None
+    assert batch.archive_key == f"staging-archive/{batch_id}"
+
+    restored = restore_staged_rows(db, batch_id, s3=s3, bucket="b")
+    assert restored["stg_activities"] == 3
+    db.expire_all()
+    assert _activities(db, batch_id) == before
+    assert db.query(StgOutcome).count() == 0
+    assert db.get(ImportBatch, batch_id).archived_at is None
+
+    restore_staged_rows(db, batch_id, s3=s3, bucket="b")
+    assert db.query(StgActivity).count() == 3
+    db.close()
+
+
+def test_restore_requires_an_archive():
+    batch_id = str(uuid.uuid4())
+    _stage(batch_id, 1)
+    db = SessionLocal()
+    with pytest.raises(ValueError):
+        restore_staged_rows(db, batch_id, s3=_MemoryS3(), bucket="b")
+    db.close()
+
+
+def test_restore_raises_storage_errors_other_than_a_missing_object():
+    batch_id = str(uuid.uuid4())
+    _stage(batch_id, 1)
+    s3 = _MemoryS3()
+    db = SessionLocal()
+    archive_staged_rows(db, batch_id, s3=s3, bucket="b")
+
+    def denied(Bucket, Key):
+        raise ClientError({"Error": {"Code": "AccessDenied"}}, "GetObject")
+
+    s3.get_object = denied
+    with pytest.raises(ClientError):
+        restore_staged_rows(db, batch_id, s3=s3, bucket="b")
+    db.close()
@@ -0,0 +1,56 @@
+from pathlib import Path
+import os
+import sys
+
+import sqlalchemy as sa
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+os.environ.setdefault("database_url", "sqlite://")
+os.environ.setdefault("jwt_secret_key", "test")
+os.environ.setdefault("secret_key", "test")
+
+from backend.app.database import Base
+from backend.app.ingest.staging_tables import StagingTableRegistry
+from backend.app.models import StgActivity
+
+
+def _engine(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'registry.db'}")
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def test_declared_registry_uses_models_without_reflection(tmp_path):
+    engine = _engine(tmp_path)
+    registry = StagingTableRegistry(engine)
+    statements = []
+    sa.event.listen(engine, "before_cursor_execute", lambda *a: statements.append(a[2]))
+
+    registry.ensure_current()
+    assert registry.get("stg_activities") is StgActivity.__table__
+    assert statements == []
+
+
+def test_reflected_registry_refreshes_on_new_revision(tmp_path):
+    engine = _engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(sa.text("CREATE TABLE alembic_version (version_num VARCHAR(32))"))
+        conn.execute(sa.text("INSERT INTO alembic_version VALUES ('a1')"))
+    registry = StagingTableRegistry(engine, reflect=True)
+
+    registry.ensure_current()
+    first = registry.get("stg_activities")
+    assert registry.get("stg_activities") is first
+    assert "extra_col" not in first.c
+
+    with engine.begin() as conn:
+        conn.execute(sa.text("ALTER TABLE stg_activities ADD COLUMN extra_col VARCHAR"))
+    registry.ensure_current()
+    assert registry.get("stg_activities") is first
+
+    with engine.begin() as conn:
+        conn.execute(sa.text("UPDATE alembic_version SET version_num = 'b2'"))
+    registry.ensure_current()
+    refreshed = registry.get("stg_activities")
+    assert refreshed is not first
+    assert "extra_col" in refreshed.c
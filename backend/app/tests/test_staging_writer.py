@@ -0,0 +1,78 @@
+from pathlib import Path
+import csv
+import json
+import os
+import sys
+import types
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+os.environ.setdefault("database_url", "sqlite://")
+os.environ.setdefault("jwt_secret_key", "test")
+os.environ.setdefault("secret_key", "test")
+
+from backend.app.database import SessionLocal
+from backend.app.ingest.staging_writer import (
+    CopyStagingWriter,
+    StagingWriter,
+    copy_csv,
+    staging_writer,
+)
+from backend.app.models import StgActivity
+
+
+def test_copy_csv_distinguishes_null_and_empty_strings():
+    rows = [
+        {"id": "a", "row_num": 1, "raw_json": {"Notes": 'say "hi",\nbye'}, "parse_errors": None},
+        {"id": "", "row_num": 2, "raw_json": {}, "parse_errors": {"missing": ["Date"]}},
+    ]
+    buf = copy_csv(rows, ["id", "row_num", "raw_json", "parse_errors"], ["raw_json", "parse_errors"])
+    text = buf.getvalue()
+
+    assert text.splitlines()[0].endswith(",")  # unquoted empty field -> NULL
+    assert text.startswith('"a",1,')
+    assert '\n"",2,' in text  # quoted empty string stays a string
+    parsed = list(csv.reader(buf))
+    assert json.loads(parsed[0][2]) == {"Notes": 'say "hi",\nbye'}
+    assert json.loads(parsed[1][3]) == {"missing": ["Date"]}
+
+
+class _RecordingCursor:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def copy_expert(self, sql, buf):
+        self.calls.append((sql, buf.getvalue()))
+
+    def close(self):
+        pass
+
+
+def test_copy_writer_issues_copy_per_flush():
+    calls = []
+    dbapi_conn = types.SimpleNamespace(cursor=lambda: _RecordingCursor(calls))
+    quote = lambda name: f'"{name}"'  # noqa: E731
+    dialect = types.SimpleNamespace(identifier_preparer=types.SimpleNamespace(quote=quote))
+    db = types.SimpleNamespace(
+        get_bind=lambda: types.SimpleNamespace(dialect=dialect),
+        connection=lambda: types.SimpleNamespace(connection=dbapi_conn),
+    )
+    writer = CopyStagingWriter(db, StgActivity.__table__, batch_size=2)
+    for i in range(3):
+        writer.add({"id": str(i), "row_num": i + 1, "raw_json": {"n": i}, "parse_errors": None})
+    writer.flush()
+
+    assert writer.rows_written == 3
+    assert [sql for sql, _ in calls] == [
+        'COPY "stg_activities" ("id", "row_num", "raw_json", "parse_errors") '
+        "FROM STDIN WITH (FORMAT csv)"
+    ] * 2
+    assert calls[1][1] == '"2",3,"{""n"": 2}",\n'
+
+
+def test_sqlite_uses_batched_inserts():
+    db = SessionLocal()
+    try:
+        writer = staging_writer(db, StgActivity.__table__)
+        assert type(writer) is StagingWriter
+    finally:
+        db.close()
@@ -0,0 +1,112 @@
+from pathlib import Path
+import os
+import sys
+import uuid
+from io import BytesIO
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+os.environ.setdefault("database_url", "sqlite://")
+os.environ.setdefault("jwt_secret_key", "test")
+os.environ.setdefault("secret_key", "test")
+
+from backend.app.database import Base, engine, SessionLocal
+from backend.app.ingest.dedupe import (
+    claim_upload_object,
+    content_sha256,
+    record_deduplicated_job,
+    reusable_import_batch,
+    stored_object_key,
+)
+from backend.app.models.import_batches import ImportBatch, BatchStatus
+from backend.app.models.ingestion_jobs import IngestionJob, IngestionJobStatus
+from backend.app.models.uploads import Upload
+from backend.app.models.user import User
+
+
+def setup_function(_):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _upload(db, user_id, content, *, org_id=1, object_key="obj"):
+    upload = Upload(
+        org_id=org_id,
+        user_id=user_id,
+        filename="data.xlsx",
+        mime_type="application/octet-stream",
+        size=len(content),
+        object_key=object_key,
+        content_sha256=content_sha256(content),
+    )
+    db.add(upload)
+    db.flush()
+    return upload
+
+
+def _ingest(db, upload, status=IngestionJobStatus.success):
+    batch = ImportBatch(
+        id=str(uuid.uuid4()),
+        source_system="upload",
+        triggered_by_user_id="1",
+        status=BatchStatus.success,
+    )
+    db.add(batch)
+    db.flush()
+    db.add(
+        IngestionJob(
+            org_id=upload.org_id,
+            upload_id=upload.id,
+            import_batch_id=batch.id,
+            status=status,
+        )
+    )
+    db.flush()
+    return batch
+
+
+def test_stored_object_is_claimed_once_per_org():
+    db = SessionLocal()
+    digest = content_sha256(b"workbook")
+    assert stored_object_key(db, 1, digest) is None
+
+    assert claim_upload_object(db, 1, digest, "uploads/a.xlsx") == "uploads/a.xlsx"
+    assert claim_upload_object(db, 2, digest, "uploads/b.xlsx") == "uploads/b.xlsx"
+    # A concurrent upload that missed the lookup loses the claim.
+    assert claim_upload_object(db, 1, digest, "uploads/c.xlsx") == "uploads/a.xlsx"
+
+    assert stored_object_key(db, 1, digest) == "uploads/a.xlsx"
+    assert stored_object_key(db, 1, content_sha256(b"other")) is None
+    db.close()
+
+
+def test_content_hash_of_file_matches_bytes(monkeypatch):
+    from backend.app.ingest import dedupe
+
+    monkeypatch.setattr(dedupe, "HASH_CHUNK_SIZE", 3)
+    content = b"a workbook of several chunks"
+    assert content_sha256(BytesIO(content)) == content_sha256(content)
+
+
+def test_only_latest_successful_ingest_is_reused():
+    db = SessionLocal()
+    user = User(email="dedupe2@example.com", hashed_password="x", name="T")
+    db.add(user)
+    db.flush()
+    old = _upload(db, user.id, b"v1")
+    batch = _ingest(db, old)
+
+    again = _upload(db, user.id, b"v1")
+    assert reusable_import_batch(db, again).id == batch.id
+
+    # A failed ingest of other content does not count...
+    _ingest(db, _upload(db, user.id, b"v2"), status=IngestionJobStatus.failed)
+    assert reusable_import_batch(db, again).id == batch.id
+
+    job = record_deduplicated_job(db, again)
+    assert job.deduplicated and job.import_batch_id == batch.id
+
+    # ...but a successful one means v1 is no longer what is loaded.
+    _ingest(db, _upload(db, user.id, b"v2"))
+    assert reusable_import_batch(db, again) is None
+    assert record_deduplicated_job(db, again) is None
+    db.close()
@@ -8,6 +8,7 @@ sys.path.append(str(BASE_DIR))
 sys.path.append(str(BASE_DIR.parent))
 from jose import jwt
 import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
 
 # Setup environment
@@ -29,12 +30,15 @@ os.environ.setdefault("AUTH0_DOMAIN", "test")
 from backend.app.main import app
 from backend.app.database import Base, engine, SessionLocal
 from backend.app.models.user import User
+from backend.app.models import ImportBatch, IngestionJob, StagingCheckpoint
+from backend.app.ingest.staging_tables import STAGING_MODELS
 from backend.app.routes import uploads as uploads_route
+from backend.app.routes.ingest import jobs as jobs_route
 from backend.app.ingest.validators import TEMPLATE_SHEETS
 from backend.worker.tasks.ingest_excel_or_csv import ingest_excel_or_csv
 from backend.app.api import deps as deps_module
-object.__setattr__(deps_module.settings, "auth0_domain", "test")
-object.__setattr__(deps_module.settings, "auth0_audience", "test")
+object.__setattr__(deps_module.settings, "AUTH0_DOMAIN", "test")
+object.__setattr__(deps_module.settings, "AUTH0_AUDIENCE", "test")
 def _fake_verify_token(token: str):
     try:
         return jwt.decode(token, os.environ["jwt_secret_key"], algorithms=["HS256"])
@@ -42,6 +46,7 @@ def _fake_verify_token(token: str):
         return None
 deps_module.verify_token = _fake_verify_token
 uploads_route.verify_token = _fake_verify_token
+jobs_route.verify_token = _fake_verify_token
 
 # Prepare database
 _db_path = Path("uploads_api.db")
@@ -67,8 +72,12 @@ class DummyS3:
     def get_object(self, Bucket, Key):
         return {"Body": BytesIO(self.store[Key])}
 
+    def download_file(self, Bucket, Key, Filename):
+        Path(Filename).write_bytes(self.store[Key])
+
 dummy_s3 = DummyS3()
 uploads_route.get_s3_client = lambda: dummy_s3
+jobs_route.get_s3_client = lambda: dummy_s3
 
 # Stub celery task
 class DummyAsyncResult:
@@ -83,6 +92,12 @@ ingest_excel_or_csv.delay = _fake_delay
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def _org_member_role(monkeypatch):
+    # Users carry no stored roles; grant the one the upload routes require.
+    monkeypatch.setattr(User, "roles", ["org_member"], raising=False)
+
+
 def make_token():
     payload = {"sub": str(USER_ID), "type": "access", "org_id": 123, "roles": ["org_member"]}
     return jwt.encode(payload, os.environ["jwt_secret_key"], algorithm="HS256")
@@ -97,6 +112,8 @@ def _build_valid_workbook():
                 data[col] = [1]
             elif typ is float:
                 data[col] = [1.0]
+            elif col.endswith("Date"):
+                data[col] = ["2024-01-01"]
             else:
                 data[col] = ["x"]
         sheets[name] = pd.DataFrame(data)
@@ -154,3 +171,63 @@ def test_upload_validation_failure():
     body = res.json()
     assert body["status"] == "failed"
     assert body["errors"]
+
+
+def test_identical_upload_reuses_stored_object():
+    token = make_token()
+    content = _build_valid_workbook()
+    mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    before = len(dummy_s3.store)
+    ids = []
+    for _ in range(2):
+        files = {"file": ("same.xlsx", content, mime)}
+        res = client.post("/api/uploads", files=files, headers={"Authorization": f"Bearer {token}"})
+        assert res.status_code == 201
+        ids.append(res.json()["upload_id"])
+
+    assert ids[0] != ids[1]
+    assert len(dummy_s3.store) - before <= 1
+
+
+def _ingest_state():
+    db = SessionLocal()
+    try:
+        models = (ImportBatch, IngestionJob, StagingCheckpoint, *STAGING_MODELS.values())
+        return {model.__name__: db.query(model).count() for model in models}
+    finally:
+        db.close()
+
+
+def test_dry_run_job_leaves_nothing_behind():
+    token = make_token()
+    mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    upload_ids = {}
+    for name, content in (
+        ("valid", _build_valid_workbook()),
+        ("invalid", _build_invalid_workbook()),
+        ("unreadable", b"not a workbook"),
+    ):
+        files = {"file": (f"{name}.xlsx", content, mime)}
+        res = client.post("/api/uploads", files=files, headers={"Authorization": f"Bearer {token}"})
+        upload_ids[name] = res.json()["upload_id"]
+    before = _ingest_state()
+
+    res = client.post(
+        "/ingest/jobs",
+        json={"upload_id": upload_ids["valid"], "dry_run": True},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert res.status_code == 200
+    body = res.json()
+    assert body["dry_run"] is True
+    assert body["counts"]["projects"]["inserted"] == 1
+    assert _ingest_state() == before
+
+    for name, code in (("invalid", 422), ("unreadable", 400)):
+        res = client.post(
+            "/ingest/jobs",
+            json={"upload_id": upload_ids[name], "dry_run": True},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert res.status_code == code
+        assert _ingest_state() == before
@@ -0,0 +1,127 @@
+from pathlib import Path
+import os
+import sys
+import uuid
+
+sys.path.append(str(Path(__file__).resolve().parents[3]))
+os.environ.setdefault("database_url", "sqlite://")
+os.environ.setdefault("jwt_secret_key", "test")
+os.environ.setdefault("secret_key", "test")
+
+from datetime import date
+
+import sqlalchemy as sa
+from sqlalchemy import event
+
+from backend.app.database import Base, engine, SessionLocal
+from backend.app.ingest.upsert import bulk_upsert
+from backend.app.models import Activity, Project
+
+KEY = ("project_fk", "activity_name", "date")
+
+
+def setup_function(_):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _session_with_project():
+    db = SessionLocal()
+    db.add(Project(id="p", owner_org_id="o", project_id="p1", source_system="excel"))
+    db.flush()
+    return db
+
+
+def _activity(name, when, row_hash, notes=None):
+    return {
+        "project_fk": "p",
+        "activity_name": name,
+        "date": when,
+        "notes": notes,
+        "row_hash": row_hash,
+        "source_system": "excel",
+    }
+
+
+def test_bulk_upsert_counts_inserts_updates_and_noops():
+    db = _session_with_project()
+    table = Activity.__table__
+    rows = [_activity("a", date(2024, 1, 1), "h1"), _activity("b", None, "h2")]
+    assert bulk_upsert(db, table, rows, key=KEY) == {"inserted": 2, "updated": 0}
+    ids = {a.activity_name: a.id for a in db.query(Activity)}
+
+    rows = [
+        _activity("a", date(2024, 1, 1), "h1b", notes="changed"),
+        _activity("b", None, "h2b", notes="null key"),
+        _activity("c", date(2024, 1, 2), "h3"),
+    ]
+    assert bulk_upsert(db, table, rows, key=KEY) == {"inserted": 1, "updated": 2}
+    assert bulk_upsert(db, table, rows, key=KEY) == {"inserted": 0, "updated": 0}
+
+    db.expire_all()
+    stored = {a.activity_name: a for a in db.query(Activity)}
+    assert len(stored) == 3
+    assert stored["a"].id == ids["a"] and stored["a"].notes == "changed"
+    assert stored["b"].id == ids["b"] and stored["b"].notes == "null key"
+    db.close()
+
+
+def test_bulk_upsert_matches_rows_without_owner():
+    metadata = sa.MetaData()
+    table = sa.Table(
+        "owned_items",
+        metadata,
+        sa.Column("id", sa.String, primary_key=True),
+        sa.Column("owner_org_id", sa.String),
+        sa.Column("item_id", sa.String),
+        sa.Column("name", sa.String),
+        sa.Column("row_hash", sa.String),
+        sa.Column("hash_version", sa.Integer, nullable=False, default=1),
+        sa.UniqueConstraint("owner_org_id", "item_id"),
+    )
+    metadata.create_all(bind=engine)
+    key = ("owner_org_id", "item_id")
+    row = {"owner_org_id": None, "item_id": "i1", "name": "A", "row_hash": "h1"}
+    db = SessionLocal()
+    try:
+        assert bulk_upsert(db, table, [row], key=key) == {"inserted": 1, "updated": 0}
+        assert bulk_upsert(db, table, [row], key=key) == {"inserted": 0, "updated": 0}
+        changed = {**row, "name": "B", "row_hash": "h2"}
+        assert bulk_upsert(db, table, [changed], key=key) == {"inserted": 0, "updated": 1}
+        assert db.execute(sa.select(table.c.item_id, table.c.name)).all() == [("i1", "B")]
+    finally:
+        db.close()
+        metadata.drop_all(bind=engine)
+
+
+def test_bulk_upsert_repeated_key_keeps_last_row():
+    db = _session_with_project()
+    rows = [
+        _activity("a", date(2024, 1, 1), "h1", notes="first"),
+        _activity("a", date(2024, 1, 1), "h2", notes="second"),
+    ]
+    counts = bulk_upsert(db, Activity.__table__, rows, key=KEY)
+    assert counts == {"inserted": 1, "updated": 1}
+    assert [a.notes for a in db.query(Activity)] == ["second"]
+    db.close()
+
+
+def test_bulk_upsert_writes_with_on_conflict():
+    db = _session_with_project()
+    statements = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        rows = [_activity(str(uuid.uuid4()), date(2024, 1, 1), str(i)) for i in range(5)]
+        bulk_upsert(db, Activity.__table__, rows, key=KEY, chunk_size=2)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+    db.close()
+
+    writes = [s for s in statements if s.startswith("INSERT")]
+    assert len(writes) == 3
+    assert "ON CONFLICT (project_fk, activity_name, date) DO UPDATE" in writes[0]
+    assert "activities.row_hash IS NOT excluded.row_hash" in writes[0]
@@ -0,0 +1,47 @@
+"""add staging checkpoints and batch step markers
+
+Revision ID: 5e2a7c91d3b4
+Revises: fcb3e9d30177
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "5e2a7c91d3b4"
+down_revision: Union[str, None] = "fcb3e9d30177"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "staging_checkpoints",
+        sa.Column(
+            "import_batch_id",
+            sa.String(),
+            sa.ForeignKey("import_batches.id"),
+            primary_key=True,
+        ),
+        sa.Column("sheet", sa.String(), primary_key=True),
+        sa.Column("row_num", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+        ),
+    )
+    with op.batch_alter_table("import_batches") as batch:
+        batch.add_column(sa.Column("staged_at", sa.DateTime(timezone=True), nullable=True))
+        batch.add_column(sa.Column("loaded_at", sa.DateTime(timezone=True), nullable=True))
+        batch.add_column(sa.Column("load_counts", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("import_batches") as batch:
+        batch.drop_column("load_counts")
+        batch.drop_column("loaded_at")
+        batch.drop_column("staged_at")
+    op.drop_table("staging_checkpoints")
@@ -0,0 +1,41 @@
+"""add upload content hash and deduplicated ingestion jobs
+
+Revision ID: 8d41b6e2f0a7
+Revises: 5e2a7c91d3b4
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "8d41b6e2f0a7"
+down_revision: Union[str, None] = "5e2a7c91d3b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("uploads") as batch:
+        batch.add_column(sa.Column("content_sha256", sa.String(length=64), nullable=True))
+        batch.create_index(
+            "ix_uploads_org_id_content_sha256", ["org_id", "content_sha256"]
+        )
+    with op.batch_alter_table("ingestion_jobs") as batch:
+        batch.add_column(
+            sa.Column(
+                "deduplicated",
+                sa.Boolean(),
+                nullable=False,
+                server_default=sa.false(),
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("ingestion_jobs") as batch:
+        batch.drop_column("deduplicated")
+    with op.batch_alter_table("uploads") as batch:
+        batch.drop_index("ix_uploads_org_id_content_sha256")
+        batch.drop_column("content_sha256")
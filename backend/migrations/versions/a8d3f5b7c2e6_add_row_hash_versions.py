@@ -0,0 +1,44 @@
+"""add hash_version next to row_hash
+
+Revision ID: a8d3f5b7c2e6
+Revises: f2c6d8a4e1b9
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "a8d3f5b7c2e6"
+down_revision: Union[str, None] = "f2c6d8a4e1b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every hash stored so far is SHA-256, row hash version 1.
+TABLES = [
+    "stg_project_info",
+    "stg_activities",
+    "stg_outcomes",
+    "stg_funding_resources",
+    "stg_beneficiaries",
+    "projects",
+    "activities",
+    "outcomes",
+    "funding_resources",
+    "beneficiaries",
+]
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(
+                sa.Column("hash_version", sa.Integer(), nullable=False, server_default="1")
+            )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("hash_version")
@@ -0,0 +1,49 @@
+"""create upload_objects, one stored object per org and content hash
+
+Revision ID: b6e1d3f5a7c9
+Revises: a8d3f5b7c2e6
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "b6e1d3f5a7c9"
+down_revision: Union[str, None] = "a8d3f5b7c2e6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_objects",
+        sa.Column("org_id", sa.Integer(), nullable=False),
+        sa.Column("content_sha256", sa.String(length=64), nullable=False),
+        sa.Column("object_key", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("org_id", "content_sha256"),
+    )
+    # The earliest stored upload of each content becomes its object.
+    op.execute(
+        """
+        INSERT INTO upload_objects (org_id, content_sha256, object_key)
+        SELECT org_id, content_sha256, object_key
+        FROM uploads
+        WHERE id IN (
+            SELECT MIN(id) FROM uploads
+            WHERE content_sha256 IS NOT NULL AND object_key <> ''
+            GROUP BY org_id, content_sha256
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("upload_objects")
@@ -0,0 +1,44 @@
+"""index core row hashes and staging batch ids
+
+Revision ID: c3f8a9d2e5b6
+Revises: 8d41b6e2f0a7
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "c3f8a9d2e5b6"
+down_revision: Union[str, None] = "8d41b6e2f0a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CORE_TABLES = (
+    "projects",
+    "activities",
+    "outcomes",
+    "funding_resources",
+    "beneficiaries",
+)
+STAGING_TABLES = (
+    "stg_project_info",
+    "stg_activities",
+    "stg_outcomes",
+    "stg_funding_resources",
+    "stg_beneficiaries",
+)
+
+
+def upgrade() -> None:
+    for table in CORE_TABLES:
+        op.create_index(f"ix_{table}_row_hash", table, ["row_hash"])
+    for table in STAGING_TABLES:
+        op.create_index(f"ix_{table}_import_batch_id", table, ["import_batch_id"])
+
+
+def downgrade() -> None:
+    for table in STAGING_TABLES:
+        op.drop_index(f"ix_{table}_import_batch_id", table_name=table)
+    for table in CORE_TABLES:
+        op.drop_index(f"ix_{table}_row_hash", table_name=table)
@@ -0,0 +1,26 @@
+"""add change set to import batches
+
+Revision ID: d7b2e4f6a8c1
+Revises: c3f8a9d2e5b6
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "d7b2e4f6a8c1"
+down_revision: Union[str, None] = "c3f8a9d2e5b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("import_batches") as batch:
+        batch.add_column(sa.Column("change_set", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("import_batches") as batch:
+        batch.drop_column("change_set")
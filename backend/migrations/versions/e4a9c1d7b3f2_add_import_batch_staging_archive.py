@@ -0,0 +1,28 @@
+"""add staging archive columns to import batches
+
+Revision ID: e4a9c1d7b3f2
+Revises: d7b2e4f6a8c1
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "e4a9c1d7b3f2"
+down_revision: Union[str, None] = "d7b2e4f6a8c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("import_batches") as batch:
+        batch.add_column(sa.Column("archive_key", sa.String(), nullable=True))
+        batch.add_column(sa.Column("archived_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("import_batches") as batch:
+        batch.drop_column("archived_at")
+        batch.drop_column("archive_key")
@@ -0,0 +1,85 @@
+"""add typed columns to staging tables
+
+Revision ID: f2c6d8a4e1b9
+Revises: e4a9c1d7b3f2
+Create Date: 2026-10-18 00:00:00.000000
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "f2c6d8a4e1b9"
+down_revision: Union[str, None] = "e4a9c1d7b3f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_PARENT = [("owner_org_id", sa.String()), ("project_id", sa.String())]
+
+TYPED_COLUMNS = {
+    "stg_project_info": _PARENT
+    + [
+        ("name", sa.String()),
+        ("org_name", sa.String()),
+        ("start_date", sa.Date()),
+        ("end_date", sa.Date()),
+        ("country", sa.String()),
+        ("region", sa.String()),
+        ("sdg_goal", sa.String()),
+        ("notes", sa.Text()),
+    ],
+    "stg_activities": _PARENT
+    + [
+        ("date", sa.Date()),
+        ("activity_type", sa.String()),
+        ("activity_name", sa.String()),
+        ("beneficiaries_reached", sa.Integer()),
+        ("location", sa.String()),
+        ("notes", sa.Text()),
+    ],
+    "stg_outcomes": _PARENT
+    + [
+        ("date", sa.Date()),
+        ("outcome_metric", sa.String()),
+        ("value", sa.Float()),
+        ("unit", sa.String()),
+        ("method", sa.String()),
+        ("notes", sa.Text()),
+    ],
+    "stg_funding_resources": _PARENT
+    + [
+        ("date", sa.Date()),
+        ("funding_source", sa.String()),
+        ("received", sa.Float()),
+        ("spent", sa.Float()),
+        ("volunteer_hours", sa.Float()),
+        ("staff_hours", sa.Float()),
+        ("notes", sa.Text()),
+    ],
+    "stg_beneficiaries": _PARENT
+    + [
+        ("date", sa.Date()),
+        ("group", sa.String()),
+        ("count", sa.Integer()),
+        ("demographic_info", sa.String()),
+        ("location", sa.String()),
+        ("notes", sa.Text()),
+    ],
+}
+
+
+def upgrade() -> None:
+    # Rows staged before this revision are normalized by the loader on first
+    # use (see load_to_core._backfill_typed_columns).
+    for table, columns in TYPED_COLUMNS.items():
+        with op.batch_alter_table(table) as batch:
+            for name, type_ in columns:
+                batch.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade() -> None:
+    for table, columns in TYPED_COLUMNS.items():
+        with op.batch_alter_table(table) as batch:
+            for name, _ in reversed(columns):
+                batch.drop_column(name)
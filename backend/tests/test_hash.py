@@ -1,9 +1,13 @@
+import datetime
 import pathlib
+import random
 import sys
 
+import pytest
+
 sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
 
-from backend.app.ingest.hash import canonical_row_hash
+from backend.app.ingest.hash import canonical_row_hash, canonical_row_hashes
 
 
 def test_hash_stability():
@@ -39,3 +43,57 @@ def test_only_changed_rows_update():
 
     assert changed == [2]
 
+
+def _random_value(rnd: random.Random):
+    choice = rnd.randrange(12)
+    if choice == 0:
+        return None
+    if choice == 1:
+        return rnd.randint(-5, 5)
+    if choice == 2:
+        return rnd.choice([0.5, 1.0, -2.25, float("nan"), 1e20])
+    if choice == 3:
+        return rnd.choice([True, False])
+    if choice == 4:
+        return datetime.date(2024, rnd.randint(1, 12), rnd.randint(1, 28))
+    if choice == 5:
+        return datetime.datetime(2024, 1, rnd.randint(1, 28), rnd.randint(0, 23))
+    if choice == 6:
+        return rnd.choice(["2024-01-31", " 2024-02-01Z ", "20240101", "2024-W01", "2024-13-01"])
+    if choice == 7:
+        return rnd.choice(["P-001", " p-001 ", "Workshop", "WORKSHOP", "", "  ", "naïve", "1234"])
+    if choice == 8:
+        return {"b": rnd.randint(0, 3), "a": "X"}
+    if choice == 9:
+        return [rnd.randint(0, 3), " Y "]
+    return "".join(rnd.choice("0123456789-:TZ abc") for _ in range(rnd.randint(0, 12)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_batch_hashes_match_row_hashes(seed):
+    rnd = random.Random(seed)
+    names = rnd.sample(["Project ID", "date", "b", "A", "notes", "Value", "z"], k=rnd.randint(1, 7))
+    n_rows = rnd.randint(1, 40)
+    # Draw from a small pool so that values repeat, as they do in real sheets.
+    pool = [_random_value(rnd) for _ in range(15)]
+    columns = {name: [rnd.choice(pool) for _ in range(n_rows)] for name in names}
+    rows = [{name: columns[name][i] for name in names} for i in range(n_rows)]
+
+    assert canonical_row_hashes(columns) == [canonical_row_hash(r) for r in rows]
+
+
+def test_batch_hashes_empty():
+    assert canonical_row_hashes({}) == []
+    assert canonical_row_hashes({"a": []}) == []
+
+
+def test_batch_hashes_keep_equal_values_that_serialize_differently():
+    utc = datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone.utc)
+    cet = utc.astimezone(datetime.timezone(datetime.timedelta(hours=1)))
+    columns = {
+        "a": [0.0, -0.0, 1, 1.0, True],
+        "b": [utc, cet, (1,), (1.0,), None],
+    }
+    rows = [{"a": a, "b": b} for a, b in zip(columns["a"], columns["b"])]
+
+    assert canonical_row_hashes(columns) == [canonical_row_hash(r) for r in rows]
@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from typing import Dict, Any
 import os
 import time
+from datetime import datetime, timezone
 from tempfile import NamedTemporaryFile
 
 from celery import shared_task
@@ -16,6 +17,8 @@ class StepCounts:
     fetched: int = 0
     staged: int = 0
     loaded: int = 0
+    stage_rows_per_sec: float = 0.0
+    pii_redactions: int = 0
 
 
 def _close_db(db) -> None:
@@ -32,9 +35,12 @@ def ingest_excel_or_csv(self, job_id: int) -> Dict[str, Any]:
     from backend.app.models.ingestion_jobs import IngestionJob, IngestionJobStatus
     from backend.app.models.import_batches import ImportBatch, BatchStatus
     from backend.app.models.uploads import Upload
+    from backend.app.models.staging import StagingCheckpoint
     from backend.app.observability.events import log_event
-    from backend.app.ingest.parse_and_stage import parse_and_stage
-    from backend.app.ingest.load_to_core import load_to_core
+    from backend.app.ingest.parse_and_stage import SHEET_KEY_MAP, parse_and_stage
+    from backend.app.ingest.load_to_core import ENTITY_NAMES, load_to_core
+    from backend.app.ingest.dedupe import content_sha256
+    from backend.app.ingest.archive import STAGING_ARCHIVE_ENABLED, archive_staged_rows
     from backend.app.services.analytics_service import AnalyticsService
     from backend.app.metabase.api import sync_schema
     from backend.app.storage.s3_client import get_s3_client
@@ -59,39 +65,76 @@ def ingest_excel_or_csv(self, job_id: int) -> Dict[str, Any]:
         db.commit()
         log_event("ingest_started", job_id=job.id, import_batch_id=job.import_batch_id)
 
-        # fetch -------------------------------------------------------------
-        log_event("ingest_fetch", job_id=job.id)
-        upload = db.query(Upload).filter(Upload.id == job.upload_id).first()
-        if upload is None:
-            raise RuntimeError("Upload not found")
-        bucket = os.environ.get("S3_BUCKET")
-        s3 = get_s3_client()
-        with NamedTemporaryFile(delete=False) as tmp:
-            if bucket:
-                s3.download_file(bucket, upload.object_key, tmp.name)
-            else:
-                s3.download_fileobj(None, upload.object_key, tmp)  # type: ignore[arg-type]
-            temp_path = tmp.name
-        counts.fetched = 1
-
-        # stage -------------------------------------------------------------
-        log_event("ingest_stage", job_id=job.id)
-        staged_counts = parse_and_stage(
-            upload_id=str(upload.id),
-            import_batch_id=job.import_batch_id,
-            file_path=temp_path,
-            source_system="upload",
-        )
-        counts.staged = sum(staged_counts.values())
+        # A retried task skips the steps that already committed for the batch.
+        stage_timings_ms: Dict[str, int] = {}
+        if batch is not None and batch.staged_at is not None:
+            log_event("ingest_stage_skipped", job_id=job.id)
+            counts.staged = sum(
+                cp.row_num
+                for cp in db.query(StagingCheckpoint).filter(
+                    StagingCheckpoint.import_batch_id == job.import_batch_id
+                )
+            )
+        else:
+            # fetch ---------------------------------------------------------
+            log_event("ingest_fetch", job_id=job.id)
+            upload = db.query(Upload).filter(Upload.id == job.upload_id).first()
+            if upload is None:
+                raise RuntimeError("Upload not found")
+            bucket = os.environ.get("S3_BUCKET")
+            s3 = get_s3_client()
+            with NamedTemporaryFile(delete=False) as tmp:
+                if bucket:
+                    s3.download_file(bucket, upload.object_key, tmp.name)
+                else:
+                    s3.download_fileobj(None, upload.object_key, tmp)  # type: ignore[arg-type]
+                temp_path = tmp.name
+            counts.fetched = 1
+            if upload.content_sha256 is None:
+                # Signed-URL uploads bypass the API, so hash them here for
+                # later duplicate detection.
+                with open(temp_path, "rb") as fh:
+                    upload.content_sha256 = content_sha256(fh)
+
+            # stage ---------------------------------------------------------
+            log_event("ingest_stage", job_id=job.id)
+            staged_counts = parse_and_stage(
+                upload_id=str(upload.id),
+                import_batch_id=job.import_batch_id,
+                file_path=temp_path,
+                source_system="upload",
+                resume=True,
+            )
+            counts.staged = sum(staged_counts[key] for key in SHEET_KEY_MAP.values())
+            counts.stage_rows_per_sec = staged_counts["rows_per_sec"]
+            counts.pii_redactions = sum(staged_counts["pii_redactions"].values())
+            stage_timings_ms = staged_counts["sheet_timings_ms"]
+            if batch is not None:
+                batch.staged_at = datetime.now(timezone.utc)
+                db.commit()
 
         # load --------------------------------------------------------------
-        log_event("ingest_load", job_id=job.id)
-        loaded = load_to_core(job.import_batch_id)
-        counts.loaded = sum(v["inserted"] + v["updated"] for v in loaded.values())
+        if batch is not None and batch.loaded_at is not None:
+            log_event("ingest_load_skipped", job_id=job.id)
+            loaded = batch.load_counts or {}
+        else:
+            log_event("ingest_load", job_id=job.id)
+            loaded = load_to_core(job.import_batch_id)
+        counts.loaded = sum(
+            loaded[name]["inserted"] + loaded[name]["updated"] for name in ENTITY_NAMES
+        )
+        load_timings_ms = loaded.get("durations_ms", {})
+
+        # Downstream work is limited to what the load changed.
+        changes = None
+        if batch is not None:
+            db.refresh(batch)
+            changes = batch.change_set
 
         # refresh facts -----------------------------------------------------
-        service = AnalyticsService()
-        service.refresh_facts(db)
+        if changes is None or changes["project_fks"]:
+            service = AnalyticsService()
+            service.refresh_facts(db, changes)
 
         # best-effort Metabase sync ----------------------------------------
         try:
@@ -111,12 +154,37 @@ def ingest_excel_or_csv(self, job_id: int) -> Dict[str, Any]:
             import_batch_id=job.import_batch_id,
             duration_ms=duration_ms,
             counts=counts.__dict__,
+            stage_timings_ms=stage_timings_ms,
+            load_timings_ms=load_timings_ms,
         )
+        # archive staging ---------------------------------------------------
+        # Best effort: the rows stay staged if the archive cannot be written.
+        if (
+            STAGING_ARCHIVE_ENABLED
+            and batch is not None
+            and batch.archived_at is None
+            and os.environ.get("S3_BUCKET")
+        ):
+            try:
+                archive_staged_rows(db, job.import_batch_id)
+            except Exception:
+                db.rollback()
+                log_event("staging_archive_failed", job_id=job.id, import_batch_id=job.import_batch_id)
         try:
-            recompute_metrics.delay(org_id=str(job.org_id))
+            if changes is None:
+                recompute_metrics.delay(org_id=str(job.org_id))
+            elif changes["project_fks"]:
+                recompute_metrics.delay(
+                    org_id=str(job.org_id), project_ids=changes["project_fks"]
+                )
         except Exception:
             pass
-        return {"status": "success", "duration_ms": duration_ms}
+        return {
+            "status": "success",
+            "duration_ms": duration_ms,
+            "stage_timings_ms": stage_timings_ms,
+            "load_timings_ms": load_timings_ms,
+        }
     except Exception as exc:  # pragma: no cover - exercised in tests
         db.rollback()
         error_json = {"error": str(exc), "sheet": None, "row": None}
@@ -13,8 +13,17 @@ def _close_db(db) -> None:
 
 
 @shared_task(name="recompute_metrics")
-def recompute_metrics(self, org_id: str, project_id: str | None = None) -> Dict[str, int]:
-    """Recompute summary metrics for an organization or single project."""
+def recompute_metrics(
+    self,
+    org_id: str,
+    project_id: str | None = None,
+    project_ids: List[str] | None = None,
+) -> Dict[str, int]:
+    """Recompute summary metrics for an organization or single project.
+
+    ``project_ids`` limits the work to those projects, e.g. the ones an
+    ingest actually changed.
+    """
     from backend.app.database import SessionLocal
     from backend.app.metrics.compute import recompute_for_project
     from backend.app.models import (
@@ -27,8 +36,8 @@ def recompute_metrics(self, org_id: str, project_id: str | None = None) -> Dict[
     db = SessionLocal()
     try:
         if project_id:
-            project_ids: List[str] = [project_id]
-        else:
+            project_ids = [project_id]
+        elif project_ids is None:
             project_ids = [
                 p.id for p in db.query(Project).filter(Project.owner_org_id == str(org_id)).all()
             ]